@@ -1,16 +1,20 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-import gspread
-from google.oauth2.service_account import Credentials
+from nucleo import guildas, interface, lote, discord, motor, medicao
+from nucleo.motor import UPS
+from nucleo.indice import IndiceMembros, SEM_ID
+from nucleo.ranking import Ranking
 
 # ==============================================================================
 # --- 1. CONFIGURAÇÃO DE ESTÉTICA (DARK/GOTHIC) ---
 # ==============================================================================
-def configurar_estetica_visual():
+@st.cache_resource
+def estilo_css():
+    """Bloco <style> da página, montado uma vez por processo (o markdown é reenviado a cada execução)."""
     background_url = "https://images4.alphacoders.com/740/thumb-1920-740591.png"
 
-    st.markdown(f"""
+    return f"""
     <style>
         @import url('https://fonts.googleapis.com/css2?family=UnifrakturMaguntia&display=swap');
 
@@ -122,42 +126,22 @@ def configurar_estetica_visual():
             border-radius: 5px;
         }}
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+def configurar_estetica_visual():
+    st.markdown(estilo_css(), unsafe_allow_html=True)
 
 # ==============================================================================
 # --- 2. DADOS E LÓGICA ---
 # ==============================================================================
 
-METAS_PONTUACAO = {
-    'f*ck':      {'ciclo': 1, 'meta_up': 10, 'meta_manter': 7},
-    '100%':      {'ciclo': 1, 'meta_up': 17, 'meta_manter': 13},
-    'woo':       {'ciclo': 1, 'meta_up': 25, 'meta_manter': 20},
-    'sex':       {'ciclo': 1, 'meta_up': 35, 'meta_manter': 28},
-    'note':      {'ciclo': 1, 'meta_up': 45, 'meta_manter': 36},
-    'aura':      {'ciclo': 1, 'meta_up': 55, 'meta_manter': 44},
-    'all wild':  {'ciclo': 1, 'meta_up': 66, 'meta_manter': 53},
-    'cute':      {'ciclo': 1, 'meta_up': 78, 'meta_manter': 62},
-    'mello':     {'ciclo': 1, 'meta_up': 92, 'meta_manter': 74},
-    'void':      {'ciclo': 1, 'meta_up': 106, 'meta_manter': 85},
-    'dawn':      {'ciclo': 1, 'meta_up': 122, 'meta_manter': 98},
-    'upper':     {'ciclo': 1, 'meta_up': 140, 'meta_manter': 112},
-    'Light':     {'ciclo': 1, 'meta_up': 160, 'meta_manter': 128},
-}
-
-CARGOS_LISTA = [
-    'f*ck', '100%', 'woo', 'sex', 'note', 'aura', 'all wild', 
-    'cute', 'mello', 
-    'void', 'dawn', 'upper', 'Light'
-]
-
-MENSAGENS_POR_PONTO = 50
-SHEET_NAME_PRINCIPAL = "dados sistema"
-
-COLUNAS_PADRAO = [
-    'usuario', 'user_id', 'cargo', 'situação', 'Semana_Atual',
-    'Pontos_Acumulados_Ciclo', 'Pontos_Semana', 'Bonus_Semana',
-    'Multiplicador_Individual', 'Data_Ultima_Atualizacao', 'Pontos_Total_Final'
-]
+# Metas, cargos e colunas ficam no motor (compartilhado com a linha de comando)
+METAS_PONTUACAO = UPS.metas
+CARGOS_LISTA = UPS.cargos
+METAS_COMPILADAS = UPS.metas_compiladas
+MENSAGENS_POR_PONTO = motor.MENSAGENS_POR_PONTO
+GUILDA = guildas.PADRAO  # guilda desta sessão: trocada por escolher_guilda() no início da interface
+COLUNAS_PADRAO = UPS.colunas
 
 col_usuario = 'usuario'
 col_user_id = 'user_id'
@@ -169,74 +153,60 @@ col_pontos_sem = 'Pontos_Semana'
 col_bonus_sem = 'Bonus_Semana'
 col_mult_ind = 'Multiplicador_Individual'
 col_pontos_final = 'Pontos_Total_Final'
+COLUNAS_NUMERICAS = UPS.colunas_numericas
 
-@st.cache_resource(ttl=3600)
-def get_gsheets_client():
-    if "gcp_service_account" not in st.secrets or "gsheets_config" not in st.secrets:
-        st.error("Secrets não configurados.")
-        return None
-    try:
-        creds_json = st.secrets["gcp_service_account"]
-        scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-        credentials = Credentials.from_service_account_info(creds_json, scopes=scopes)
-        return gspread.authorize(credentials)
-    except Exception as e:
-        st.error(f"Erro Conexão: {e}")
-        return None
-
-gc = get_gsheets_client()
-
-@st.cache_data(ttl=5)
-def carregar_dados(sheet_name):
-    if gc is None: return pd.DataFrame(columns=COLUNAS_PADRAO)
-    try:
-        SPREADSHEET_URL = st.secrets["gsheets_config"]["spreadsheet_url"]
-        sh = gc.open_by_url(SPREADSHEET_URL)
-        worksheet = sh.worksheet(sheet_name)
-        data = worksheet.get_all_records()
-        if not data: df = pd.DataFrame(columns=COLUNAS_PADRAO)
-        else: df = pd.DataFrame(data)
-        
-        if col_user_id not in df.columns:
-            if col_usuario in df.columns: loc = df.columns.get_loc(col_usuario) + 1
-            else: loc = 1 
-            df.insert(loc, col_user_id, 'N/A')
-        
-        df = df.reindex(columns=COLUNAS_PADRAO, fill_value='0.0')
-        df[col_usuario] = df[col_usuario].astype(str)
-        
-        cols_num = [col_sem, col_pontos_acum, col_pontos_sem, col_bonus_sem, col_mult_ind, col_pontos_final]
-        for col in cols_num:
-            if col in df.columns: df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-        return df
-    except Exception as e:
-        st.error(f"Erro carregar: {e}")
-        return pd.DataFrame(columns=COLUNAS_PADRAO)
-
-def salvar_dados(df, sheet_name):
-    if gc is None: return False
-    try:
-        SPREADSHEET_URL = st.secrets["gsheets_config"]["spreadsheet_url"]
-        sh = gc.open_by_url(SPREADSHEET_URL)
-        worksheet = sh.worksheet(sheet_name)
-        df_to_save = df[COLUNAS_PADRAO].astype(str)
-        data = [df_to_save.columns.values.tolist()] + df_to_save.values.tolist()
-        worksheet.clear()
-        worksheet.update(range_name='A1', values=data)
-        st.cache_data.clear()
-        return True
-    except Exception as e:
-        st.error(f"Erro salvar: {e}")
-        return False
-
-def calcular_pontuacao_semana(pontos_base, bonus, mult_ind):
-    return round((pontos_base + bonus) * mult_ind, 1)
+ESTILOS_SITUACAO = {
+    'UPADO': 'background-color:rgba(50,205,50,0.3);color:#ccffcc',
+    'REBAIXADO': 'background-color:rgba(200,0,0,0.4);color:#ffcccc',
+    'MANTEVE': 'background-color:rgba(218,165,32,0.3);color:#ffffcc',
+}
+
+calcular_pontuacao_semana = motor.pontuacao_semana
 
 def avaliar_situacao(cargo, semana_atual, pontos_acumulados):
-    meta = METAS_PONTUACAO[cargo]
-    if pontos_acumulados >= meta['meta_up']: return "UPADO", 0
-    elif pontos_acumulados >= meta['meta_manter']: return "MANTEVE", 0
-    else: return "REBAIXADO", 0
+    situacao, _ = METAS_COMPILADAS.avaliar_membro(cargo, pontos_acumulados)
+    return situacao, 0
+
+def avaliar_membro(cargo, pontos_semana):
+    """(situação, novo cargo) de um membro, pelo mesmo motor vetorizado do lote."""
+    return METAS_COMPILADAS.avaliar_membro(cargo, pontos_semana)
+
+def contar_exportacoes(arquivos):
+    """Contagem por semana das exportações do Discord enviadas: uma passada por upload (guardada na sessão)."""
+    chave = tuple(a.file_id for a in arquivos)
+    if st.session_state.get('discord_contagem', (None,))[0] != chave:
+        contagens = {}
+        for arquivo in arquivos:
+            arquivo.seek(0)
+            discord.contar_mensagens(discord.ler_mensagens(arquivo, arquivo.name), contagens=contagens)
+        st.session_state.discord_contagem = (chave, contagens)
+    return st.session_state.discord_contagem[1]
+
+def mostrar_previa_lote(df_novo, previa, ignorados, df_base, origem, semana=None):
+    """Métricas, mudanças de cargo e confirmação de um lote já processado (origem: 'lote' ou 'discord')."""
+    l1, l2, l3 = st.columns(3)
+    with l1: st.metric("Upados", int((previa[col_sit] == "UPADO").sum()))
+    with l2: st.metric("Mantidos", int((previa[col_sit] == "MANTEVE").sum()))
+    with l3: st.metric("Rebaixados", int((previa[col_sit] == "REBAIXADO").sum()))
+    mudancas = previa[previa[col_cargo] != previa['novo cargo']]
+    st.markdown(f"Mudanças de cargo: **{len(mudancas)}** de {len(previa)} membros")
+    st.dataframe(mudancas, hide_index=True, use_container_width=True)
+    if not ignorados.empty: st.warning(f"{len(ignorados)} linha(s) ignorada(s): membro não encontrado ou cargo desconhecido.")
+    if st.button("Confirmar Lote", type="primary", key=f'confirmar_{origem}', use_container_width=True, disabled=previa.empty):
+        if interface.salvar_dados(UPS, GUILDA, df_novo, df_base=df_base):
+            interface.registrar_historico(UPS, GUILDA, df_base, df_novo, semana)
+            st.session_state[f'{origem}_versao'] = st.session_state.get(f'{origem}_versao', 0) + 1
+            st.success(f"Lote gravado: {len(previa)} membros processados.")
+            st.rerun()
+
+def mostrar_posicao(usuario):
+    """Posição no ranking e quem está logo acima e abaixo, sem ordenar a tabela."""
+    classificacao = interface.get_classificacao(UPS, GUILDA)
+    posicao = classificacao.posicao(usuario)
+    if posicao is None: return
+    st.metric("Posição", f"#{posicao}", help=f"de {len(classificacao)} membros")
+    vizinhos = [f"#{p} {nome}" for p, nome in classificacao.vizinhos(usuario, raio=1) if nome != usuario]
+    if vizinhos: st.caption(" · ".join(vizinhos))
 
 def limpar_campos_interface():
     for key in ['mensagens_input', 'bonus_input']:
@@ -247,11 +217,25 @@ def limpar_campos_interface():
 # ==============================================================================
 st.set_page_config(page_title="Sistema de Ups", layout="wide")
 configurar_estetica_visual()
+medicao.configurar_log(interface.ler_config_debug().get("nivel_log", "INFO"))
+medidor = interface.get_medidor(UPS)
+medicao.usar(medidor)
+medidor.iniciar_rodada()
+
+GUILDA_ATUAL = interface.escolher_guilda(['confirm_reset', 'usuario_selecionado_id', 'salvar_button_clicked'])
+GUILDA = GUILDA_ATUAL.id
 
 st.title("Sistema de Ups")
-st.markdown("##### Painel de Gerenciamento")
+st.markdown("##### Painel de Gerenciamento" + (f" · {GUILDA_ATUAL.nome}" if len(interface.ler_guildas()) > 1 else ""))
 
-df = carregar_dados(SHEET_NAME_PRINCIPAL) 
+# Título e estilo já foram enviados: a página aparece enquanto a conexão e a primeira leitura rodam
+with st.spinner("Carregando membros..."):
+    versao = interface.versao_dados(UPS, GUILDA)
+    df = interface.carregar_dados(UPS, GUILDA, versao)
+    versao = df.attrs.get('versao', versao)
+    indice = interface.get_indice(UPS, GUILDA, versao, len(df), df)
+    # Depois da carga: o fragmento compara com a geração/versão que esta execução acabou de exibir
+    interface.mostrar_fila_gravacao(UPS, GUILDA)
 
 if 'salvar_button_clicked' not in st.session_state: st.session_state.salvar_button_clicked = False
 if 'usuario_selecionado_id' not in st.session_state: st.session_state.usuario_selecionado_id = '-- Selecione o Membro --'
@@ -272,15 +256,16 @@ with col_ferramentas:
         
         if st.button("Adicionar ao Sistema", type="primary", use_container_width=True):
             if usuario_input_add:
-                if usuario_input_add in df[col_usuario].astype(str).values:
+                if indice.tem_nome(usuario_input_add):
                     st.error(f"'{usuario_input_add}' já existe.")
+                elif indice.tem_id(user_id_input_add):
+                    st.error(f"ID '{user_id_input_add}' já pertence a {df.at[indice.posicao_id(user_id_input_add), col_usuario]}.")
                 else:
                     novo = {col_usuario: usuario_input_add, col_user_id: user_id_input_add, col_cargo: cargo_input_add, 
                             col_sit: "Em andamento (1/1)", col_sem: 1, col_pontos_acum: 0.0, col_pontos_sem: 0.0, 
                             col_bonus_sem: 0.0, col_mult_ind: 1.0, 'Data_Ultima_Atualizacao': datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 
                             col_pontos_final: 0.0}
-                    df = pd.concat([df, pd.DataFrame([novo])], ignore_index=True)
-                    if salvar_dados(df, SHEET_NAME_PRINCIPAL):
+                    if interface.salvar_linha(UPS, GUILDA, 'anexar', registro=novo):
                         st.session_state.usuario_selecionado_id = usuario_input_add 
                         st.success(f"**{usuario_input_add}** adicionado.")
                         st.rerun()
@@ -291,21 +276,22 @@ with col_ferramentas:
     with st.container(border=True):
         st.markdown("##### ✏️ Editar Nome")
         if not df.empty:
-            lista_edit = sorted(df[col_usuario].dropna().astype(str).unique().tolist())
             st.markdown("Selecione o membro antigo:") 
-            usuario_para_editar = st.selectbox("Selecione para editar", lista_edit, key='user_edit_select', label_visibility="collapsed")
+            usuario_para_editar = interface.escolher_membro(indice, "Selecione para editar", 'user_edit_select')
             
             st.markdown("Novo nome:")
             novo_nome_input = st.text_input("Digite o novo nome", key='new_name_input', label_visibility="collapsed")
             
-            if st.button("Salvar Alteração", use_container_width=True):
+            if st.button("Salvar Alteração", use_container_width=True, disabled=usuario_para_editar is None):
                 if novo_nome_input:
-                    if novo_nome_input in df[col_usuario].astype(str).values:
+                    if indice.tem_nome(novo_nome_input):
                         st.error("Erro: Nome já existe.")
                     else:
-                        idx = df[df[col_usuario].astype(str) == str(usuario_para_editar)].index[0]
+                        idx = indice.posicao(usuario_para_editar)
+                        anterior = df.loc[idx].copy()
                         df.at[idx, col_usuario] = novo_nome_input
-                        if salvar_dados(df, SHEET_NAME_PRINCIPAL):
+                        df.at[idx, 'Data_Ultima_Atualizacao'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                        if interface.salvar_linha(UPS, GUILDA, 'atualizar', registro=df.loc[idx], chave=usuario_para_editar, anterior=anterior):
                             if st.session_state.usuario_selecionado_id == usuario_para_editar:
                                 st.session_state.usuario_selecionado_id = novo_nome_input
                             st.success(f"Renomeado: {usuario_para_editar} -> {novo_nome_input}")
@@ -319,14 +305,12 @@ with col_ferramentas:
         st.markdown("##### 🗑️ Remover / Reset")
         if 'confirm_reset' not in st.session_state: st.session_state.confirm_reset = False
         if not df.empty:
-            opcoes_remocao = sorted(df[col_usuario].dropna().astype(str).unique().tolist())
             st.markdown("Selecione para remover:")
-            usuario_a_remover = st.selectbox("Selecione para remover", ['-- Selecione --'] + opcoes_remocao, key='remove_user_select', label_visibility="collapsed")
+            usuario_a_remover = interface.escolher_membro(indice, "Selecione para remover", 'remove_user_select', vazio='-- Selecione --')
             
             if usuario_a_remover != '-- Selecione --':
                 if st.button(f"Confirmar Remoção de {usuario_a_remover}", type="secondary", key='final_remove_button', use_container_width=True):
-                    df = df[df[col_usuario].astype(str) != str(usuario_a_remover)]
-                    if salvar_dados(df, SHEET_NAME_PRINCIPAL):
+                    if interface.salvar_linha(UPS, GUILDA, 'remover', chave=usuario_a_remover, anterior=df.loc[indice.posicao(usuario_a_remover)]):
                         st.session_state.usuario_selecionado_id = '-- Selecione o Membro --' 
                         st.success("Removido!")
                         st.rerun()
@@ -335,7 +319,7 @@ with col_ferramentas:
         if st.session_state.confirm_reset:
             st.error("Cuidado: Ação IRREVERSÍVEL.")
             if st.button("SIM, ZERAR TUDO", type="secondary", key='sim_reset', use_container_width=True):
-                if salvar_dados(pd.DataFrame(columns=df.columns), SHEET_NAME_PRINCIPAL):
+                if interface.salvar_dados(UPS, GUILDA, pd.DataFrame(columns=df.columns)):
                     st.success("Tabela zerada.")
                     st.session_state.confirm_reset = False
                     st.rerun()
@@ -356,30 +340,22 @@ with col_upar:
     st.markdown("---")
     
     with st.container(border=True):
-        lista_opcoes = sorted(df[col_usuario].dropna().astype(str).unique().tolist())
-        opcoes_usuarios = ['-- Selecione o Membro --'] + lista_opcoes
-        try: def_idx = opcoes_usuarios.index(str(st.session_state.usuario_selecionado_id))
-        except: def_idx = 0
-        
         st.markdown("##### Selecione o Membro")
-        usuario_selecionado = st.selectbox(
-            "Selecione o Membro (Oculto)",
-            opcoes_usuarios, 
-            index=def_idx, 
-            key='select_user_update',
-            label_visibility="collapsed",
+        usuario_selecionado = interface.escolher_membro(
+            indice, "Selecione o Membro (Oculto)", 'select_user_update', vazio='-- Selecione o Membro --',
+            selecionado=st.session_state.usuario_selecionado_id,
             on_change=lambda: st.session_state.__setitem__('usuario_selecionado_id', st.session_state.select_user_update)
         )
         st.session_state.usuario_selecionado_id = usuario_selecionado
 
-        if usuario_selecionado != '-- Selecione o Membro --' and not df.empty and usuario_selecionado in df[col_usuario].astype(str).values:
-            dados = df[df[col_usuario].astype(str) == str(usuario_selecionado)].iloc[0]
+        if usuario_selecionado != '-- Selecione o Membro --' and not df.empty and indice.tem_nome(usuario_selecionado):
+            dados = df.loc[indice.posicao(usuario_selecionado)]
             usuario_input_upar = dados[col_usuario]
             
             with st.container():
                 if dados[col_cargo] in METAS_PONTUACAO:
                     st.markdown(f"**Membro:** `{usuario_input_upar}`") 
-                    st.markdown(f"""<div style="margin-bottom: 5px;"><strong>ID:</strong> <span style="color: #32CD32; font-family: 'Courier New'; font-weight: bold;">{dados.get(col_user_id, 'N/A')}</span></div>""", unsafe_allow_html=True)
+                    st.markdown(f"""<div style="margin-bottom: 5px;"><strong>ID:</strong> <span style="color: #32CD32; font-family: 'Courier New'; font-weight: bold;">{motor.celula(UPS, col_user_id, dados.get(col_user_id))}</span></div>""", unsafe_allow_html=True)
                     
                     c_idx = CARGOS_LISTA.index(dados[col_cargo])
                     st.markdown("Cargo Atual:")
@@ -389,10 +365,14 @@ with col_upar:
                     else: st.info("Ciclo semanal.")
 
                     st.markdown("---")
-                    c1, c2, c3 = st.columns(3)
+                    c1, c2, c3, c4 = st.columns(4)
                     with c1: st.metric("Acumulado", f"{dados[col_pontos_acum]:.1f}")
                     with c2: st.metric("Semana", f"{dados[col_pontos_sem]:.1f}")
                     with c3: st.metric("Mult.", f"{dados[col_mult_ind]:.1f}x")
+                    with c4: mostrar_posicao(usuario_input_upar)
+                    status_gravacao = interface.texto_status_gravacao(UPS, GUILDA, usuario_input_upar)
+                    if status_gravacao: st.caption(status_gravacao)
+                    interface.mostrar_historico_membro(UPS, GUILDA, dados, 'pontos')
                     st.markdown("---")
                     st.markdown("Semana do Ciclo:")
                     semana_input = st.number_input("Semana (1/1)", min_value=1, max_value=1, value=1, key='semana_input_update', label_visibility="collapsed")
@@ -421,44 +401,80 @@ with col_upar:
             
     if st.session_state.salvar_button_clicked and usuario_input_upar:
         st.session_state.salvar_button_clicked = False
-        df = carregar_dados(SHEET_NAME_PRINCIPAL)
-        dados = df[df[col_usuario].astype(str) == str(usuario_input_upar)].iloc[0]
-        pts_base = st.session_state.mensagens_input / 50.0
+        df = interface.carregar_dados(UPS, GUILDA)
+        idx = indice.confere(df, usuario_input_upar)
+        if idx is None:
+            # A tabela mudou desde o início da execução: reindexa a versão recarregada
+            indice = IndiceMembros(df, col_usuario, col_user_id)
+            idx = indice.posicao(usuario_input_upar)
+        dados = df.loc[idx]
+        pts_base = st.session_state.mensagens_input / MENSAGENS_POR_PONTO
         pts_semana = calcular_pontuacao_semana(pts_base, st.session_state.bonus_input, st.session_state.mult_ind_input)
-        situacao, _ = avaliar_situacao(st.session_state.cargo_select_update, 1, pts_semana)
-        novo_cargo = st.session_state.cargo_select_update
-        if situacao == "UPADO":
-            try: 
-                idx_c = CARGOS_LISTA.index(novo_cargo)
-                if idx_c < len(CARGOS_LISTA)-1: novo_cargo = CARGOS_LISTA[idx_c+1]
-            except: pass
-        elif situacao == "REBAIXADO":
-            try: 
-                idx_c = CARGOS_LISTA.index(novo_cargo)
-                if idx_c > 0: novo_cargo = CARGOS_LISTA[idx_c-1]
-                else: novo_cargo = 'f*ck'
-            except: pass
+        situacao, novo_cargo = avaliar_membro(st.session_state.cargo_select_update, pts_semana)
         novo_reg = {
             col_usuario: usuario_input_upar, col_user_id: dados.get(col_user_id, 'N/A'), col_cargo: novo_cargo, col_sit: situacao,
             col_sem: 1, col_pontos_acum: 0.0, col_pontos_sem: round(pts_semana, 1), col_bonus_sem: round(st.session_state.bonus_input, 1),
             col_mult_ind: round(st.session_state.mult_ind_input, 1), 'Data_Ultima_Atualizacao': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             col_pontos_final: round(dados[col_pontos_final] + pts_semana, 1)
         }
-        df.loc[df[df[col_usuario].astype(str) == str(usuario_input_upar)].index[0]] = novo_reg
-        if salvar_dados(df, SHEET_NAME_PRINCIPAL):
+        if interface.salvar_linha(UPS, GUILDA, 'atualizar', registro=novo_reg, chave=usuario_input_upar, anterior=dados):
+            interface.registrar_historico(UPS, GUILDA, pd.DataFrame([dict(dados)]), pd.DataFrame([novo_reg]))
             limpar_campos_interface()
             st.session_state.usuario_selecionado_id = usuario_input_upar
             st.success(f"Atualizado: {situacao}. Novo Cargo: {novo_cargo}")
             st.rerun()
 
+    st.markdown("---")
+    with st.container(border=True):
+        st.markdown("##### 📦 Processar Semana em Lote")
+        st.caption("CSV ou JSON com: usuario/user_id, mensagens, bonus, multiplicador (opcional).")
+        arquivo_lote = st.file_uploader("Arquivo do lote", type=["csv", "json"], key=f"arquivo_lote_{st.session_state.get('lote_versao', 0)}", label_visibility="collapsed")
+        if arquivo_lote is not None and not df.empty:
+            try:
+                df_lote = lote.ler_lote(arquivo_lote, arquivo_lote.name)
+                df_novo, previa, ignorados = motor.processar_semana(UPS, df, df_lote, indice=indice)
+            except Exception as e:
+                st.error(f"Erro no lote: {e}")
+                previa = None
+            if previa is not None: mostrar_previa_lote(df_novo, previa, ignorados, df, 'lote')
+
+    st.markdown("---")
+    with st.container(border=True):
+        st.markdown("##### 💬 Semana pela Exportação do Discord")
+        st.caption("JSON do DiscordChatExporter ou NDJSON, um ou mais canais. Mensagens contadas por user_id e semana ISO.")
+        arquivos_discord = st.file_uploader("Exportações", type=["json", "ndjson", "jsonl"], accept_multiple_files=True, key=f"arquivos_discord_{st.session_state.get('discord_versao', 0)}", label_visibility="collapsed")
+        if arquivos_discord and not df.empty:
+            try:
+                contagens = contar_exportacoes(arquivos_discord)
+            except Exception as e:
+                st.error(f"Erro na exportação: {e}")
+                contagens = None
+            if contagens:
+                semana_discord = st.selectbox("Semana", sorted(contagens, reverse=True), format_func=lote.rotulo_semana, key='discord_semana')
+                incluir_zeros = st.checkbox("Membros sem mensagens entram com 0", value=True, key='discord_zeros')
+                ids_membros = [u for u in df[col_user_id].astype(str) if u not in SEM_ID] if incluir_zeros else None
+                df_lote = discord.lote_da_semana(contagens, semana_discord, ids_membros)
+                df_novo, previa, ignorados = motor.processar_semana(UPS, df, df_lote, indice=indice)
+                st.caption(f"{int(df_lote['mensagens'].sum())} mensagens de {int((df_lote['mensagens'] > 0).sum())} autores na semana.")
+                mostrar_previa_lote(df_novo, previa, ignorados, df, 'discord', semana_discord)
+            elif contagens is not None: st.warning("Nenhuma mensagem contável nos arquivos.")
+
 # === COLUNA 3: RANKING ===
 with col_ranking:
     st.subheader("Ranking")
     st.info(f"Membros: **{len(df)}**")
     if not df.empty:
-        df_d = df.copy()
-        c_ord = {c: i for i, c in enumerate(CARGOS_LISTA)}
-        df_d['rank'] = df_d[col_cargo].map(c_ord)
-        df_d = df_d.sort_values(by=[col_pontos_final, 'rank'], ascending=[False, False])
-        st.dataframe(df_d.style.map(lambda x: 'background-color:rgba(50,205,50,0.3);color:#ccffcc' if 'UPADO' in str(x) else ('background-color:rgba(200,0,0,0.4);color:#ffcccc' if 'REBAIXADO' in str(x) else ('background-color:rgba(218,165,32,0.3);color:#ffffcc' if 'MANTEVE' in str(x) else '')), subset=[col_sit]).format(precision=1), use_container_width=True, height=600, column_order=[col_usuario, col_user_id, col_cargo, col_sit, col_pontos_acum, col_pontos_sem, 'Data_Ultima_Atualizacao'])
+        ranking = interface.get_ranking(UPS, GUILDA, versao, len(df), df, ESTILOS_SITUACAO)
+        r1, r2, r3 = st.columns([2, 1, 1])
+        with r1: filtro_ranking = st.text_input("Filtrar", key='ranking_filtro', placeholder="Filtrar por nome", label_visibility="collapsed")
+        with r2: tamanho_pagina = st.selectbox("Por página", [25, 50, 100, 200], key='ranking_tamanho', label_visibility="collapsed")
+        linhas_ranking = ranking.filtrar(filtro_ranking)
+        total_paginas = Ranking.total_paginas(linhas_ranking, tamanho_pagina)
+        if st.session_state.get('ranking_pagina', 1) > total_paginas: st.session_state.ranking_pagina = total_paginas
+        with r3: pagina_ranking = st.number_input("Página", min_value=1, max_value=total_paginas, step=1, key='ranking_pagina', label_visibility="collapsed")
+        st.caption(f"Página {pagina_ranking}/{total_paginas} · {len(linhas_ranking)} membro(s)")
+        with medicao.fase('ranking.exibir'): st.dataframe(ranking.pagina(linhas_ranking, pagina_ranking, tamanho_pagina), use_container_width=True, height=600, column_order=[col_usuario, col_user_id, col_cargo, col_sit, col_pontos_acum, col_pontos_sem, 'Data_Ultima_Atualizacao'])
     else: st.warning("Sem dados.")
+
+resumo_rodada = medidor.encerrar_rodada(app="ups", membros=len(df))
+if interface.painel_debug_liberado(): interface.mostrar_painel_debug(medidor, resumo_rodada)
@@ -1,52 +1,25 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime
-import gspread
-from google.oauth2.service_account import Credentials
+from datetime import datetime, timedelta, timezone
+from nucleo import guildas, interface, lote, medicao, motor, voz
+from nucleo.motor import CALL
+from nucleo.indice import IndiceMembros, SEM_ID
+from nucleo.ranking import Ranking
 
 # --- CONFIGURAÇÃO DAS REGRAS (Foco em Horas de Call) ---
 
-# Os valores são (Meta UP / Meta Manter) em HORAS acumuladas por ciclo (1 semana)
-METAS_CALL = {
-    # Posições 1 a 4 (Base)
-    'f*ck':      {'ciclo': 1, 'meta_up': 14, 'meta_manter': 12},      # Posição 1
-    '100%':      {'ciclo': 1, 'meta_up': 21, 'meta_manter': 14},      # Posição 2
-    'woo':       {'ciclo': 1, 'meta_up': 28, 'meta_manter': 21},      # Posição 3
-    'sex':       {'ciclo': 1, 'meta_up': 33, 'meta_manter': 28},      # Posição 4
-    
-    # Posição 5
-    'note':      {'ciclo': 1, 'meta_up': 38, 'meta_manter': 33},      # Posição 5
-    
-    # Posições 6 e 7
-    'aura':      {'ciclo': 1, 'meta_up': 42, 'meta_manter': 38},      # Posição 6
-    'all wild':  {'ciclo': 1, 'meta_up': 45, 'meta_manter': 42},      # Posição 7
-    
-    # Posições 8 e 9
-    'cute':      {'ciclo': 1, 'meta_up': 51, 'meta_manter': 45},      # Posição 8
-    'mello':     {'ciclo': 1, 'meta_up': 56, 'meta_manter': 51},      # Posição 9
-    
-    # Posições 10 a 12
-    'void':      {'ciclo': 1, 'meta_up': 60, 'meta_manter': 56},      # Posição 10
-    'dawn':      {'ciclo': 1, 'meta_up': 64, 'meta_manter': 60},      # Posição 11
-    'upper':     {'ciclo': 1, 'meta_up': 67, 'meta_manter': 64},      # Posição 12
-    
-    # Posição 13 (Topo)
-    'Light':     {'ciclo': 1, 'meta_up': 72, 'meta_manter': 67},      # Posição 13
-}
+# Metas (em HORAS acumuladas por ciclo de 1 semana), cargos e colunas
+# ficam no motor, compartilhado com o app de Ups e a linha de comando
+METAS_CALL = CALL.metas
 
 # Lista ordenada do Menor para o Maior
-CARGOS_LISTA = [
-    'f*ck', '100%', 'woo', 'sex', 'note', 'aura', 'all wild', 
-    'cute', 'mello', 
-    'void', 'dawn', 'upper', 'Light'
-]
+CARGOS_LISTA = CALL.cargos
+
+# Metas em arrays NumPy por ordinal do cargo (avaliação da tabela inteira de uma vez)
+METAS_CALL_COMPILADAS = CALL.metas_compiladas
 
 # --- CONSTANTES DE COLUNAS ---
-COLUNAS_PADRAO = [
-    'usuario', 'user_id', 'cargo', 'situação', 'Semana_Atual', 
-    'Horas_Acumuladas_Ciclo', 'Horas_Semana', 'Data_Ultima_Atualizacao', 
-    'Horas_Total_Final'
-]
+COLUNAS_PADRAO = CALL.colunas
 
 col_usuario = 'usuario'
 col_user_id = 'user_id'
@@ -56,123 +29,66 @@ col_sem = 'Semana_Atual'
 col_horas_acum = 'Horas_Acumuladas_Ciclo'
 col_horas_semana = 'Horas_Semana'
 col_horas_final = 'Horas_Total_Final' 
+COLUNAS_NUMERICAS = CALL.colunas_numericas
 
+# Guilda desta sessão (nucleo.guildas); escolher_guilda() a troca no início da interface
+GUILDA = guildas.PADRAO
 
-# --- FUNÇÕES DE CONEXÃO E LÓGICA ---
 
-@st.cache_resource(ttl=3600)
-def get_gsheets_client():
-    """Autoriza o cliente gspread."""
-    if "gcp_service_account" not in st.secrets or "gsheets_config" not in st.secrets:
-        st.error("Configuração de secrets ausente. Verifique 'gcp_service_account' e 'gsheets_config'.")
-        return None
-        
-    try:
-        creds_json = st.secrets["gcp_service_account"]
-        scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-        credentials = Credentials.from_service_account_info(creds_json, scopes=scopes)
-        return gspread.authorize(credentials)
-    except Exception as e:
-        st.session_state['gsheets_error'] = f"Erro de conexão com Google Sheets: {e}"
-        return None
-
-gc = get_gsheets_client()
-
-
-@st.cache_data(ttl=5)
-def carregar_dados():
-    """Lê os dados da planilha Google (worksheet ESPECÍFICA para CALL)."""
-    if gc is None:
-        if 'gsheets_error' in st.session_state:
-             st.error(st.session_state['gsheets_error'])
-        return pd.DataFrame(columns=COLUNAS_PADRAO)
-        
-    try:
-        SPREADSHEET_URL = st.secrets["gsheets_config"]["spreadsheet_url"]
-        SHEET_NAME = "Call_Ranking" 
-        
-        sh = gc.open_by_url(SPREADSHEET_URL)
-        worksheet = sh.worksheet(SHEET_NAME)
-        
-        data = worksheet.get_all_records()
-        
-        if not data:
-            df = pd.DataFrame(columns=COLUNAS_PADRAO)
-        else:
-            df = pd.DataFrame(data)
-        
-        # Validação de Colunas e Inserção Segura do ID
-        if col_user_id not in df.columns:
-            if col_usuario in df.columns:
-                loc = df.columns.get_loc(col_usuario) + 1
-            else:
-                loc = 1 
-            df.insert(loc, col_user_id, 'N/A')
-            
-        df = df.reindex(columns=COLUNAS_PADRAO, fill_value='0.0')
-        
-        # --- CORREÇÃO DE BUG: Forçar coluna usuario para string ---
-        df[col_usuario] = df[col_usuario].astype(str)
-        
-        cols_to_convert = [col_sem, col_horas_acum, col_horas_semana, col_horas_final]
-        for col in cols_to_convert:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-            
-        return df
+# --- FUNÇÕES DE INTERFACE E LÓGICA ---
+# Conexão, leitura, gravação e componentes comuns aos dois apps ficam em nucleo.interface
 
-    except Exception as e:
-        st.error(f"ERRO: A conexão com a aba '{SHEET_NAME}' falhou. Verifique se a aba existe. ({e})")
-        return pd.DataFrame(columns=COLUNAS_PADRAO)
+def mostrar_posicao(usuario):
+    """Posição do membro no Call Ranking e os vizinhos imediatos (sem ordenar a tabela)."""
+    classificacao = interface.get_classificacao(CALL, GUILDA)
+    posicao = classificacao.posicao(usuario)
+    if posicao is None:
+        return
 
+    vizinhos = [f"#{p} {nome}" for p, nome in classificacao.vizinhos(usuario, raio=1) if nome != usuario]
+    st.markdown(f"**Posição no ranking:** #{posicao} de {len(classificacao)}")
+    if vizinhos:
+        st.caption("Vizinhos: " + " · ".join(vizinhos))
 
-def salvar_dados(df):
-    """Sobrescreve a aba da planilha Google com o novo DataFrame."""
-    if gc is None:
-        st.error("Não foi possível salvar os dados: Conexão Sheets inativa.")
-        return False
 
-    st.info("Tentando salvar dados na planilha...")
-
-    try:
-        SPREADSHEET_URL = st.secrets["gsheets_config"]["spreadsheet_url"]
-        SHEET_NAME = "Call_Ranking" 
-        
-        sh = gc.open_by_url(SPREADSHEET_URL)
-        worksheet = sh.worksheet(SHEET_NAME)
-        
-        df_to_save = df[COLUNAS_PADRAO].astype(str)
-        data = [df_to_save.columns.values.tolist()] + df_to_save.values.tolist()
-        
-        worksheet.clear()
-        worksheet.update(range_name='A1', values=data)
-        
-        st.cache_data.clear() 
-        
-        return True
-        
-    except Exception as e:
-        st.error("ERRO CRÍTICO: Falha na Escrita ou Permissão Negada (403)!")
-        st.exception(e)
-        return False
+# Cores da coluna situação no ranking (testadas nessa ordem)
+ESTILOS_SITUACAO = {
+    'UPADO': 'background-color: #e6ffed; color: green',
+    'REBAIXADO': 'background-color: #ffe6e6; color: red',
+    'MANTEVE': 'background-color: #fffac2; color: #8a6d3b',
+}
 
 
 def avaliar_situacao_call(cargo, horas_acumuladas):
     """Avalia o UP/MANTER/REBAIXAR no sistema de Call (Ciclo = 1 semana)."""
-    meta = METAS_CALL[cargo]
-    meta_up = meta['meta_up']
-    meta_manter = meta['meta_manter']
-    
-    if horas_acumuladas >= meta_up:
-        situacao = "UPADO"
-    elif horas_acumuladas >= meta_manter:
-        situacao = "MANTEVE"
-    else:
-        situacao = "REBAIXADO"
-        
+    situacao, _ = METAS_CALL_COMPILADAS.avaliar_membro(cargo, horas_acumuladas)
     return situacao
 
 
+def avaliar_membro_call(cargo, horas_acumuladas):
+    """Retorna (situação, próximo cargo), já limitado entre 'f*ck' e 'Light'."""
+    return METAS_CALL_COMPILADAS.avaliar_membro(cargo, horas_acumuladas)
+
+
+def calcular_horas_logs(arquivos, fuso_horas):
+    """Horas por semana dos logs de voz enviados.
+
+    Os eventos são lidos em fluxo, numa passada só; o resultado fica na
+    sessão enquanto os mesmos arquivos e o mesmo fuso estiverem selecionados.
+    """
+    chave = (tuple(a.file_id for a in arquivos), fuso_horas)
+    if st.session_state.get('voz_horas', (None,))[0] != chave:
+        fuso = timezone(timedelta(hours=fuso_horas))
+        
+        def eventos():
+            for arquivo in arquivos:
+                arquivo.seek(0)
+                yield from voz.ler_eventos(arquivo, arquivo.name)
+        
+        st.session_state.voz_horas = (chave, voz.horas_por_semana(eventos(), fuso))
+    return st.session_state.voz_horas[1]
+
+
 def limpar_campos_interface_call():
     """Limpa campos de input."""
     keys_to_delete = ['horas_input_update']
@@ -184,10 +100,33 @@ def limpar_campos_interface_call():
 # --- INTERFACE (STREAMLIT) ---
 
 st.set_page_config(page_title="Sistema de Call Ranking", layout="wide")
+
+# Tempos e chamadas desta execução vão para o medidor da sessão
+medicao.configurar_log(interface.ler_config_debug().get("nivel_log", "INFO"))
+medidor = interface.get_medidor(CALL)
+medicao.usar(medidor)
+medidor.iniciar_rodada()
+
+# Guilda (servidor) desta sessão; tudo abaixo lê e grava só na aba de Call dela
+GUILDA_ATUAL = interface.escolher_guilda(['confirm_reset', 'usuario_selecionado_id_call', 'salvar_button_clicked_call'])
+GUILDA = GUILDA_ATUAL.id
+
 st.title("Sistema de Call Ranking 📞")
 st.markdown("##### Gerenciamento Semanal de UP baseado **apenas em Horas em Call**.")
+if len(interface.ler_guildas()) > 1:
+    st.caption(f"Servidor: **{GUILDA_ATUAL.nome}**")
+
+# O título já foi enviado: a página aparece enquanto a conexão e a primeira leitura rodam
+with st.spinner("Carregando membros..."):
+    versao = interface.versao_dados(CALL, GUILDA)
+    df = interface.carregar_dados(CALL, GUILDA, versao)
+    versao = df.attrs.get('versao', versao)
+
+    # Índice nome/ID -> posição, montado uma vez e usado em todas as buscas abaixo
+    indice = interface.get_indice(CALL, GUILDA, versao, len(df), df)
 
-df = carregar_dados()
+    # Depois da carga, para o fragmento comparar com o que esta execução exibiu
+    interface.mostrar_fila_gravacao(CALL, GUILDA)
 
 # Variável de estado para o botão salvar
 if 'salvar_button_clicked_call' not in st.session_state:
@@ -217,9 +156,12 @@ with col1:
         st.markdown("---")
         if st.button("Adicionar Membro", type="secondary", use_container_width=True):
             if usuario_input_add:
-                # Verificação segura convertendo para string
-                if usuario_input_add in df[col_usuario].astype(str).values:
+                # Verificação O(1) pelo índice de membros
+                if indice.tem_nome(usuario_input_add):
                     st.error(f"O membro '{usuario_input_add}' já existe. Use a aba 'Upar'.")
+                elif indice.tem_id(user_id_input_add):
+                    dono_id = df.at[indice.posicao_id(user_id_input_add), col_usuario]
+                    st.error(f"O ID '{user_id_input_add}' já está cadastrado para '{dono_id}'.")
                 else:
                     novo_dado_add = {
                         col_usuario: usuario_input_add, 
@@ -233,9 +175,7 @@ with col1:
                         col_horas_final: 0.0,
                     }
                     
-                    df = pd.concat([df, pd.DataFrame([novo_dado_add])], ignore_index=True)
-                    
-                    if salvar_dados(df):
+                    if interface.salvar_linha(CALL, GUILDA, 'anexar', registro=novo_dado_add):
                         st.session_state.usuario_selecionado_id_call = usuario_input_add 
                         st.success(f"Membro **{usuario_input_add}** adicionado! Use a aba 'Upar' para registrar a primeira semana.")
                         st.rerun()
@@ -246,33 +186,25 @@ with col1:
     # === ABA 2: ATUALIZAR/UPAR MEMBRO EXISTENTE ===
     with tab_update:
         
-        # --- CORREÇÃO DO ERRO AQUI: .astype(str) antes de ordenar ---
-        lista_usuarios_str = df[col_usuario].dropna().astype(str).unique().tolist()
-        opcoes_usuarios = ['-- Selecione o Membro --'] + sorted(lista_usuarios_str)
-        
-        try:
-            default_index = opcoes_usuarios.index(str(st.session_state.usuario_selecionado_id_call))
-        except ValueError:
-            default_index = 0
-            
-        usuario_selecionado = st.selectbox(
-            "Selecione o Membro", 
-            opcoes_usuarios, 
-            index=default_index,
-            key='select_user_update_call',
-            on_change=lambda: st.session_state.__setitem__('usuario_selecionado_id_call', st.session_state.select_user_update_call)
+        # Só os melhores resultados da busca vão para o selectbox (mais o membro já selecionado)
+        usuario_selecionado = interface.escolher_membro(
+            indice,
+            "Selecione o Membro",
+            'select_user_update_call',
+            vazio='-- Selecione o Membro --',
+            selecionado=st.session_state.usuario_selecionado_id_call,
+            on_change=lambda: st.session_state.__setitem__('usuario_selecionado_id_call', st.session_state.select_user_update_call),
+            label_visibility="visible",
         )
         
         st.session_state.usuario_selecionado_id_call = usuario_selecionado
 
-        # Comparação segura com string
-        if usuario_selecionado != '-- Selecione o Membro --' and not df.empty and usuario_selecionado in df[col_usuario].astype(str).values:
+        if usuario_selecionado != '-- Selecione o Membro --' and not df.empty and indice.tem_nome(usuario_selecionado):
             
-            # Filtro seguro
-            dados_atuais = df[df[col_usuario].astype(str) == usuario_selecionado].iloc[0]
+            dados_atuais = df.loc[indice.posicao(usuario_selecionado)]
             
             usuario_input = dados_atuais[col_usuario]
-            user_id_atual = dados_atuais.get(col_user_id, 'N/A')
+            user_id_atual = motor.celula(CALL, col_user_id, dados_atuais.get(col_user_id))
             
             cargo_atual_dados = dados_atuais[col_cargo]
             horas_acumuladas_anteriores = dados_atuais[col_horas_acum]
@@ -295,6 +227,13 @@ with col1:
                         unsafe_allow_html=True
                     )
                     
+                    mostrar_posicao(usuario_input)
+
+                    status_gravacao = interface.texto_status_gravacao(CALL, GUILDA, usuario_input)
+                    if status_gravacao:
+                        st.caption(status_gravacao)
+                    interface.mostrar_historico_membro(CALL, GUILDA, dados_atuais, 'horas')
+                    
                     if dados_atuais[col_sit] in ["UPADO", "REBAIXADO", "MANTEVE"]:
                         semana_input_value = 1
                         horas_acumuladas_anteriores = 0.0 
@@ -337,9 +276,14 @@ with col1:
         
         if usuario_input is not None:
             
-            df_reloaded = carregar_dados() 
-            # Filtro seguro com string
-            dados_atuais = df_reloaded[df_reloaded[col_usuario].astype(str) == str(st.session_state.select_user_update_call)].iloc[0]
+            df_reloaded = interface.carregar_dados(CALL, GUILDA)
+            
+            # Reaproveita o índice se a tabela recarregada não mudou; senão reindexa
+            idx_to_update = indice.confere(df_reloaded, st.session_state.select_user_update_call)
+            if idx_to_update is None:
+                indice = IndiceMembros(df_reloaded, col_usuario, col_user_id)
+                idx_to_update = indice.posicao(st.session_state.select_user_update_call)
+            dados_atuais = df_reloaded.loc[idx_to_update]
             
             usuario_input = dados_atuais[col_usuario]
             user_id_salvar = dados_atuais.get(col_user_id, 'N/A')
@@ -356,38 +300,11 @@ with col1:
             else:
                  horas_acumuladas_total = horas_acumuladas_anteriores + horas_input
             
-            situacao = avaliar_situacao_call(cargo_input, horas_acumuladas_total)
+            situacao, novo_cargo = avaliar_membro_call(cargo_input, horas_acumuladas_total)
 
-            novo_cargo = cargo_input 
-            
-            # Lógica de UP/REBAIXAR
-            if situacao in ["UPADO", "REBAIXADO", "MANTEVE"]:
-                nova_semana = 1
-                novo_horas_acumuladas = 0.0 # Zera para o próximo ciclo
-                
-                if situacao == "UPADO":
-                    indice_atual = CARGOS_LISTA.index(cargo_input)
-                    if indice_atual < len(CARGOS_LISTA) - 1:
-                        novo_cargo = CARGOS_LISTA[indice_atual + 1]
-                    else:
-                        novo_cargo = CARGOS_LISTA[-1] 
-                        
-                elif situacao == "REBAIXADO":
-                    try:
-                        indice_atual = CARGOS_LISTA.index(cargo_input)
-                        if indice_atual > 0:
-                            novo_cargo = CARGOS_LISTA[indice_atual - 1]
-                        else:
-                            novo_cargo = 'f*ck'
-                    except ValueError:
-                        novo_cargo = 'f*ck'
-                else:
-                    # MANTEVE
-                    novo_cargo = cargo_input 
-                    
-            else:
-                nova_semana = 1
-                novo_horas_acumuladas = horas_acumuladas_total
+            # Todo processamento fecha o ciclo (1 semana): zera o acumulado
+            nova_semana = 1
+            novo_horas_acumuladas = 0.0
 
 
             # Prepara os novos dados
@@ -403,12 +320,9 @@ with col1:
                 col_horas_final: round(dados_atuais[col_horas_final] + horas_input, 1), 
             }
             
-            # Atualiza o DataFrame e salva
-            # Uso de index seguro
-            idx_to_update = df[df[col_usuario].astype(str) == str(usuario_input)].index[0]
-            df.loc[idx_to_update] = novo_dado
-
-            if salvar_dados(df):
+            # Enfileira só a linha do membro; a gravação segue em segundo plano
+            if interface.salvar_linha(CALL, GUILDA, 'atualizar', registro=novo_dado, chave=usuario_input, anterior=dados_atuais):
+                interface.registrar_historico(CALL, GUILDA, pd.DataFrame([dict(dados_atuais)]), pd.DataFrame([novo_dado]))
                 limpar_campos_interface_call()
                 st.session_state.usuario_selecionado_id_call = usuario_input 
                 
@@ -418,12 +332,68 @@ with col1:
                 elif situacao == "REBAIXADO":
                     msg_avanco = f" (Desceu de nível)"
                 
-                st.success(f"Dados salvos! Situação: **{situacao}** | Próximo Cargo: **{novo_cargo}**{msg_avanco}")
+                st.success(f"Semana registrada! Situação: **{situacao}** | Próximo Cargo: **{novo_cargo}**{msg_avanco}")
                 st.rerun()
         else:
             st.error("Selecione um membro válido antes de salvar.")
 
     
+    # ----------------------------------------------------
+    # --- SEMANA PELO LOG DE VOZ (TODOS OS MEMBROS) ---
+    # ----------------------------------------------------
+    st.markdown("---")
+    
+    with st.container(border=True):
+        st.markdown("##### 🎧 Processar Semana pelo Log de Voz")
+        st.caption("NDJSON com user_id, timestamp e type (join/leave/move), em ordem cronológica. As horas de cada membro entram como as 'Horas em Call NESTA SEMANA'.")
+        
+        arquivos_voz = st.file_uploader(
+            "Logs de voz",
+            type=["ndjson", "jsonl", "json"],
+            accept_multiple_files=True,
+            key=f"arquivos_voz_{st.session_state.get('voz_versao', 0)}",
+            label_visibility="collapsed"
+        )
+        
+        if arquivos_voz and not df.empty:
+            fuso_horas = st.number_input("Fuso horário das semanas (UTC±h)", min_value=-12, max_value=14, value=-3, step=1, key='voz_fuso')
+            
+            try:
+                horas_semanas = calcular_horas_logs(arquivos_voz, int(fuso_horas))
+            except Exception as e:
+                st.error(f"Erro ao ler o log de voz: {e}")
+                horas_semanas = None
+            
+            if horas_semanas:
+                semana_voz = st.selectbox("Semana", sorted(horas_semanas, reverse=True), format_func=lote.rotulo_semana, key='voz_semana')
+                incluir_zeros = st.checkbox("Membros sem call entram com 0 horas", value=True, key='voz_zeros')
+                
+                ids_membros = [u for u in df[col_user_id].astype(str) if u not in SEM_ID] if incluir_zeros else None
+                df_lote = voz.lote_da_semana(horas_semanas, semana_voz, ids_membros)
+                df_novo, previa, ignorados = motor.processar_semana(CALL, df, df_lote, indice=indice)
+                
+                l1, l2, l3 = st.columns(3)
+                with l1:
+                    st.metric("Upados", int((previa[col_sit] == "UPADO").sum()))
+                with l2:
+                    st.metric("Mantidos", int((previa[col_sit] == "MANTEVE").sum()))
+                with l3:
+                    st.metric("Rebaixados", int((previa[col_sit] == "REBAIXADO").sum()))
+                
+                st.dataframe(previa, hide_index=True, use_container_width=True)
+                if not ignorados.empty:
+                    st.warning(f"{len(ignorados)} user_id(s) do log sem membro correspondente (ignorados).")
+                
+                if st.button("Confirmar Semana", type="primary", key='confirmar_voz', use_container_width=True, disabled=previa.empty):
+                    # Enfileira só as linhas alteradas (mesma fila das edições individuais)
+                    if interface.salvar_dados(CALL, GUILDA, df_novo, df_base=df):
+                        interface.registrar_historico(CALL, GUILDA, df, df_novo, semana_voz)
+                        st.session_state.voz_versao = st.session_state.get('voz_versao', 0) + 1
+                        st.success(f"Semana gravada: {len(previa)} membros processados.")
+                        st.rerun()
+            elif horas_semanas is not None:
+                st.warning("Nenhuma sessão de voz encontrada nos arquivos.")
+
     # ----------------------------------------------------
     # --- VISUALIZAÇÃO DE METAS ---
     # ----------------------------------------------------
@@ -452,19 +422,15 @@ with col1:
             st.session_state.confirm_reset = False
 
         if not df.empty:
-            # --- CORREÇÃO DO ERRO AQUI TAMBÉM ---
-            opcoes_remocao = sorted(df[col_usuario].dropna().astype(str).unique().tolist())
-            usuario_a_remover = st.selectbox("Selecione o Usuário para Remover", ['-- Selecione --'] + opcoes_remocao, key='remove_user_select')
+            usuario_a_remover = interface.escolher_membro(indice, "Selecione o Usuário para Remover", 'remove_user_select', vazio='-- Selecione --', label_visibility="visible")
             
             if usuario_a_remover != '-- Selecione --':
                 st.warning(f"Confirme a remoção de **{usuario_a_remover}**. Permanente.")
                 
                 if st.button(f"Confirmar Remoção de {usuario_a_remover}", type="secondary", key='final_remove_button', use_container_width=True):
-                    # Filtro seguro com string
-                    df = df[df[col_usuario].astype(str) != str(usuario_a_remover)]
-                    salvar_dados(df) 
-                    st.success(f"Membro {usuario_a_remover} removido com sucesso!")
-                    st.rerun()
+                    if interface.salvar_linha(CALL, GUILDA, 'remover', chave=usuario_a_remover, anterior=df.loc[indice.posicao(usuario_a_remover)]):
+                        st.success(f"Membro {usuario_a_remover} removido com sucesso!")
+                        st.rerun()
         
         st.markdown("---")
         st.markdown("##### Reset Global da Tabela")
@@ -479,7 +445,7 @@ with col1:
             with col_reset1:
                 if st.button("SIM, ZERAR TUDO", type="secondary", key='sim_reset'):
                     df_reset = pd.DataFrame(columns=df.columns) 
-                    salvar_dados(df_reset) 
+                    interface.salvar_dados(CALL, GUILDA, df_reset)
                     st.success("Tabela zerada com sucesso!")
                     st.session_state.confirm_reset = False
                     st.rerun()
@@ -492,28 +458,32 @@ with col2:
     st.info(f"Total de Membros Registrados: **{len(df)}**")
     
     if not df.empty: 
-        # Mapeamento para ordenação por cargo
-        cargo_order = {cargo: i for i, cargo in enumerate(CARGOS_LISTA)}
-        df_display = df.copy()
-        df_display['cargo_rank'] = df_display[col_cargo].map(cargo_order)
+        # Ordem e estilos vêm prontos do cache; aqui só se fatia a página visível
+        ranking = interface.get_ranking(CALL, GUILDA, versao, len(df), df, ESTILOS_SITUACAO)
         
-        # Ordena: 1. Horas Totais (Decrescente), 2. Rank do Cargo (Decrescente/Maior Primeiro)
-        df_display = df_display.sort_values(
-            by=[col_horas_final, 'cargo_rank'], 
-            ascending=[False, False]
-        )
+        col_filtro, col_tamanho, col_pagina = st.columns([2, 1, 1])
+        with col_filtro:
+            filtro_ranking = st.text_input("Filtrar por nome", key='ranking_filtro_call')
+        with col_tamanho:
+            tamanho_pagina = st.selectbox("Membros por página", [25, 50, 100, 200], key='ranking_tamanho_call')
+        
+        linhas_ranking = ranking.filtrar(filtro_ranking)
+        total_paginas = Ranking.total_paginas(linhas_ranking, tamanho_pagina)
+        if st.session_state.get('ranking_pagina_call', 1) > total_paginas:
+            st.session_state.ranking_pagina_call = total_paginas
+        
+        with col_pagina:
+            pagina_ranking = st.number_input("Página", min_value=1, max_value=total_paginas, step=1, key='ranking_pagina_call')
+        
+        st.caption(f"Página {pagina_ranking} de {total_paginas} · {len(linhas_ranking)} membro(s)")
                                         
-        st.dataframe(
-            df_display.style.map(
-                lambda x: 'background-color: #e6ffed; color: green' if 'UPADO' in str(x) else 
-                          ('background-color: #ffe6e6; color: red' if 'REBAIXADO' in str(x) else 
-                           ('background-color: #fffac2; color: #8a6d3b' if 'MANTEVE' in str(x) else '')),
-                subset=[col_sit]
-            ).format(precision=1),
-            use_container_width=True,
-            height=600,
-            column_order=[col_usuario, col_user_id, col_cargo, col_sit, col_horas_acum, col_horas_semana, 'Data_Ultima_Atualizacao']
-        )
+        with medicao.fase('ranking.exibir'):
+            st.dataframe(
+                ranking.pagina(linhas_ranking, pagina_ranking, tamanho_pagina),
+                use_container_width=True,
+                height=600,
+                column_order=[col_usuario, col_user_id, col_cargo, col_sit, col_horas_acum, col_horas_semana, 'Data_Ultima_Atualizacao']
+            )
     else:
         st.warning("Nenhum membro cadastrado. Adicione um na coluna ao lado.")
 
@@ -525,3 +495,10 @@ with col2:
         total_call = df[col_horas_semana].sum()
         
         st.metric("Total Horas Call (Última Rodada)", f"{total_call:.1f}")
+
+
+# --- FIM DA EXECUÇÃO: resumo no log e painel de depuração ---
+
+resumo_rodada = medidor.encerrar_rodada(app="call", membros=len(df))
+if interface.painel_debug_liberado():
+    interface.mostrar_painel_debug(medidor, resumo_rodada)
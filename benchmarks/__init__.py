@@ -0,0 +1 @@
+"""Benchmarks de desempenho (python -m benchmarks.executar)."""
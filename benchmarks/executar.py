@@ -0,0 +1,342 @@
+"""Benchmarks com guildas sintéticas sobre a planilha falsa (benchmarks.falso_gspread).
+
+    python -m benchmarks.executar                       # 1k, 10k e 100k membros
+    python -m benchmarks.executar --tamanhos 1000 --repeticoes 5
+    python -m benchmarks.executar --comparar benchmarks/resultados/a1b2c3d.json benchmarks/resultados/e4f5a6b.json
+
+Cenários (o mesmo código que os apps rodam, via nucleo.motor):
+  carregar          leitura da aba + montagem do DataFrame
+  ranking           ordenação/estilo do ranking + HTML da primeira página
+  processar_membro  "Processar Semana" de um membro (avaliação + escrita da linha)
+  virada_semana     semana de todos os membros (lote + diferenças + escrita)
+  sessoes_recarga   20 sessões recarregando juntas a versão nova (voo único: uma leitura)
+  posicao_membro    semana de um membro na classificação viva + posição e vizinhos dele
+  busca_membro      índice de busca da versão + digitação de um nome (prefixo, trecho e com erro)
+  muitas_guildas    12 guildas abertas em sequência com memória para 4 retratos (LRU)
+
+Para cada cenário e tamanho grava tempo (mediana e mínimo), pico de memória
+(tracemalloc, numa execução à parte) e as chamadas simuladas à API, num JSON
+por versão em benchmarks/resultados/, comparável com --comparar.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.falso_gspread import ClienteFalso, PlanilhaFalsa
+from nucleo import motor
+from nucleo.armazenamento import ArmazenamentoSheets
+from nucleo.fila import Operacao
+from nucleo.indice import IndiceMembros
+from nucleo.lote import COLUNAS_LOTE
+from nucleo.planilha import CacheWorksheets
+from nucleo.retratos import RepositorioRetratos, tamanho
+from nucleo.regras import SITUACOES
+
+UPS = motor.UPS
+TAMANHOS_PADRAO = [1000, 10000, 100000]
+DIRETORIO_RESULTADOS = os.path.join(os.path.dirname(__file__), 'resultados')
+URL_FALSA = 'https://docs.google.com/spreadsheets/d/falsa'
+
+# Mesmas cores do app.py (o custo do estilo depende do número de regras)
+ESTILOS_SITUACAO = {
+    'UPADO': 'background-color:rgba(50,205,50,0.3);color:#ccffcc',
+    'REBAIXADO': 'background-color:rgba(200,0,0,0.4);color:#ffcccc',
+    'MANTEVE': 'background-color:rgba(218,165,32,0.3);color:#ffffcc',
+}
+
+
+# --- Dados sintéticos ---
+
+def gerar_linhas(n, semente=0):
+    """Tabela de membros da aba do Sistema de Ups, espalhada pelos 13 cargos (células como texto)."""
+    aleatorio = random.Random(semente)
+    situacoes = list(SITUACOES) + ['Em andamento (1/1)']
+    linhas = []
+    for i in range(n):
+        semana = round(aleatorio.uniform(0, 40), 1)
+        linhas.append([
+            f'membro{i:06d}', str(100000000000000000 + i), UPS.cargos[i % len(UPS.cargos)],
+            aleatorio.choice(situacoes), '1', '0.0', str(semana), '0.0',
+            str(aleatorio.choice([1.0, 1.0, 1.5])), '2026-10-05 20:00:00',
+            str(round(semana * aleatorio.uniform(1, 30), 1)), '',
+        ])
+    return [list(UPS.colunas)] + linhas
+
+
+def gerar_lote(n, semente=1):
+    aleatorio = random.Random(semente)
+    lote = pd.DataFrame({
+        'usuario': '', 'user_id': [str(100000000000000000 + i) for i in range(n)],
+        'mensagens': [float(aleatorio.randint(0, 3000)) for _ in range(n)],
+        'bonus': 0.0, 'multiplicador': float('nan'),
+    })
+    return lote[COLUNAS_LOTE]
+
+
+class Guilda:
+    """Planilha falsa + armazenamento real (CacheWorksheets + ArmazenamentoSheets) sobre ela."""
+
+    def __init__(self, linhas):
+        self.planilha = PlanilhaFalsa({UPS.aba: linhas})
+        worksheets = CacheWorksheets(lambda: ClienteFalso(self.planilha), URL_FALSA)
+        self.armazenamento = ArmazenamentoSheets(worksheets, UPS.aba, UPS.colunas)
+
+
+# --- Cenários: preparar() fora da medição, devolve a função medida ---
+
+def cenario_carregar(linhas):
+    guilda = Guilda(linhas)
+    return guilda, lambda: motor.carregar(UPS, guilda.armazenamento)
+
+
+def cenario_ranking(linhas):
+    guilda = Guilda(linhas)
+    df = motor.carregar(UPS, guilda.armazenamento)
+
+    def medir():
+        ranking = motor.ranking(UPS, df, ESTILOS_SITUACAO)
+        return ranking.pagina(ranking.tabela, 1, 50).to_html()
+    return guilda, medir
+
+
+def cenario_processar_membro(linhas):
+    guilda = Guilda(linhas)
+    df = motor.carregar(UPS, guilda.armazenamento)
+    indice = IndiceMembros(df)
+    nome = df.at[len(df) // 2, 'usuario']
+
+    def medir():
+        dados = df.loc[indice.posicao(nome)]
+        pontos = motor.pontuacao_semana(600 / motor.MENSAGENS_POR_PONTO, 0.0, float(dados['Multiplicador_Individual']))
+        situacao, novo_cargo = UPS.metas_compiladas.avaliar_membro(dados['cargo'], pontos)
+        registro = motor.carimbar(UPS, dados)
+        registro.update({'cargo': novo_cargo, 'situação': situacao, 'Pontos_Semana': pontos,
+                         'Data_Ultima_Atualizacao': '2026-10-12 20:00:00',
+                         'Pontos_Total_Final': round(dados['Pontos_Total_Final'] + pontos, 1)})
+        # Como salvar_linha: só a linha do membro, com os valores antigos para o compare-and-swap
+        op = Operacao('atualizar', nome, registro, motor.valores_linha(UPS, registro), motor.valores_linha(UPS, dados))
+        return guilda.armazenamento.aplicar_operacoes([op])
+    return guilda, medir
+
+
+def cenario_virada_semana(linhas):
+    guilda = Guilda(linhas)
+    df = motor.carregar(UPS, guilda.armazenamento)
+    lote = gerar_lote(len(df))
+
+    def medir():
+        df_novo, _, _ = motor.processar_semana(UPS, df, lote, agora='2026-10-12 20:00:00')
+        return guilda.armazenamento.aplicar_operacoes(motor.diferencas(UPS, df, df_novo))
+    return guilda, medir
+
+
+SESSOES = 20
+
+
+def cenario_sessoes_recarga(linhas):
+    guilda = Guilda(linhas)
+    retratos = RepositorioRetratos()
+
+    def medir():
+        # Como os apps depois de uma gravação: todas as sessões pedem a mesma versão nova ao mesmo tempo
+        barreira = threading.Barrier(SESSOES)
+
+        def sessao():
+            barreira.wait()
+            retratos.obter(UPS.aba, (1, None), lambda: motor.carregar(UPS, guilda.armazenamento))
+
+        threads = [threading.Thread(target=sessao) for _ in range(SESSOES)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return retratos.atual(UPS.aba)
+    return guilda, medir
+
+
+def cenario_posicao_membro(linhas):
+    guilda = Guilda(linhas)
+    retratos = RepositorioRetratos()
+    retrato = retratos.obter(UPS.aba, (0, None), lambda: motor.carregar(UPS, guilda.armazenamento))
+    classificacao = motor.classificacao(UPS)
+    classificacao.sincronizar(retrato)
+    df = retrato.df
+    nome = df.at[len(df) // 2, 'usuario']
+
+    def medir():
+        # Como salvar_linha + painel do membro: a posição muda sem reordenar a tabela
+        registro = dict(df.loc[len(df) // 2])
+        registro['Pontos_Total_Final'] = float(registro['Pontos_Total_Final']) + 50.0
+        classificacao.aplicar(Operacao('atualizar', nome, registro))
+        return classificacao.posicao(nome), classificacao.vizinhos(nome, raio=1)
+    return guilda, medir
+
+
+def cenario_busca_membro(linhas):
+    guilda = Guilda(linhas)
+    df = motor.carregar(UPS, guilda.armazenamento)
+    nome = df.at[len(df) // 2, 'usuario']
+
+    def medir():
+        # Uma versão nova da tabela: índice montado de novo e o seletor consultado a cada tecla
+        busca = IndiceMembros(df).busca
+        for n in range(1, len(nome) + 1):
+            busca.buscar(nome[:n])
+        busca.buscar(nome[len(nome) // 2:])
+        return busca.buscar(nome[1:] + nome[0])
+    return guilda, medir
+
+
+GUILDAS = 12
+GUILDAS_EM_MEMORIA = 4
+
+
+def cenario_muitas_guildas(linhas):
+    # Todas leem a mesma planilha falsa, cada uma com o seu nome de aba no repositório
+    guilda = Guilda(linhas)
+    df = motor.carregar(UPS, guilda.armazenamento)
+    limite = (tamanho(df) + IndiceMembros(df).memoria()) * GUILDAS_EM_MEMORIA
+    retratos = RepositorioRetratos(limite_bytes=limite)
+
+    def medir():
+        for i in range(GUILDAS):
+            nome = f'guilda{i}/{UPS.aba}'
+            retrato = retratos.obter(nome, (1, None), lambda: motor.carregar(UPS, guilda.armazenamento))
+            # O índice fica com o retrato e conta no mesmo limite
+            retratos.derivado(nome, 'indice', retrato.versao, lambda: IndiceMembros(retrato.df), lambda i: i.memoria())
+        abas, memoria = retratos.uso()
+        assert abas <= GUILDAS_EM_MEMORIA and memoria <= limite
+        return abas
+    return guilda, medir
+
+
+CENARIOS = {
+    'carregar': cenario_carregar,
+    'ranking': cenario_ranking,
+    'processar_membro': cenario_processar_membro,
+    'virada_semana': cenario_virada_semana,
+    'sessoes_recarga': cenario_sessoes_recarga,
+    'posicao_membro': cenario_posicao_membro,
+    'busca_membro': cenario_busca_membro,
+    'muitas_guildas': cenario_muitas_guildas,
+}
+
+
+# --- Medição ---
+
+def medir_cenario(nome, linhas, repeticoes):
+    preparar = CENARIOS[nome]
+    tempos, chamadas = [], None
+    for _ in range(repeticoes):
+        guilda, funcao = preparar(linhas)
+        guilda.planilha.contador.zerar()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+        chamadas = guilda.planilha.contador.resumo()
+
+    # Memória numa execução separada: tracemalloc deixa o código mais lento
+    guilda, funcao = preparar(linhas)
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'cenario': nome, 'membros': len(linhas) - 1,
+        'tempo_s': round(statistics.median(tempos), 6), 'tempo_min_s': round(min(tempos), 6),
+        'memoria_pico_mb': round(pico / 2 ** 20, 3), **chamadas,
+    }
+
+
+def versao_codigo():
+    try:
+        saida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                               cwd=os.path.dirname(__file__), check=True)
+        return saida.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecida'
+
+
+def executar(tamanhos, repeticoes, cenarios):
+    resultados = []
+    for n in tamanhos:
+        linhas = gerar_linhas(n)
+        for nome in cenarios:
+            resultado = medir_cenario(nome, linhas, repeticoes)
+            print(f"{nome:<18} {n:>7} membros  {resultado['tempo_s'] * 1000:10.1f} ms  "
+                  f"{resultado['memoria_pico_mb']:8.1f} MB  {resultado['chamadas_total']:3d} chamadas  "
+                  f"{resultado['bytes'] / 1024:9.1f} KiB", flush=True)
+            resultados.append(resultado)
+    return {
+        'versao': versao_codigo(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'repeticoes': repeticoes,
+        'resultados': resultados,
+    }
+
+
+def comparar(caminho_base, caminho_novo, tolerancia):
+    """Imprime a razão novo/base de tempo, memória e chamadas; devolve 1 se algo piorou além da tolerância."""
+    with open(caminho_base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(caminho_novo, encoding='utf-8') as f:
+        novo = json.load(f)
+    anteriores = {(r['cenario'], r['membros']): r for r in base['resultados']}
+    print(f"base {base['versao']} ({base['data']})  ->  novo {novo['versao']} ({novo['data']})")
+    piorou = False
+    for r in novo['resultados']:
+        b = anteriores.get((r['cenario'], r['membros']))
+        if b is None:
+            continue
+        razoes = {
+            'tempo': r['tempo_s'] / b['tempo_s'] if b['tempo_s'] else 1.0,
+            'memória': r['memoria_pico_mb'] / b['memoria_pico_mb'] if b['memoria_pico_mb'] else 1.0,
+            'chamadas': r['chamadas_total'] / b['chamadas_total'] if b['chamadas_total'] else 1.0,
+        }
+        alerta = [k for k, v in razoes.items() if v > 1 + tolerancia]
+        piorou = piorou or bool(alerta)
+        print(f"{r['cenario']:<18} {r['membros']:>7}  " + "  ".join(f"{k} x{v:.2f}" for k, v in razoes.items())
+              + (f"  <-- piorou: {', '.join(alerta)}" if alerta else ""))
+    return 1 if piorou else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.executar', description=__doc__.split('\n')[0])
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--cenarios', nargs='+', choices=list(CENARIOS), default=list(CENARIOS))
+    parser.add_argument('--saida', help="arquivo JSON (padrão: benchmarks/resultados/<commit>.json)")
+    parser.add_argument('--comparar', nargs=2, metavar=('BASE', 'NOVO'))
+    parser.add_argument('--tolerancia', type=float, default=0.2, help="piora aceita no --comparar (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    if args.comparar:
+        return comparar(*args.comparar, args.tolerancia)
+
+    relatorio = executar(args.tamanhos, args.repeticoes, args.cenarios)
+    saida = args.saida or os.path.join(DIRETORIO_RESULTADOS, f"{relatorio['versao']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"Resultados em {saida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
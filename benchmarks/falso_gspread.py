@@ -0,0 +1,172 @@
+"""Planilha Google em memória com a parte da API do gspread que o sistema usa.
+
+Cada chamada que iria à rede é contada (e o tamanho aproximado do que
+trafegaria, em bytes de JSON), para os benchmarks medirem o gasto de cota
+sem credenciais nem latência.
+"""
+import json
+from collections import Counter
+
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import a1_range_to_grid_range, numericise_all
+
+
+class Contador:
+    def __init__(self):
+        self.chamadas = Counter()
+        self.bytes = 0
+
+    def registrar(self, metodo, *carga):
+        self.chamadas[metodo] += 1
+        self.bytes += sum(len(json.dumps(c, ensure_ascii=False, default=str)) for c in carga)
+
+    def zerar(self):
+        self.chamadas.clear()
+        self.bytes = 0
+
+    def resumo(self):
+        return {'chamadas': dict(self.chamadas), 'chamadas_total': sum(self.chamadas.values()), 'bytes': self.bytes}
+
+
+class WorksheetFalso:
+
+    def __init__(self, planilha, titulo, linhas, id_aba=0):
+        self.spreadsheet = planilha
+        self.title = titulo
+        self.id = id_aba
+        self.linhas = [list(map(str, l)) for l in linhas]
+
+    @property
+    def _contador(self):
+        return self.spreadsheet.contador
+
+    def _celulas(self, intervalo):
+        grade = a1_range_to_grid_range(intervalo)
+        r0, c0 = grade.get('startRowIndex', 0), grade.get('startColumnIndex', 0)
+        r1 = grade.get('endRowIndex', len(self.linhas))
+        c1 = grade.get('endColumnIndex')
+        if c1 is None:
+            c1 = max((len(l) for l in self.linhas), default=0)
+        return r0, r1, c0, c1
+
+    def _garantir(self, linha, coluna):
+        while len(self.linhas) <= linha:
+            self.linhas.append([])
+        if len(self.linhas[linha]) <= coluna:
+            self.linhas[linha].extend([''] * (coluna + 1 - len(self.linhas[linha])))
+
+    # --- leituras ---
+
+    def get_all_records(self):
+        if not self.linhas:
+            self._contador.registrar('get_all_records', [])
+            return []
+        cabecalho = self.linhas[0]
+        registros = []
+        for linha in self.linhas[1:]:
+            valores = numericise_all(linha + [''] * (len(cabecalho) - len(linha)))
+            registros.append(dict(zip(cabecalho, valores)))
+        self._contador.registrar('get_all_records', self.linhas)
+        return registros
+
+    def get_all_values(self):
+        valores = [list(l) for l in self.linhas]
+        self._contador.registrar('get_all_values', valores)
+        return valores
+
+    def col_values(self, coluna):
+        valores = [l[coluna - 1] if len(l) >= coluna else '' for l in self.linhas]
+        while valores and valores[-1] == '':
+            valores.pop()
+        self._contador.registrar('col_values', valores)
+        return valores
+
+    def batch_get(self, intervalos, major_dimension='ROWS'):
+        resposta = []
+        for intervalo in intervalos:
+            r0, r1, c0, c1 = self._celulas(intervalo)
+            bloco = [[l[c] if c < len(l) else '' for c in range(c0, c1)] for l in self.linhas[r0:r1]]
+            if major_dimension == 'COLUMNS':
+                bloco = [list(col) for col in zip(*bloco)] if bloco else []
+                bloco = [col[:max((i + 1 for i, v in enumerate(col) if v != ''), default=0)] for col in bloco]
+            resposta.append(bloco)
+        self._contador.registrar('batch_get', intervalos, resposta)
+        return resposta
+
+    # --- escritas ---
+
+    def update(self, range_name=None, values=None, **_):
+        r0, _, c0, _ = self._celulas(range_name)
+        for i, linha in enumerate(values):
+            for j, valor in enumerate(linha):
+                self._garantir(r0 + i, c0 + j)
+                self.linhas[r0 + i][c0 + j] = str(valor)
+        self._contador.registrar('update', values)
+
+    def batch_update(self, dados, **_):
+        for item in dados:
+            r0, _, c0, _ = self._celulas(item['range'])
+            for i, linha in enumerate(item['values']):
+                for j, valor in enumerate(linha):
+                    self._garantir(r0 + i, c0 + j)
+                    self.linhas[r0 + i][c0 + j] = str(valor)
+        self._contador.registrar('batch_update', dados)
+
+    def append_row(self, valores, **_):
+        self.linhas.append([str(v) for v in valores])
+        self._contador.registrar('append_row', valores)
+
+    def append_rows(self, valores, **_):
+        self.linhas.extend([str(v) for v in l] for l in valores)
+        self._contador.registrar('append_rows', valores)
+
+    def delete_rows(self, inicio, fim=None):
+        del self.linhas[inicio - 1:(fim or inicio)]
+        self._contador.registrar('delete_rows')
+
+    def clear(self):
+        self.linhas = []
+        self._contador.registrar('clear')
+
+
+class PlanilhaFalsa:
+
+    def __init__(self, abas=None):
+        self.contador = Contador()
+        self.revisao = 0
+        self.abas = {}
+        for titulo, linhas in (abas or {}).items():
+            self.abas[titulo] = WorksheetFalso(self, titulo, linhas, id_aba=len(self.abas))
+
+    def worksheet(self, titulo):
+        self.contador.registrar('worksheet')
+        if titulo not in self.abas:
+            raise WorksheetNotFound(titulo)
+        return self.abas[titulo]
+
+    def add_worksheet(self, titulo, rows=1000, cols=26, **_):
+        self.abas[titulo] = WorksheetFalso(self, titulo, [], id_aba=len(self.abas))
+        self.contador.registrar('add_worksheet')
+        return self.abas[titulo]
+
+    def get_lastUpdateTime(self):
+        self.contador.registrar('get_lastUpdateTime')
+        return str(self.revisao)
+
+    def batch_update(self, corpo):
+        for pedido in corpo['requests']:
+            faixa = pedido['deleteDimension']['range']
+            aba = next(a for a in self.abas.values() if a.id == faixa['sheetId'])
+            del aba.linhas[faixa['startIndex']:faixa['endIndex']]
+        self.contador.registrar('spreadsheet.batch_update', corpo)
+
+
+class ClienteFalso:
+    """Substitui o gspread.Client: open_by_url devolve sempre a mesma PlanilhaFalsa."""
+
+    def __init__(self, planilha):
+        self.planilha = planilha
+
+    def open_by_url(self, url):
+        self.planilha.contador.registrar('open_by_url')
+        return self.planilha
@@ -0,0 +1 @@
+"""Código compartilhado entre app.py (Sistema de Ups) e app_call.py (Call Ranking)."""
@@ -0,0 +1,192 @@
+"""Backends de armazenamento da tabela de membros (Google Sheets ou SQLite local).
+
+Todos recebem linhas como listas de strings na ordem das colunas (o mesmo
+formato de df[COLUNAS_PADRAO].astype(str)) e carregam a tabela no formato de
+worksheet.get_all_values(). Fora a reescrita inteira (reset), toda escrita
+passa por aplicar_operacoes, com a conferência do carimbo de versão.
+"""
+import sqlite3
+import threading
+
+from nucleo import planilha
+
+
+class Armazenamento:
+    """Interface comum. A chave de uma linha é o 'usuario' dele no momento da carga."""
+
+    # Segundos mínimos entre duas consultas de revisao() (ver nucleo.versao)
+    intervalo_sonda = 30.0
+    # O que revisao() mede, se for comum a outras abas (ver ControleVersoes.versao)
+    origem = None
+
+    def revisao(self):
+        """Marca barata de modificação externa; muda quando os dados mudam."""
+        raise NotImplementedError
+
+    def carregar_valores(self):
+        """Cabeçalho e linhas como listas de células, no formato de worksheet.get_all_values()."""
+        raise NotImplementedError
+
+    def reescrever(self, linhas):
+        raise NotImplementedError
+
+    def aplicar_operacoes(self, operacoes):
+        """Grava um lote de nucleo.fila.Operacao (localizadas pela chave, não pela posição).
+
+        Atualizações e remoções com valores anteriores só são aplicadas se o
+        carimbo de versão da linha ainda for o da carga (compare-and-swap); um
+        'anexar' de chave que já existe só passa se a linha já tiver os valores dele.
+        Devolve [(operação, motivo)] das recusadas: planilha.SEM_LINHA ou planilha.CONFLITO.
+        """
+        raise NotImplementedError
+
+
+class ArmazenamentoSheets(Armazenamento):
+    """Aba de uma planilha Google, acessada pelo planilha.CacheWorksheets."""
+
+    def __init__(self, worksheets, nome_aba, colunas, col_versao='Versao'):
+        self.worksheets = worksheets
+        self.nome_aba = nome_aba
+        self.colunas = list(colunas)
+        self.col_versao = col_versao if col_versao in self.colunas else None
+
+    def _executar(self, operacao):
+        return self.worksheets.executar(self.nome_aba, operacao)
+
+    @property
+    def origem(self):
+        # modifiedTime é da planilha: todas as abas dela mudam juntas
+        return self.worksheets.spreadsheet_url
+
+    def revisao(self):
+        # modifiedTime da planilha inteira (uma chamada de metadados no Drive)
+        return self._executar(lambda ws: ws.spreadsheet.get_lastUpdateTime())
+
+    def carregar_valores(self):
+        # Uma leitura só; motor.tabela_de_valores monta as colunas direto das células
+        return self._executar(lambda ws: ws.get_all_values())
+
+    def reescrever(self, linhas):
+        self._executar(lambda ws: planilha.reescrever_tabela(ws, self.colunas, linhas))
+
+    def aplicar_operacoes(self, operacoes):
+        col_chave = self.colunas.index('usuario') + 1
+        col_versao = self.colunas.index(self.col_versao) + 1 if self.col_versao else None
+        return self._executar(lambda ws: planilha.aplicar_operacoes(ws, operacoes, col_chave, col_versao, self.col_versao))
+
+
+class ArmazenamentoSQLite(Armazenamento):
+    """Tabela SQLite indexada, uma por aba. A ordem de inserção (rowid) faz o
+    papel da ordem das linhas da planilha.
+
+    Chave primária em 'usuario', índices em user_id, cargo e na coluna de total.
+    Colunas numéricas ficam como REAL para o índice do total ordenar certo.
+    A coluna col_versao (token trocado a cada escrita) serve de versão da linha
+    para o compare-and-swap de aplicar_operacoes; tabelas criadas antes de
+    alguma coluna existir ganham a coluna ao abrir.
+    """
+
+    # data_version é local e sem custo: pode ser consultado a cada execução
+    intervalo_sonda = 0.0
+
+    def __init__(self, caminho, tabela, colunas, colunas_numericas, col_total,
+                 col_chave='usuario', col_user_id='user_id', col_cargo='cargo',
+                 col_versao='Versao'):
+        self.tabela = tabela
+        self.colunas = list(colunas)
+        self.col_chave = col_chave
+        self.col_versao = col_versao if col_versao in self.colunas else None
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(caminho, check_same_thread=False)
+        self._con.row_factory = sqlite3.Row
+        tipos = {c: ('REAL' if c in colunas_numericas else 'TEXT') for c in self.colunas}
+        tipos[col_chave] = 'TEXT PRIMARY KEY'
+        definicao = ', '.join(f'{self._q(c)} {tipos[c]}' for c in self.colunas)
+        with self._lock, self._con:
+            self._con.execute(f'CREATE TABLE IF NOT EXISTS {self._q(tabela)} ({definicao})')
+            existentes = {r[1] for r in self._con.execute(f'PRAGMA table_info({self._q(tabela)})')}
+            for c in self.colunas:
+                if c not in existentes:
+                    padrao = '0' if tipos[c] == 'REAL' else "''"
+                    self._con.execute(f'ALTER TABLE {self._q(tabela)} ADD COLUMN {self._q(c)} {tipos[c]} DEFAULT {padrao}')
+            for col in (col_user_id, col_cargo, col_total):
+                if col in self.colunas:
+                    nome_indice = self._q(f'idx_{tabela}_{col}')
+                    self._con.execute(f'CREATE INDEX IF NOT EXISTS {nome_indice} ON {self._q(tabela)} ({self._q(col)})')
+
+    @staticmethod
+    def _q(nome):
+        return '"' + str(nome).replace('"', '""') + '"'
+
+    @property
+    def _sql_insert(self):
+        cols = ', '.join(self._q(c) for c in self.colunas)
+        return f'INSERT INTO {self._q(self.tabela)} ({cols}) VALUES ({", ".join("?" * len(self.colunas))})'
+
+    @property
+    def _sql_update(self):
+        sets = ', '.join(f'{self._q(c)} = ?' for c in self.colunas)
+        return f'UPDATE {self._q(self.tabela)} SET {sets} WHERE {self._q(self.col_chave)} = ?'
+
+    @property
+    def _sql_insert_novo(self):
+        # Chave já existente: não insere nem altera (rowcount 0)
+        return f'{self._sql_insert} ON CONFLICT({self._q(self.col_chave)}) DO NOTHING'
+
+    @property
+    def _sql_delete(self):
+        return f'DELETE FROM {self._q(self.tabela)} WHERE {self._q(self.col_chave)} = ?'
+
+    def revisao(self):
+        # Muda quando outra conexão (outro processo) grava no arquivo
+        with self._lock:
+            return self._con.execute('PRAGMA data_version').fetchone()[0]
+
+    def carregar_valores(self):
+        with self._lock:
+            cur = self._con.execute(f'SELECT * FROM {self._q(self.tabela)} ORDER BY rowid')
+            return [[d[0] for d in cur.description]] + [tuple(r) for r in cur.fetchall()]
+
+    def reescrever(self, linhas):
+        with self._lock, self._con:
+            self._con.execute(f'DELETE FROM {self._q(self.tabela)}')
+            self._con.executemany(self._sql_insert, [list(l) for l in linhas])
+
+    def _versao_atual(self, chave):
+        linha = self._con.execute(
+            f'SELECT {self._q(self.col_versao)} FROM {self._q(self.tabela)} WHERE {self._q(self.col_chave)} = ?',
+            (chave,)).fetchone()
+        return None if linha is None else linha[0]
+
+    def _linha_atual(self, chave):
+        cur = self._con.execute(f'SELECT * FROM {self._q(self.tabela)} WHERE {self._q(self.col_chave)} = ?', (chave,))
+        linha = cur.fetchone()
+        return None if linha is None else [linha[c] for c in self.colunas]
+
+    def aplicar_operacoes(self, operacoes):
+        recusadas = []
+        col_versao = self.colunas.index(self.col_versao) + 1 if self.col_versao else None
+        # Leitura do carimbo e escrita na mesma transação, sob o lock: o compare-and-swap é atômico.
+        # As operações rodam em ordem, então uma renomeação anterior do lote já vale para as seguintes.
+        with self._lock, self._con:
+            for op in operacoes:
+                if op.acao == 'anexar':
+                    if (self._con.execute(self._sql_insert_novo, list(op.valores)).rowcount == 0
+                            and not planilha.mesma_linha(self._linha_atual(op.chave), op.valores)):
+                        recusadas.append((op, planilha.CONFLITO))
+                    continue
+                atual = self._versao_atual(op.chave) if col_versao else None
+                if col_versao and atual is not None and not planilha.conferir_versao(op, atual, col_versao):
+                    recusadas.append((op, planilha.CONFLITO))
+                elif op.acao == 'remover':
+                    self._con.execute(self._sql_delete, (op.chave,))
+                else:
+                    try:
+                        alteradas = self._con.execute(self._sql_update, list(op.valores) + [op.chave]).rowcount
+                    except sqlite3.IntegrityError:
+                        # Renomeado para um nome que outra linha já usa
+                        recusadas.append((op, planilha.CONFLITO))
+                        continue
+                    if alteradas == 0:
+                        recusadas.append((op, planilha.SEM_LINHA))
+        return recusadas
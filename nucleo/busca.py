@@ -0,0 +1,144 @@
+"""Busca de membros por nome ou user_id para os seletores dos apps.
+
+Os nomes são normalizados (sem acento, sem maiúsculas, só letras e números:
+"𝓙𝓸ã𝓸 ✨" vira "joao") e ficam num vetor ordenado, assim como os IDs; o
+prefixo digitado é achado por busca binária. Trechos do meio do nome são
+procurados com str.find num texto único com todos os nomes normalizados, e
+apelidos digitados com erro passam pelo difflib só entre os nomes que
+dividem pares de letras (bigramas) pouco comuns com o texto. Tudo é montado
+uma vez por versão da tabela (via IndiceMembros.busca) e cada busca devolve
+só os melhores nomes.
+"""
+import heapq
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from difflib import SequenceMatcher
+
+LIMITE = 20
+# Abaixo disto o texto só é procurado no começo dos nomes (trechos curtos casam com quase todos)
+MINIMO_TRECHO = 2
+MINIMO_APROXIMADA = 3
+# Semelhança mínima (razão do difflib, como em get_close_matches) para a busca aproximada
+CORTE_APROXIMADA = 0.6
+# Candidatos (os que mais dividem bigramas com o texto) comparados pelo difflib
+CANDIDATOS_APROXIMADA = 200
+# Bigrama presente em mais nomes que isto não distingue ninguém e fica fora da contagem
+OCORRENCIAS_BIGRAMA = 5000
+
+SEPARADOR = '\n'
+
+
+def normalizar(texto):
+    """Nome para busca: NFKD, sem acentos, casefold, só letras e números (ou o casefold, se nada sobrar)."""
+    texto = str(texto)
+    if texto.isascii():
+        if texto.isalnum():
+            return texto.lower()
+        limpo = ''.join(filter(str.isalnum, texto)).lower()
+        return limpo or texto.strip().lower()
+    decomposto = unicodedata.normalize('NFKD', texto)
+    limpo = ''.join(c for c in decomposto if c.isalnum() and not unicodedata.combining(c)).casefold()
+    return limpo or texto.strip().casefold()
+
+
+def bigramas(texto):
+    if len(texto) < 2:
+        return {texto} if texto else set()
+    return {texto[i:i + 2] for i in range(len(texto) - 1)}
+
+
+class IndiceBusca:
+
+    def __init__(self, nomes, ids=()):
+        """nomes: nomes dos membros (sem repetição); ids: pares (user_id, nome)."""
+        nomes = [str(n) for n in nomes]
+        chaves = [normalizar(n).replace(SEPARADOR, ' ') for n in nomes]
+        ordem = sorted(range(len(nomes)), key=chaves.__getitem__)
+        self._chaves = [chaves[i] for i in ordem]
+        self._nomes = [nomes[i] for i in ordem]
+        ids = sorted((str(i), str(n)) for i, n in ids)
+        self._ids = [i for i, _ in ids]
+        self._nomes_id = [n for _, n in ids]
+        self._texto = None
+        self._inicios = None
+
+    def __len__(self):
+        return len(self._nomes)
+
+    @staticmethod
+    def _faixa(chaves, prefixo):
+        inicio = bisect_left(chaves, prefixo)
+        return inicio, bisect_left(chaves, prefixo + '\U0010ffff', inicio)
+
+    def _ocorrencias(self, trecho, maximo):
+        """Posições (no vetor ordenado) dos nomes que contêm o trecho, em ordem; para em `maximo` + 1."""
+        if self._texto is None:
+            self._texto = SEPARADOR.join(self._chaves)
+            inicios, posicao = [], 0
+            for chave in self._chaves:
+                inicios.append(posicao)
+                posicao += len(chave) + 1
+            self._inicios = inicios
+        achadas = []
+        posicao = self._texto.find(trecho)
+        while posicao >= 0:
+            i = bisect_right(self._inicios, posicao) - 1
+            achadas.append(i)
+            if len(achadas) > maximo:
+                break
+            # Próxima busca a partir do nome seguinte: cada nome conta uma vez
+            proximo = self._inicios[i + 1] if i + 1 < len(self._inicios) else len(self._texto)
+            posicao = self._texto.find(trecho, proximo)
+        return achadas
+
+    def buscar(self, texto, limite=LIMITE, corte=CORTE_APROXIMADA):
+        """Até `limite` nomes para o texto: nome igual, começo do nome, começo do ID,
+        trecho do nome e, por fim, nomes parecidos. Sem texto, os primeiros em ordem alfabética."""
+        texto = str(texto or '').strip()
+        if not texto:
+            return self._nomes[:limite]
+        chave = normalizar(texto)
+        achados = {}
+
+        def juntar(nomes):
+            for nome in nomes:
+                if len(achados) >= limite:
+                    return True
+                achados.setdefault(nome, None)
+            return len(achados) >= limite
+
+        # Nome igual primeiro; depois os que começam com o texto (ordem alfabética)
+        inicio, fim = self._faixa(self._chaves, chave)
+        if juntar(self._nomes[inicio:min(fim, inicio + limite)]):
+            return list(achados)
+        if texto.isdigit():
+            inicio, fim = self._faixa(self._ids, texto)
+            if juntar(self._nomes_id[inicio:min(fim, inicio + limite)]):
+                return list(achados)
+        if len(chave) < MINIMO_TRECHO:
+            return list(achados)
+
+        # Trecho do meio do nome
+        if juntar(self._nomes[i] for i in self._ocorrencias(chave, limite)):
+            return list(achados)
+        if len(chave) < MINIMO_APROXIMADA:
+            return list(achados)
+
+        # Aproximada (letras trocadas, faltando ou sobrando): candidatos pelos bigramas, nota pelo difflib
+        comuns = Counter()
+        for bigrama in bigramas(chave):
+            achadas = self._ocorrencias(bigrama, OCORRENCIAS_BIGRAMA)
+            if len(achadas) <= OCORRENCIAS_BIGRAMA:
+                comuns.update(achadas)
+        comparador = SequenceMatcher(b=chave)
+        notas = []
+        for i, _ in heapq.nlargest(CANDIDATOS_APROXIMADA, comuns.items(), key=lambda par: par[1]):
+            comparador.set_seq1(self._chaves[i])
+            if comparador.real_quick_ratio() >= corte and comparador.quick_ratio() >= corte:
+                nota = comparador.ratio()
+                if nota >= corte:
+                    notas.append((-nota, self._chaves[i], i))
+        notas.sort()
+        juntar(self._nomes[i] for _, _, i in notas)
+        return list(achados)
@@ -0,0 +1,247 @@
+"""Classificação (total desc, depois cargo desc) com estatística de ordem.
+
+O Ranking monta a tabela ordenada e estilizada da página; esta estrutura
+responde "qual a posição deste membro", "quem está em volta dele" e "os N
+primeiros" sem ordenar nada, e é atualizada membro a membro quando uma
+semana é processada, alguém entra, sai ou muda de nome.
+
+As chaves (-total, -cargo, ordem de entrada, usuario) ficam numa lista
+ordenada partida em blocos de até 2·CARGA; uma árvore de Fenwick com o
+tamanho de cada bloco dá a posição global. Inserir ou retirar custa duas
+buscas binárias, um deslocamento dentro de um bloco e O(log blocos) na
+árvore; só a divisão ou o esvaziamento de um bloco refaz o índice dos blocos.
+"""
+import threading
+from bisect import bisect_left, insort
+
+import numpy as np
+import pandas as pd
+
+from nucleo.ranking import ordinal_cargos
+
+CARGA = 256
+
+# Bytes por membro medidos com tracemalloc (100 mil membros): blocos, posições por nome e árvore de Fenwick
+BYTES_POR_MEMBRO = 260
+
+
+class _Fenwick:
+    """Somas de prefixo dos tamanhos dos blocos."""
+
+    def __init__(self, tamanhos):
+        self.n = len(tamanhos)
+        self.arvore = [0] + list(tamanhos)
+        for i in range(1, self.n + 1):
+            pai = i + (i & -i)
+            if pai <= self.n:
+                self.arvore[pai] += self.arvore[i]
+
+    def somar(self, i, delta):
+        i += 1
+        while i <= self.n:
+            self.arvore[i] += delta
+            i += i & -i
+
+    def prefixo(self, i):
+        """Soma dos blocos [0, i)."""
+        total = 0
+        while i > 0:
+            total += self.arvore[i]
+            i -= i & -i
+        return total
+
+    def localizar(self, k):
+        """(bloco, deslocamento) do k-ésimo elemento (0 = primeiro)."""
+        i, passo = 0, 1 << self.n.bit_length()
+        while passo:
+            proximo = i + passo
+            if proximo <= self.n and self.arvore[proximo] <= k:
+                i = proximo
+                k -= self.arvore[proximo]
+            passo >>= 1
+        return i, k
+
+
+class Classificacao:
+    """Membros em ordem de classificação; posições começam em 1."""
+
+    def __init__(self, chaves_ordenadas=()):
+        chaves = list(chaves_ordenadas)
+        self._blocos = [chaves[i:i + CARGA] for i in range(0, len(chaves), CARGA)]
+        self._chaves = {chave[3]: chave for chave in chaves}
+        self._proxima = max((chave[2] for chave in chaves), default=-1) + 1
+        self._reindexar()
+
+    @classmethod
+    def de_tabela(cls, df, col_total, cargos, col_usuario='usuario', col_cargo='cargo'):
+        """Classificação da tabela, na mesma ordem do Ranking (empate: ordem das linhas)."""
+        total = pd.to_numeric(df[col_total], errors='coerce').fillna(0).to_numpy(dtype=float)
+        cargo = np.asarray(ordinal_cargos(df[col_cargo], cargos), dtype=float)
+        entrada = np.arange(len(df))
+        ordem = np.lexsort((entrada, -cargo, -total))
+        return cls(zip((-total[ordem]).tolist(), (-cargo[ordem]).tolist(), entrada[ordem].tolist(),
+                       df[col_usuario].astype(str).to_numpy()[ordem].tolist()))
+
+    def _reindexar(self):
+        self._maximos = [bloco[-1] for bloco in self._blocos]
+        self._arvore = _Fenwick([len(bloco) for bloco in self._blocos])
+
+    def _inserir(self, chave):
+        if not self._blocos:
+            self._blocos.append([chave])
+            self._reindexar()
+            return
+        i = min(bisect_left(self._maximos, chave), len(self._blocos) - 1)
+        bloco = self._blocos[i]
+        insort(bloco, chave)
+        if len(bloco) > 2 * CARGA:
+            self._blocos[i:i + 1] = [bloco[:CARGA], bloco[CARGA:]]
+            self._reindexar()
+        else:
+            self._maximos[i] = bloco[-1]
+            self._arvore.somar(i, 1)
+
+    def _local(self, chave):
+        i = bisect_left(self._maximos, chave)
+        return i, bisect_left(self._blocos[i], chave)
+
+    def _retirar(self, chave):
+        i, j = self._local(chave)
+        bloco = self._blocos[i]
+        del bloco[j]
+        if bloco:
+            self._maximos[i] = bloco[-1]
+            self._arvore.somar(i, -1)
+        else:
+            del self._blocos[i]
+            self._reindexar()
+
+    def __len__(self):
+        return len(self._chaves)
+
+    def __contains__(self, usuario):
+        return str(usuario) in self._chaves
+
+    def atualizar(self, usuario, total, cargo):
+        """Entra com (ou muda para) este total e ordinal de cargo; quem entra fica atrás dos empatados."""
+        usuario = str(usuario)
+        anterior = self._chaves.get(usuario)
+        if anterior is not None:
+            self._retirar(anterior)
+            entrada = anterior[2]
+        else:
+            entrada, self._proxima = self._proxima, self._proxima + 1
+        chave = (-float(total), -float(cargo), entrada, usuario)
+        self._chaves[usuario] = chave
+        self._inserir(chave)
+
+    def remover(self, usuario):
+        chave = self._chaves.pop(str(usuario), None)
+        if chave is not None:
+            self._retirar(chave)
+
+    def renomear(self, antigo, novo):
+        chave = self._chaves.pop(str(antigo), None)
+        if chave is None:
+            return
+        self._retirar(chave)
+        self.remover(novo)
+        chave = chave[:3] + (str(novo),)
+        self._chaves[str(novo)] = chave
+        self._inserir(chave)
+
+    def posicao(self, usuario):
+        """Posição do membro (1 = primeiro) ou None."""
+        chave = self._chaves.get(str(usuario))
+        if chave is None:
+            return None
+        i, j = self._local(chave)
+        return self._arvore.prefixo(i) + j + 1
+
+    def _fatia(self, inicio, fim):
+        """Usuários das posições [inicio, fim) (base 0)."""
+        inicio, fim = max(0, inicio), min(len(self), fim)
+        if inicio >= fim:
+            return []
+        i, j = self._arvore.localizar(inicio)
+        nomes = []
+        while len(nomes) < fim - inicio:
+            nomes.extend(chave[3] for chave in self._blocos[i][j:j + fim - inicio - len(nomes)])
+            i, j = i + 1, 0
+        return nomes
+
+    def topo(self, n):
+        """[(posição, usuario)] dos n primeiros."""
+        return list(enumerate(self._fatia(0, n), start=1))
+
+    def vizinhos(self, usuario, raio=2):
+        """[(posição, usuario)] de até `raio` membros antes e depois dele (ele incluso)."""
+        posicao = self.posicao(usuario)
+        if posicao is None:
+            return []
+        inicio = max(1, posicao - raio)
+        return list(enumerate(self._fatia(inicio - 1, posicao + raio), start=inicio))
+
+
+class ClassificacaoAba:
+    """Classificação de uma aba no processo, compartilhada pelas sessões.
+
+    Reconstruída quando o retrato da aba muda (sincronizar) e atualizada a
+    cada operação enfileirada (aplicar), antes mesmo da gravação.
+    """
+
+    def __init__(self, col_total, cargos, col_usuario='usuario', col_cargo='cargo'):
+        self.col_total = col_total
+        self.cargos = list(cargos)
+        self.col_usuario = col_usuario
+        self.col_cargo = col_cargo
+        self._ordinais = {c: i for i, c in enumerate(self.cargos)}
+        self._lock = threading.Lock()
+        self._base = None
+        self._classificacao = Classificacao()
+
+    def sincronizar(self, retrato, operacoes=()):
+        """Refaz a partir de retrato.df se o retrato mudou, reaplicando as operações ainda não gravadas."""
+        with self._lock:
+            if retrato is self._base:
+                return
+            classificacao = Classificacao.de_tabela(retrato.df, self.col_total, self.cargos, self.col_usuario, self.col_cargo)
+            for op in operacoes:
+                self._aplicar(classificacao, op)
+            self._base, self._classificacao = retrato, classificacao
+
+    def aplicar(self, op):
+        """Operação (nucleo.fila.Operacao) enfileirada para a aba."""
+        with self._lock:
+            self._aplicar(self._classificacao, op)
+
+    def _aplicar(self, classificacao, op):
+        if op.acao == 'remover':
+            classificacao.remover(op.chave)
+            return
+        usuario = str(op.registro[self.col_usuario])
+        if op.chave != usuario:
+            classificacao.renomear(op.chave, usuario)
+        total = pd.to_numeric(op.registro.get(self.col_total), errors='coerce')
+        classificacao.atualizar(usuario, 0.0 if pd.isna(total) else total,
+                                self._ordinais.get(op.registro.get(self.col_cargo), -1))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._classificacao)
+
+    def memoria(self):
+        """Bytes estimados da classificação."""
+        return len(self) * BYTES_POR_MEMBRO
+
+    def posicao(self, usuario):
+        with self._lock:
+            return self._classificacao.posicao(usuario)
+
+    def topo(self, n):
+        with self._lock:
+            return self._classificacao.topo(n)
+
+    def vizinhos(self, usuario, raio=2):
+        with self._lock:
+            return self._classificacao.vizinhos(usuario, raio)
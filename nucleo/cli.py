@@ -0,0 +1,250 @@
+"""Linha de comando do motor (sem Streamlit), para rotinas semanais no cron.
+
+    python -m nucleo.cli processar ups mensagens.csv
+    python -m nucleo.cli processar ups export-canal1.json export-canal2.json --tipo discord --gravar
+    python -m nucleo.cli processar call voz.ndjson --semana 2026-42 --gravar
+    python -m nucleo.cli ranking call --top 20
+    python -m nucleo.cli historico ups --membro 123456789012345678
+    python -m nucleo.cli exportar ups retrato.json
+    python -m nucleo.cli --guilda servidor_b ranking ups --top 10
+
+A conexão vem do mesmo secrets.toml dos apps (seções [armazenamento],
+[gcp_service_account] e [gsheets_config] ou [guildas.<id>]); --guilda escolhe
+a guilda (padrão: a primeira) e --sqlite força o backend local.
+Sem --gravar, processar só mostra a prévia.
+"""
+import argparse
+import itertools
+import sys
+import tomllib
+from datetime import timedelta, timezone
+
+from nucleo import cota, discord, guildas, lote, motor, voz
+from nucleo.indice import SEM_ID
+
+SECRETS_PADRAO = '.streamlit/secrets.toml'
+# Arquivos que cada sistema processa (o primeiro é o padrão de --tipo)
+TIPOS_POR_SISTEMA = {'ups': ('lote', 'discord'), 'call': ('voz',)}
+
+
+def ler_secrets(caminho):
+    try:
+        with open(caminho, 'rb') as arquivo:
+            return tomllib.load(arquivo)
+    except FileNotFoundError:
+        return {}
+
+
+def conectar(args):
+    """(guilda, config do [armazenamento] dela, CacheWorksheets ou None) conforme os secrets e as opções da linha de comando."""
+    secrets = ler_secrets(args.secrets)
+    todas = guildas.ler_guildas(secrets)
+    if args.guilda is not None and args.guilda not in todas:
+        raise SystemExit(f"Guilda '{args.guilda}' não configurada em {args.secrets} (há: {', '.join(todas)}).")
+    guilda = guildas.escolher(todas, args.guilda)
+    config = dict(guilda.config)
+    if args.sqlite:
+        config.update(backend='sqlite', sqlite_path=args.sqlite)
+    worksheets = None
+    if config.get('backend', 'sheets') != 'sqlite':
+        if 'gcp_service_account' not in secrets or not guilda.spreadsheet_url:
+            raise SystemExit(f"Credenciais do Google ou planilha da guilda '{guilda.id}' ausentes em {args.secrets} (ou use --sqlite).")
+        import gspread
+        from nucleo.planilha import CacheWorksheets
+
+        def cliente():
+            scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+            conta = gspread.service_account_from_dict(dict(secrets['gcp_service_account']), scopes=scopes)
+            return cota.proteger_cliente(conta, cota.balde_processo(config.get('cota_por_minuto')))
+
+        worksheets = CacheWorksheets(cliente, guilda.spreadsheet_url)
+    return guilda, config, worksheets
+
+
+def abrir(sistema, args):
+    """Armazenamento da aba do sistema na guilda."""
+    guilda, config, worksheets = conectar(args)
+    return motor.abrir_armazenamento(sistema, config, worksheets, aba=guilda.aba(sistema))
+
+
+def _semana(texto):
+    ano, _, numero = texto.partition('-')
+    return int(ano), int(numero.lstrip('Ss'))
+
+
+def tipo_do_lote(sistema, args):
+    """--tipo conferido contra o sistema, antes de conectar ou abrir os arquivos."""
+    tipos = TIPOS_POR_SISTEMA[sistema.nome]
+    tipo = args.tipo or tipos[0]
+    if tipo not in tipos:
+        raise SystemExit(f"O sistema '{sistema.nome}' não processa --tipo {tipo} (aceita: {', '.join(tipos)}).")
+    if tipo == 'lote' and len(args.arquivos) > 1:
+        raise SystemExit("--tipo lote lê um arquivo só.")
+    return tipo
+
+
+def ler_lote_semana(sistema, args, df, tipo):
+    """(lote, semana ou None) a partir dos arquivos do tipo; arquivo ilegível encerra com o nome dele."""
+    lendo = args.arquivos[0]
+
+    def registros(caminho, gerador):
+        # Os eventos de voz são consumidos adiante: guarda de qual arquivo veio o último
+        nonlocal lendo
+        lendo = caminho
+        yield from gerador
+
+    try:
+        if tipo == 'lote':
+            with open(lendo, encoding='utf-8') as arquivo:
+                return lote.ler_lote(arquivo, lendo), _semana(args.semana) if args.semana else None
+        abertos = [open(caminho, encoding='utf-8') for caminho in args.arquivos]
+        try:
+            if tipo == 'discord':
+                contagens = {}
+                for arquivo, caminho in zip(abertos, args.arquivos):
+                    lendo = caminho
+                    discord.contar_mensagens(discord.ler_mensagens(arquivo, caminho), contagens=contagens)
+                por_semana, montar = contagens, discord.lote_da_semana
+            else:
+                eventos = itertools.chain.from_iterable(
+                    registros(caminho, voz.ler_eventos(arquivo, caminho)) for arquivo, caminho in zip(abertos, args.arquivos))
+                por_semana = voz.horas_por_semana(eventos, timezone(timedelta(hours=args.fuso)))
+                montar = voz.lote_da_semana
+        finally:
+            for arquivo in abertos:
+                arquivo.close()
+    except OSError as e:
+        raise SystemExit(f"Não foi possível abrir {e.filename}: {e.strerror}.") from None
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise SystemExit(f"Erro ao ler {lendo}: {e}") from None
+    if not por_semana:
+        raise SystemExit("Nenhum registro aproveitável nos arquivos.")
+    semana = _semana(args.semana) if args.semana else max(por_semana)
+    ids = None if args.sem_zeros else [u for u in df[sistema.col_user_id].astype(str) if u not in SEM_ID]
+    return montar(por_semana, semana, ids), semana
+
+
+def cmd_processar(sistema, args):
+    tipo = tipo_do_lote(sistema, args)
+    guilda, config, worksheets = conectar(args)
+    armazenamento = motor.abrir_armazenamento(sistema, config, worksheets, aba=guilda.aba(sistema))
+    df = motor.carregar(sistema, armazenamento)
+    df_lote, semana = ler_lote_semana(sistema, args, df, tipo)
+    df_novo, previa, ignorados = motor.processar_semana(sistema, df, df_lote)
+
+    if semana is not None:
+        print(f"Semana {lote.rotulo_semana(semana)}")
+    contagem = previa[sistema.col_sit].value_counts()
+    print(f"{len(previa)} membros: " + ", ".join(f"{s} {int(contagem.get(s, 0))}" for s in ('UPADO', 'MANTEVE', 'REBAIXADO')))
+    mudancas = previa[previa[sistema.col_cargo] != previa['novo cargo']]
+    if not mudancas.empty:
+        print(mudancas.to_string(index=False))
+    if not ignorados.empty:
+        print(f"{len(ignorados)} linha(s) ignorada(s): membro não encontrado ou cargo desconhecido.", file=sys.stderr)
+
+    if not args.gravar:
+        print("Prévia apenas (use --gravar para aplicar).")
+        return 0
+    operacoes = motor.diferencas(sistema, df, df_novo)
+    recusadas = armazenamento.aplicar_operacoes(operacoes)
+    for op, motivo in recusadas:
+        print(f"Não gravado ({motivo}): {op.chave}", file=sys.stderr)
+    print(f"Gravadas {len(operacoes) - len(recusadas)} de {len(operacoes)} linha(s).")
+
+    # Histórico só do que foi gravado: linhas recusadas (conflito) ficam de fora
+    recusados = {op.chave for op, _ in recusadas}
+    gravados = df_novo[~df_novo[sistema.col_usuario].astype(str).isin(recusados)]
+    dias = args.dias_fechamento if args.dias_fechamento is not None else int(config.get('dias_fechamento', 0))
+    linhas = motor.linhas_historico(sistema, df, gravados, semana, dias)
+    if linhas:
+        motor.abrir_historico(sistema, config, worksheets).anexar(linhas)
+        print(f"{len(linhas)} linha(s) no histórico ({sistema.aba_historico}).")
+    return 1 if recusadas else 0
+
+
+def cmd_ranking(sistema, args):
+    df = motor.carregar(sistema, abrir(sistema, args))
+    ranking = motor.ranking(sistema, df)
+    colunas = [sistema.col_usuario, sistema.col_user_id, sistema.col_cargo, sistema.col_sit, sistema.col_total]
+    tabela = ranking.dados(ranking.tabela if args.top is None else ranking.tabela.head(args.top))[colunas]
+    if args.saida:
+        tabela.to_csv(args.saida)
+    else:
+        print(tabela.to_string())
+    return 0
+
+
+def cmd_historico(sistema, args):
+    _, config, worksheets = conectar(args)
+    historico = motor.abrir_historico(sistema, config, worksheets)
+    if args.membro:
+        tabela = historico.trajetoria(user_id=args.membro if args.membro.isdigit() else None, usuario=args.membro)
+    elif args.semana:
+        tabela = historico.da_semana(_semana(args.semana))
+    else:
+        print("\n".join(historico.semanas()) or "Histórico vazio.")
+        return 0
+    if args.saida:
+        tabela.to_csv(args.saida, index=False)
+    else:
+        print(tabela.to_string(index=False))
+    return 0
+
+
+def cmd_exportar(sistema, args):
+    df = motor.carregar(sistema, abrir(sistema, args))
+    formato = 'json' if args.saida.lower().endswith('.json') else 'csv'
+    motor.exportar(sistema, df, args.saida, formato)
+    print(f"{len(df)} membros exportados para {args.saida}.")
+    return 0
+
+
+def montar_parser():
+    parser = argparse.ArgumentParser(prog='python -m nucleo.cli', description="Sistema de Ups / Call Ranking sem interface.")
+    parser.add_argument('--secrets', default=SECRETS_PADRAO, help=f"secrets.toml dos apps (padrão: {SECRETS_PADRAO})")
+    parser.add_argument('--guilda', help="id da guilda em [guildas.<id>] (padrão: a primeira)")
+    parser.add_argument('--sqlite', help="usa este arquivo SQLite em vez do backend dos secrets")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    processar = comandos.add_parser('processar', help="processa a semana de todos os membros a partir de arquivos")
+    processar.add_argument('sistema', choices=sorted(motor.SISTEMAS))
+    processar.add_argument('arquivos', nargs='+')
+    processar.add_argument('--tipo', choices=['lote', 'discord', 'voz'],
+                           help="lote (CSV/JSON de lote) ou discord (exportação) no ups, voz (log) no call; padrão: lote no ups, voz no call")
+    processar.add_argument('--semana', help="semana ISO AAAA-SS (padrão: a mais recente dos arquivos; no lote, a do processamento)")
+    processar.add_argument('--fuso', type=int, default=-3, help="fuso das semanas dos logs de voz, em horas (padrão: -3)")
+    processar.add_argument('--dias-fechamento', type=int,
+                           help="sem --semana, processar nos N primeiros dias da semana registra a anterior no histórico "
+                                "(padrão: dias_fechamento do [armazenamento], ou 0 = a semana do processamento)")
+    processar.add_argument('--sem-zeros', action='store_true', help="não processa membros ausentes dos arquivos")
+    processar.add_argument('--gravar', action='store_true', help="grava o resultado (sem isto, só a prévia)")
+    processar.set_defaults(funcao=cmd_processar)
+
+    ranking = comandos.add_parser('ranking', help="mostra (ou salva em CSV) o ranking atual")
+    ranking.add_argument('sistema', choices=sorted(motor.SISTEMAS))
+    ranking.add_argument('--top', type=int)
+    ranking.add_argument('--saida')
+    ranking.set_defaults(funcao=cmd_ranking)
+
+    historico = comandos.add_parser('historico', help="semanas registradas, trajetória de um membro ou resultado de uma semana")
+    historico.add_argument('sistema', choices=sorted(motor.SISTEMAS))
+    grupo = historico.add_mutually_exclusive_group()
+    grupo.add_argument('--membro', help="user_id (ou nome, para membros sem ID)")
+    grupo.add_argument('--semana', help="semana ISO AAAA-SS")
+    historico.add_argument('--saida', help="grava em CSV em vez de mostrar")
+    historico.set_defaults(funcao=cmd_historico)
+
+    exportar = comandos.add_parser('exportar', help="retrato da tabela em CSV ou JSON")
+    exportar.add_argument('sistema', choices=sorted(motor.SISTEMAS))
+    exportar.add_argument('saida')
+    exportar.set_defaults(funcao=cmd_exportar)
+    return parser
+
+
+def main(argv=None):
+    args = montar_parser().parse_args(argv)
+    return args.funcao(motor.SISTEMAS[args.sistema], args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
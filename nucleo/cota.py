@@ -0,0 +1,142 @@
+"""Cota da API do Google Sheets: limite de requisições por minuto e novas tentativas.
+
+A cota é por usuário (a conta de serviço) e por minuto: 60 leituras e 60
+escritas. Passar disso devolve 429, e repetir na hora só gera outro 429.
+Aqui todas as requisições do processo (sessões, fila de gravação, os dois
+apps) passam por um balde de fichas comum, que espaça as chamadas em vez de
+deixá-las falhar. 429 é repetido com espera exponencial aleatorizada (a
+requisição foi recusada antes de fazer qualquer coisa) e pausa o balde
+inteiro, não só a thread que o recebeu. 5xx só é repetido em leituras: uma
+escrita que deu 500 pode ter sido aplicada, e repetir um append_rows ou um
+deleteDimension por índice duplicaria a linha ou apagaria a vizinha. Essas
+ficam para a fila de gravação, que relê as chaves antes de tentar de novo.
+"""
+import logging
+import random
+import threading
+import time
+
+from nucleo import medicao
+
+COTA_POR_MINUTO = 60
+REPETIR = {429}
+REPETIR_LEITURA = REPETIR | {500, 502, 503, 504}
+
+
+class BaldeFichas:
+    """Token bucket: `por_minuto` fichas por minuto, acumulando até `rajada`.
+
+    Quem pede uma ficha sem ficha disponível reserva a próxima e dorme até
+    ela (fora do lock), então as threads são atendidas na ordem de chegada.
+    """
+
+    def __init__(self, por_minuto=COTA_POR_MINUTO, rajada=None, relogio=time.monotonic, dormir=time.sleep):
+        self.relogio = relogio
+        self.dormir = dormir
+        self._lock = threading.Lock()
+        self._ultimo = relogio()
+        self.ajustar(por_minuto, rajada)
+        self._fichas = self.capacidade
+
+    def ajustar(self, por_minuto, rajada=None):
+        # Rajada padrão: ~10 s de cota, para uma carga inicial não esperar
+        with self._lock:
+            self.por_minuto = float(por_minuto)
+            self.capacidade = float(rajada or max(1, int(por_minuto) // 6))
+
+    def _repor(self):
+        agora = self.relogio()
+        self._fichas = min(self.capacidade, self._fichas + (agora - self._ultimo) * self.por_minuto / 60.0)
+        self._ultimo = agora
+
+    def retirar(self):
+        """Consome uma ficha, esperando por ela se preciso; devolve os segundos esperados."""
+        with self._lock:
+            self._repor()
+            self._fichas -= 1
+            espera = max(0.0, -self._fichas * 60.0 / self.por_minuto)
+        if espera:
+            self.dormir(espera)
+        return espera
+
+    def pausar(self, segundos):
+        """Ninguém recebe ficha pelos próximos `segundos` (depois de um 429); a primeira sai ao fim deles."""
+        with self._lock:
+            self._repor()
+            self._fichas = min(self._fichas, 1 - segundos * self.por_minuto / 60.0)
+
+    def disponiveis(self):
+        with self._lock:
+            self._repor()
+            return self._fichas
+
+
+_balde = None
+_lock_balde = threading.Lock()
+
+
+def balde_processo(por_minuto=None):
+    """O balde compartilhado pelo processo; `por_minuto` (dos secrets) reajusta a taxa."""
+    global _balde
+    with _lock_balde:
+        if _balde is None:
+            _balde = BaldeFichas(por_minuto or COTA_POR_MINUTO)
+        elif por_minuto and float(por_minuto) != _balde.por_minuto:
+            _balde.ajustar(por_minuto)
+        return _balde
+
+
+def status_http(erro):
+    return getattr(getattr(erro, 'response', None), 'status_code', None)
+
+
+def leitura(method, endpoint):
+    """GET (metadados, get_all_values, modifiedTime) e values:batchGet não alteram nada."""
+    return str(method).upper() == 'GET' or ':batchGet' in str(endpoint)
+
+
+def espera_tentativa(tentativa, inicial=1.0, maxima=32.0, aleatorio=random.random):
+    """Espera antes da tentativa seguinte: uniforme entre metade e o total de inicial·2^tentativa (até `maxima`)."""
+    teto = min(maxima, inicial * 2 ** tentativa)
+    return teto * (0.5 + aleatorio() / 2)
+
+
+def _retry_after(erro):
+    try:
+        return float(erro.response.headers.get('Retry-After'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def proteger_cliente(cliente, balde, max_tentativas=5, espera_inicial=1.0, espera_maxima=32.0, dormir=time.sleep):
+    """Faz cada requisição HTTP do cliente gspread passar pelo balde e repetir 429 (e 5xx nas leituras).
+
+    Aplicar depois de medicao.instrumentar_cliente, para cada tentativa
+    contar como uma chamada. Clientes sem `request` (falsos) ficam como estão.
+    """
+    alvo = getattr(cliente, 'http_client', None) or cliente
+    original = getattr(alvo, 'request', None)
+    if original is None or getattr(original, 'protegido', False):
+        return cliente
+
+    def request(method, endpoint, *args, **kwargs):
+        repetir = REPETIR_LEITURA if leitura(method, endpoint) else REPETIR
+        for tentativa in range(max_tentativas):
+            balde.retirar()
+            try:
+                return original(method, endpoint, *args, **kwargs)
+            except Exception as e:
+                status = status_http(e)
+                if status not in repetir or tentativa == max_tentativas - 1:
+                    raise
+                espera = _retry_after(e) or espera_tentativa(tentativa, espera_inicial, espera_maxima)
+                medicao.registrar_log('cota', logging.WARNING, recurso=medicao.recurso_api(method, endpoint),
+                                      status=status, tentativa=tentativa + 1, espera_s=round(espera, 2))
+                if status == 429:
+                    balde.pausar(espera)  # a próxima retirada (desta e das outras threads) espera
+                else:
+                    dormir(espera)
+
+    request.protegido = True
+    alvo.request = request
+    return cliente
@@ -0,0 +1,83 @@
+"""Contagem de mensagens por autor e semana ISO a partir de exportações do Discord.
+
+Aceita o JSON do DiscordChatExporter (objeto com "messages": [...], ou uma
+lista de mensagens) e NDJSON (uma mensagem por linha). As mensagens são
+lidas uma a uma (nucleo.fluxo) e a contagem sai numa única passada.
+"""
+from collections import Counter
+from datetime import date
+from functools import lru_cache
+
+import pandas as pd
+
+from nucleo import fluxo
+from nucleo.lote import COLUNAS_LOTE
+
+# Tipos de mensagem que contam como participação (nomes do exporter e códigos da API)
+TIPOS_CONTADOS = {'Default', 'Reply', 0, 19}
+
+
+def ler_mensagens(arquivo, nome_arquivo=''):
+    """Gerador das mensagens (dicts) do arquivo; .ndjson/.jsonl = uma por linha, senão JSON."""
+    return fluxo.ler_registros(arquivo, nome_arquivo, chave_lista='messages')
+
+
+@lru_cache(maxsize=4096)
+def _semana_do_dia(dia):
+    return tuple(date.fromisoformat(dia).isocalendar()[:2])
+
+
+def semana_iso(timestamp):
+    """(ano, semana) ISO da data do timestamp, no fuso em que foi exportado."""
+    return _semana_do_dia(str(timestamp)[:10])
+
+
+def autor_da_mensagem(mensagem, ignorar_bots=True):
+    """ID do autor (str) ou None se a mensagem não conta (bot, mensagem de sistema)."""
+    if mensagem.get('type', 'Default') not in TIPOS_CONTADOS:
+        return None
+    autor = mensagem.get('author')
+    if isinstance(autor, dict):
+        if ignorar_bots and (autor.get('isBot') or autor.get('bot')):
+            return None
+        autor = autor.get('id')
+    else:
+        autor = mensagem.get('author_id', autor)
+    return None if autor in (None, '') else str(autor)
+
+
+def contar_mensagens(mensagens, ignorar_bots=True, contagens=None):
+    """{(ano, semana): Counter(user_id -> mensagens)} numa passada pelo gerador.
+
+    Passe o resultado anterior em `contagens` para somar vários arquivos (um por canal).
+    """
+    contagens = {} if contagens is None else contagens
+    for mensagem in mensagens:
+        autor = autor_da_mensagem(mensagem, ignorar_bots)
+        timestamp = mensagem.get('timestamp')
+        if autor is None or not timestamp:
+            continue
+        semana = semana_iso(timestamp)
+        por_autor = contagens.get(semana)
+        if por_autor is None:
+            por_autor = contagens[semana] = Counter()
+        por_autor[autor] += 1
+    return contagens
+
+
+def lote_da_semana(contagens, semana, user_ids=None):
+    """Lote no formato de lote.ler_lote para processar_lote (membros casados pelo user_id).
+
+    Com `user_ids` (IDs da tabela de membros), quem não aparece na exportação
+    entra com 0 mensagens, para a semana de todos ser avaliada.
+    """
+    por_autor = Counter(contagens.get(tuple(semana), {}))
+    for user_id in (user_ids if user_ids is not None else []):
+        por_autor.setdefault(str(user_id), 0)
+    lote = pd.DataFrame({'user_id': list(por_autor.keys()), 'mensagens': list(por_autor.values())},
+                        columns=['user_id', 'mensagens'])
+    lote = lote.reindex(columns=COLUNAS_LOTE)
+    lote['usuario'] = ''
+    lote['mensagens'] = lote['mensagens'].astype(float)
+    lote['bonus'] = 0.0
+    return lote
@@ -0,0 +1,302 @@
+"""Fila de gravação em segundo plano (write-behind) com coalescência por membro.
+
+As telas só enfileiram a alteração e seguem; uma thread junta as edições que
+chegam dentro de `janela` segundos (várias edições do mesmo membro viram uma
+só) e grava o lote inteiro no backend com Armazenamento.aplicar_operacoes,
+tentando de novo com espera exponencial em caso de falha. Um lote que
+continua falhando não é descartado: volta para a frente da fila e é
+retentado com espera crescente (até `espera_maxima`) até o backend voltar.
+
+Cada operação leva os valores da linha na carga; o backend só aplica a
+alteração se o carimbo de versão da linha não mudou desde então. Se mudou
+(outra sessão gravou antes), a operação fica com status CONFLITO e a
+interface pede para refazer sobre os dados recarregados, em vez de a
+alteração de um dos dois se perder.
+"""
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from nucleo import medicao
+
+PENDENTE = 'pendente'
+GRAVANDO = 'gravando'
+GRAVADO = 'gravado'
+ERRO = 'erro'
+CONFLITO = 'conflito'
+
+
+class Operacao:
+    """acao: 'anexar', 'atualizar' ou 'remover'.
+
+    chave: 'usuario' da linha no backend (para 'anexar', o próprio nome novo).
+    registro: dict com os valores tipados (para sobrepor ao df em memória).
+    valores: lista de strings na ordem das colunas (o que vai para o backend).
+    anteriores: valores antigos da linha, quando conhecidos (permite gravar só as células
+        alteradas e conferir o carimbo de versão antes de gravar).
+    """
+    __slots__ = ('acao', 'chave', 'registro', 'valores', 'anteriores')
+
+    def __init__(self, acao, chave, registro=None, valores=None, anteriores=None):
+        self.acao = acao
+        self.chave = str(chave)
+        self.registro = registro
+        self.valores = valores
+        self.anteriores = anteriores
+
+    def __repr__(self):
+        return f'Operacao({self.acao!r}, {self.chave!r})'
+
+
+def coalescer(anterior, nova, nome_final):
+    """Junta duas operações seguidas do mesmo membro; None = nada a gravar."""
+    if nova.acao == 'remover':
+        if anterior.acao == 'anexar':
+            return None  # criado e apagado antes de chegar ao backend
+        return Operacao('remover', anterior.chave, anteriores=anterior.anteriores)
+    if anterior.acao == 'anexar':
+        return Operacao('anexar', nome_final, nova.registro, nova.valores)
+    # atualizar/remover seguido de atualizar/anexar: a linha original recebe os valores novos
+    return Operacao('atualizar', anterior.chave, nova.registro, nova.valores, anterior.anteriores)
+
+
+class FilaEscrita:
+
+    def __init__(self, gravar, ao_gravar=None, col_chave='usuario', janela=1.0,
+                 max_tentativas=5, espera_inicial=1.0, espera_maxima=300.0, retencao=3600.0):
+        """gravar(lista de Operacao) grava no backend; ao_gravar() roda depois de cada lote
+        (ex.: incrementar a versão da aba para as sessões recarregarem).
+
+        max_tentativas seguidas por lote; esgotadas, o lote volta para a fila e a
+        próxima rodada espera espera_inicial·2^falhas segundos (até espera_maxima).
+        O resultado de cada alteração (status) fica guardado por `retencao` segundos."""
+        self.gravar = gravar
+        self.ao_gravar = ao_gravar
+        self.col_chave = col_chave
+        self.janela = janela
+        self.max_tentativas = max_tentativas
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.retencao = retencao
+        self.geracao = 0
+        self._falhas = 0  # rodadas seguidas que falharam
+        self._falha = None  # (desde, erro, próxima tentativa) enquanto estiver falhando
+        self._retomar = 0.0  # time.monotonic() da próxima rodada depois de uma falha
+        self._pendentes = OrderedDict()  # nome atual do membro -> Operacao
+        self._em_gravacao = []
+        self._lote_descartado = False  # descartar() durante a gravação: se falhar, o lote não volta
+        self._status = {}
+        self._cond = threading.Condition()
+        self._thread = None
+
+    # --- lado da interface ---
+
+    def enfileirar(self, acao, chave, registro=None, valores=None, anteriores=None):
+        nova = Operacao(acao, chave, registro, valores, anteriores)
+        nome_final = self._nome_final(nova)
+        with self._cond:
+            anterior = self._pendentes.pop(nova.chave, None)
+            op = nova if anterior is None else coalescer(anterior, nova, nome_final)
+            if op is not None:
+                self._pendentes[nome_final] = op
+            self._status.pop(nova.chave, None)
+            self._status[nome_final] = (PENDENTE, time.time(), '')
+            self.geracao += 1
+            self._iniciar()
+            self._cond.notify_all()
+        return nome_final
+
+    def pendentes(self):
+        with self._cond:
+            return len(self._pendentes) + len(self._em_gravacao)
+
+    def status(self, chave):
+        """(estado, instante, detalhe) da última alteração do membro, ou None."""
+        with self._cond:
+            return self._status.get(str(chave))
+
+    def falha(self):
+        """(desde, erro, próxima tentativa), em time.time(), enquanto as gravações estiverem
+        falhando (as alterações continuam na fila); None se a última rodada gravou."""
+        with self._cond:
+            return self._falha
+
+    def conflitos(self, recentes=300.0):
+        """Membros cuja última alteração foi recusada por conflito nos últimos `recentes` segundos."""
+        limite = time.time() - recentes
+        with self._cond:
+            return [nome for nome, (estado, instante, _) in self._status.items()
+                    if estado == CONFLITO and instante >= limite]
+
+    def aguardar(self, timeout=30.0):
+        """Bloqueia até a fila esvaziar (reset da tabela, scripts). True se esvaziou."""
+        limite = time.monotonic() + timeout
+        with self._cond:
+            while self._pendentes or self._em_gravacao:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return False
+                self._cond.wait(restante)
+            return True
+
+    def descartar(self):
+        """Esquece o que ainda não foi gravado (antes de zerar a tabela).
+
+        O lote já em gravação termina, mas se falhar não volta para a fila nem é
+        tentado de novo; depois disto, aguardar() só espera por ele.
+        """
+        with self._cond:
+            for nome in self._pendentes:
+                self._status.pop(nome, None)
+            self._pendentes.clear()
+            self._lote_descartado = bool(self._em_gravacao)
+            self._falhas, self._falha, self._retomar = 0, None, 0.0
+            self.geracao += 1
+
+    def operacoes(self):
+        """Operações ainda não gravadas (em gravação e pendentes), na ordem em que valem."""
+        with self._cond:
+            return list(self._em_gravacao) + list(self._pendentes.values())
+
+    def sobrepor(self, df, colunas, tipar=None):
+        """df com as alterações ainda não gravadas aplicadas (leitura das próprias escritas).
+
+        Idempotente: se a gravação já chegou ao df, reaplicar não muda nada.
+        tipar(registro) converte o registro para os tipos das colunas de df.
+        """
+        ops = self.operacoes()
+        if not ops:
+            return df
+        df = df.copy()
+        posicoes = dict(zip(reversed(df[self.col_chave].astype(str).tolist()), reversed(df.index.tolist())))
+        novas = []
+        for op in ops:
+            registro = tipar(op.registro) if tipar is not None and op.registro is not None else op.registro
+            pos = posicoes.get(op.chave)
+            if pos is None and registro is not None:
+                pos = posicoes.get(str(registro[self.col_chave]))
+            if op.acao == 'remover':
+                if pos is not None:
+                    df = df.drop(index=pos)
+                    posicoes.pop(op.chave, None)
+            elif pos is not None:
+                df.loc[pos, colunas] = [registro[c] for c in colunas]
+                posicoes[str(registro[self.col_chave])] = pos
+            else:
+                novas.append({c: registro[c] for c in colunas})
+        if novas:
+            inicio = int(df.index.max()) + 1 if len(df) else 0
+            df = pd.concat([df, pd.DataFrame(novas, columns=colunas, index=range(inicio, inicio + len(novas)))])
+        return df
+
+    # --- lado da thread ---
+
+    def _iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._trabalhar, name='fila-escrita', daemon=True)
+            self._thread.start()
+
+    def _trabalhar(self):
+        while True:
+            with self._cond:
+                while True:
+                    # Depois de uma falha, espera o fim do recuo mesmo com edições novas chegando
+                    espera = self._retomar - time.monotonic()
+                    if self._pendentes and espera <= 0:
+                        break
+                    self._cond.wait(espera if self._pendentes else None)
+            time.sleep(self.janela)  # janela de coalescência
+            with self._cond:
+                nomes = list(self._pendentes)
+                self._em_gravacao = list(self._pendentes.values())
+                self._lote_descartado = False
+                self._pendentes.clear()
+                for nome in nomes:
+                    self._status[nome] = (GRAVANDO, time.time(), '')
+            with medicao.fase('fila.gravar', operacoes=len(self._em_gravacao)):
+                erro, rejeitadas = self._gravar_com_tentativas(self._em_gravacao)
+            if self.ao_gravar is not None:
+                try:
+                    self.ao_gravar()
+                except Exception as e:
+                    medicao.registrar_log('fila.ao_gravar', logging.ERROR, erro=repr(e))
+            with self._cond:
+                if erro is not None and self._lote_descartado:
+                    # Descartado durante a gravação: a rodada termina sem devolver o lote
+                    medicao.registrar_log('fila.descartado', logging.INFO, operacoes=len(self._em_gravacao), erro=str(erro))
+                    for nome in nomes:
+                        if self._status.get(nome, (None,))[0] == GRAVANDO:
+                            del self._status[nome]
+                elif erro is not None:
+                    self._devolver(self._em_gravacao, erro)
+                    self._em_gravacao = []
+                    self.geracao += 1
+                    self._cond.notify_all()
+                    continue
+                self._falhas, self._falha = 0, None
+                for nome in nomes:
+                    if self._status.get(nome, (None,))[0] == GRAVANDO:
+                        self._status[nome] = (GRAVADO, time.time(), '')
+                for op, motivo in rejeitadas:
+                    nome = self._nome_final(op)
+                    if self._status.get(nome, (None,))[0] != GRAVADO:
+                        continue
+                    if motivo == CONFLITO:
+                        self._status[nome] = (CONFLITO, time.time(), 'alterado por outra sessão antes desta gravação')
+                    else:
+                        self._status[nome] = (ERRO, time.time(), 'membro não encontrado no backend')
+                self._podar(time.time() - self.retencao)
+                self._em_gravacao = []
+                self.geracao += 1
+                self._cond.notify_all()
+
+    def _podar(self, limite):
+        # Sem isto _status cresceria com cada membro já editado (no histórico, um por membro e semana)
+        for nome in [n for n, (estado, instante, _) in self._status.items()
+                     if estado not in (PENDENTE, GRAVANDO) and instante < limite and n not in self._pendentes]:
+            del self._status[nome]
+
+    def _devolver(self, ops, erro):
+        """Põe o lote que falhou de volta na frente da fila e adia a próxima rodada (chamar com _cond).
+
+        Uma edição do mesmo membro que chegou durante a gravação é coalescida
+        com a operação devolvida, como se as duas tivessem ficado na fila.
+        """
+        self._falhas += 1
+        espera = min(self.espera_maxima, self.espera_inicial * 2 ** self._falhas) * (0.5 + random.random() / 2)
+        agora = time.time()
+        self._retomar = time.monotonic() + espera
+        self._falha = (self._falha[0] if self._falha else agora, str(erro), agora + espera)
+        devolvidas = OrderedDict()
+        for op in ops:
+            nome = self._nome_final(op)
+            seguinte = next((k for k, p in self._pendentes.items() if p.chave == nome), None)
+            if seguinte is not None:
+                op, nome = coalescer(op, self._pendentes.pop(seguinte), seguinte), seguinte
+            else:
+                self._status[nome] = (ERRO, agora, f'{erro}; nova tentativa em {espera:.0f} s')
+            if op is not None:
+                devolvidas[nome] = op
+        devolvidas.update(self._pendentes)
+        self._pendentes = devolvidas
+        medicao.registrar_log('fila.falha', logging.WARNING, operacoes=len(ops), falhas=self._falhas,
+                              espera_s=round(espera, 1), erro=str(erro))
+
+    def _nome_final(self, op):
+        return str(op.registro[self.col_chave]) if op.registro is not None else op.chave
+
+    def _gravar_com_tentativas(self, ops):
+        """(erro final ou None, [(operação, motivo)] que o backend recusou)."""
+        espera = self.espera_inicial
+        for tentativa in range(self.max_tentativas):
+            try:
+                return None, list(self.gravar(ops) or [])
+            except Exception as e:
+                if tentativa == self.max_tentativas - 1 or self._lote_descartado:
+                    return e, []
+                time.sleep(espera * (1 + random.random()))
+                espera *= 2
@@ -0,0 +1,118 @@
+"""Leitura em fluxo de arquivos JSON/NDJSON grandes (exportações e logs do Discord).
+
+Os registros saem um a um por um gerador, lidos em blocos de tamanho fixo:
+a memória usada depende do maior registro, não do tamanho do arquivo.
+"""
+import io
+import json
+import re
+
+TAMANHO_BLOCO = 1 << 20  # 1 MiB por leitura
+
+_DECODER = json.JSONDecoder()
+_ESPACOS = re.compile(r'[ \t\r\n]*')
+
+
+def _texto(arquivo):
+    """Arquivos abertos em modo binário (ex.: UploadedFile do Streamlit) viram texto UTF-8."""
+    if isinstance(arquivo.read(0), bytes):
+        return io.TextIOWrapper(arquivo, encoding='utf-8-sig')
+    return arquivo
+
+
+class _Leitor:
+    """Buffer deslizante sobre o arquivo: decodifica um valor JSON por vez."""
+
+    def __init__(self, texto):
+        self.texto = texto
+        self.buf = ''
+        self.pos = 0
+        self.fim = False
+
+    def _ler(self):
+        bloco = self.texto.read(TAMANHO_BLOCO)
+        if not bloco:
+            self.fim = True
+            return False
+        self.buf = self.buf[self.pos:] + bloco
+        self.pos = 0
+        return True
+
+    def proximo(self):
+        """Próximo caractere significativo, sem consumir ('' no fim do arquivo)."""
+        while True:
+            self.pos = _ESPACOS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._ler():
+                return ''
+
+    def consumir(self, esperado):
+        achado = self.proximo()
+        if achado != esperado:
+            raise ValueError(f"JSON inválido: esperado {esperado!r}, encontrado {achado!r}")
+        self.pos += 1
+
+    def valor(self):
+        self.proximo()
+        while True:
+            try:
+                obj, fim = _DECODER.raw_decode(self.buf, self.pos)
+                # Valor colado no fim do buffer pode estar cortado (ex.: número): lê mais
+                if fim < len(self.buf) or self.fim:
+                    self.pos = fim
+                    return obj
+            except json.JSONDecodeError:
+                if self.fim:
+                    raise
+            self._ler()
+
+    def itens(self):
+        self.consumir('[')
+        if self.proximo() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.valor()
+            separador = self.proximo()
+            self.pos += 1
+            if separador == ']':
+                return
+            if separador != ',':
+                raise ValueError(f"JSON inválido: esperado ',' ou ']', encontrado {separador!r}")
+
+
+def _registros_json(texto, chave_lista):
+    leitor = _Leitor(texto)
+    if leitor.proximo() == '[':
+        yield from leitor.itens()
+        return
+    leitor.consumir('{')
+    while leitor.proximo() not in ('}', ''):
+        chave = leitor.valor()
+        leitor.consumir(':')
+        if chave == chave_lista:
+            yield from leitor.itens()
+        else:
+            leitor.valor()  # metadados (guild, channel...): pequenos, descartados
+        if leitor.proximo() == ',':
+            leitor.pos += 1
+
+
+def _registros_ndjson(texto):
+    for linha in texto:
+        linha = linha.strip()
+        if linha:
+            yield json.loads(linha)
+
+
+def ler_registros(arquivo, nome_arquivo='', chave_lista='messages'):
+    """Gerador dos registros (dicts) do arquivo.
+
+    .ndjson/.jsonl = um registro por linha; senão JSON com uma lista no topo
+    ou um objeto cuja chave `chave_lista` guarda a lista.
+    """
+    texto = _texto(arquivo)
+    if str(nome_arquivo).lower().endswith(('.ndjson', '.jsonl')):
+        return _registros_ndjson(texto)
+    return _registros_json(texto, chave_lista)
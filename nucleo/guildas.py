@@ -0,0 +1,77 @@
+"""Guildas (servidores do Discord) atendidas pelo mesmo processo.
+
+Cada guilda tem a sua planilha (ou o seu arquivo SQLite) e, se quiser, os
+seus nomes de aba; a conta de serviço do Google, o cliente autorizado e a
+cota de requisições são um só para todas. No secrets.toml:
+
+    [armazenamento]            # padrões de todas as guildas
+    limite_memoria_mb = 512    # retratos em memória (todas as guildas juntas)
+
+    [guildas.servidor_a]
+    nome = "Servidor A"
+    spreadsheet_url = "https://docs.google.com/spreadsheets/d/..."
+
+    [guildas.servidor_b]
+    nome = "Servidor B"
+    spreadsheet_url = "https://docs.google.com/spreadsheets/d/..."
+    aba_ups = "Ups"            # opcionais: aba_ups, aba_call
+    janela_gravacao = 2.0      # qualquer chave de [armazenamento] vale só para esta guilda
+
+Sem [guildas] há uma guilda só, "principal", com [gsheets_config] e
+[armazenamento], como antes. No SQLite, guildas sem sqlite_path próprio
+ganham um arquivo cada (sistema_ups_<guilda>.db).
+"""
+import os
+
+PADRAO = 'principal'
+SQLITE_PADRAO = 'sistema_ups.db'
+
+
+class Guilda:
+    """Configuração de uma guilda: planilha, abas e [armazenamento] já combinados."""
+    __slots__ = ('id', 'nome', 'spreadsheet_url', 'config', 'abas')
+
+    def __init__(self, id_guilda, nome, spreadsheet_url=None, config=None, abas=None):
+        self.id = str(id_guilda)
+        self.nome = str(nome)
+        self.spreadsheet_url = spreadsheet_url
+        self.config = dict(config or {})
+        self.abas = dict(abas or {})
+
+    def aba(self, sistema):
+        """Nome da aba do sistema (motor.UPS / motor.CALL) nesta guilda."""
+        return self.abas.get(sistema.nome, sistema.aba)
+
+    def chave(self, aba):
+        """Nome único da aba no processo (versões, retratos, classificação)."""
+        return f'{self.id}/{aba}'
+
+    def __repr__(self):
+        return f'Guilda({self.id!r}, nome={self.nome!r})'
+
+
+def ler_guildas(secrets):
+    """{id: Guilda} na ordem do secrets.toml (ou só a "principal", sem [guildas])."""
+    base = dict(secrets.get('armazenamento', {}) or {})
+    secao = secrets.get('guildas', {}) or {}
+    if not secao:
+        url = dict(secrets.get('gsheets_config', {}) or {}).get('spreadsheet_url')
+        return {PADRAO: Guilda(PADRAO, 'Principal', url, base)}
+
+    guildas = {}
+    for id_guilda, dados in secao.items():
+        dados = dict(dados)
+        config = dict(base)
+        config.update({k: v for k, v in dados.items() if k not in ('nome', 'spreadsheet_url') and not k.startswith('aba_')})
+        if 'sqlite_path' not in dados:
+            # Mesmas tabelas em todas as guildas: cada uma no seu arquivo
+            raiz, extensao = os.path.splitext(base.get('sqlite_path', SQLITE_PADRAO))
+            config['sqlite_path'] = f'{raiz}_{id_guilda}{extensao or ".db"}'
+        abas = {k[len('aba_'):]: v for k, v in dados.items() if k.startswith('aba_')}
+        guildas[str(id_guilda)] = Guilda(id_guilda, dados.get('nome', id_guilda), dados.get('spreadsheet_url'), config, abas)
+    return guildas
+
+
+def escolher(guildas, pedida=None):
+    """A guilda `pedida` (id, p. ex. o ?guilda= da URL) ou, se não existir, a primeira."""
+    return guildas.get(str(pedida)) if pedida is not None and str(pedida) in guildas else next(iter(guildas.values()))
@@ -0,0 +1,268 @@
+"""Histórico semanal só de acréscimo: uma linha por membro e semana processada.
+
+Processar a semana sobrescreve a linha do membro na tabela principal; aqui
+fica o que ele fez em cada semana (cargo antes e depois, situação, pontos ou
+horas da semana e o total). Linhas só são acrescentadas, em lote (um
+append_rows na planilha, um executemany no SQLite); reprocessar uma semana
+acrescenta outra linha e as consultas ficam com a mais recente.
+
+Consultas por membro (user_id, ou o nome quando não há ID) e por semana vão
+por índice: no SQLite, índices da tabela; na planilha, um índice em memória
+montado na primeira leitura e estendido a cada acréscimo (os nossos direto,
+os de outros processos lendo só as linhas depois das que já estão nele).
+"""
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from nucleo.indice import SEM_ID
+
+COLUNAS_HISTORICO = ['semana', 'data', 'usuario', 'user_id', 'cargo_anterior', 'cargo', 'situação', 'valor', 'total']
+NUMERICAS_HISTORICO = ['valor', 'total']
+
+# Bytes por linha do índice em memória (células em texto e posições), medidos com tracemalloc
+BYTES_POR_LINHA = 850
+
+
+def chave_semana(semana):
+    """'2026-42' para a semana ISO (ano, número); ordena certo como texto."""
+    ano, numero = semana
+    return f"{int(ano)}-{int(numero):02d}"
+
+
+def semana_da_data(data, formato='%Y-%m-%d %H:%M:%S'):
+    """Semana ISO (ano, número) de uma data (datetime ou texto no formato do carimbo)."""
+    if not isinstance(data, datetime):
+        data = datetime.strptime(str(data), formato)
+    return tuple(data.isocalendar()[:2])
+
+
+def semana_fechada(data, dias_fechamento=0, formato='%Y-%m-%d %H:%M:%S'):
+    """Semana ISO que um processamento feito em `data` fecha.
+
+    Por padrão, a da própria data. Com dias_fechamento = N, processar nos N
+    primeiros dias de uma semana ainda fecha a anterior (3: de segunda a
+    quarta vale a semana passada).
+    """
+    if not isinstance(data, datetime):
+        data = datetime.strptime(str(data), formato)
+    return semana_da_data(data - timedelta(days=dias_fechamento))
+
+
+def tabela(linhas):
+    """DataFrame das linhas (listas de texto) com valor e total numéricos."""
+    df = pd.DataFrame([list(l) for l in linhas], columns=COLUNAS_HISTORICO)
+    for col in NUMERICAS_HISTORICO:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0)
+    return df
+
+
+def _ultima_por(df, colunas):
+    # Semana reprocessada: vale a linha acrescentada por último
+    return df.drop_duplicates(colunas, keep='last')
+
+
+class Historico:
+    """Interface comum: anexar linhas (listas de texto em COLUNAS_HISTORICO) e consultar."""
+
+    def anexar(self, linhas):
+        raise NotImplementedError
+
+    def aplicar_operacoes(self, operacoes):
+        """Para usar com nucleo.fila.FilaEscrita: todas as 'anexar' do lote num acréscimo só."""
+        linhas = [op.valores for op in operacoes if op.acao == 'anexar']
+        if linhas:
+            self.anexar(linhas)
+        return []
+
+    def sincronizar(self, intervalo=None):
+        """Traz o que outros processos acrescentaram desde a última consulta (no máximo a cada `intervalo` s)."""
+
+    def memoria(self):
+        """Bytes que o histórico ocupa na memória do processo."""
+        return 0
+
+    def liberar(self):
+        """Solta o que estiver em memória; a próxima consulta lê de novo."""
+
+    def _linhas_membro(self, user_id, usuario):
+        raise NotImplementedError
+
+    def _linhas_semana(self, semana):
+        raise NotImplementedError
+
+    def semanas(self):
+        raise NotImplementedError
+
+    def trajetoria(self, user_id=None, usuario=None):
+        """Semanas do membro, da mais antiga para a mais recente (pelo user_id; sem ID, pelo nome)."""
+        user_id = None if user_id is None or str(user_id) in SEM_ID else str(user_id)
+        df = tabela(self._linhas_membro(user_id, None if user_id else usuario))
+        return _ultima_por(df, ['semana']).sort_values('semana', kind='stable').reset_index(drop=True)
+
+    def da_semana(self, semana):
+        """Resultado de todos os membros numa semana ('AAAA-SS' ou (ano, número))."""
+        semana = semana if isinstance(semana, str) else chave_semana(semana)
+        df = tabela(self._linhas_semana(semana))
+        membro = df['user_id'].where(~df['user_id'].isin(SEM_ID), 'nome:' + df['usuario'])
+        return df[~membro.duplicated(keep='last')].reset_index(drop=True)
+
+
+class IndiceHistorico:
+    """Linhas do histórico em memória com as posições por user_id, nome e semana."""
+
+    def __init__(self, linhas=()):
+        self.linhas = []
+        self.por_id = defaultdict(list)
+        self.por_nome = defaultdict(list)
+        self.por_semana = defaultdict(list)
+        self.acrescentar(linhas)
+
+    def acrescentar(self, linhas):
+        i_semana, i_usuario, i_id = (COLUNAS_HISTORICO.index(c) for c in ('semana', 'usuario', 'user_id'))
+        for linha in linhas:
+            linha = [str(v) for v in linha] + [''] * (len(COLUNAS_HISTORICO) - len(linha))
+            pos = len(self.linhas)
+            self.linhas.append(linha)
+            self.por_semana[linha[i_semana]].append(pos)
+            self.por_nome[linha[i_usuario]].append(pos)
+            if linha[i_id] not in SEM_ID:
+                self.por_id[linha[i_id]].append(pos)
+
+    def selecionar(self, posicoes):
+        return [self.linhas[p] for p in posicoes]
+
+
+def _linha_inicial(resposta):
+    """Primeira linha gravada por um append_rows ('updatedRange' da resposta), ou None se não vier."""
+    try:
+        achado = re.search(r'!\$?[A-Z]+\$?(\d+)', resposta['updates']['updatedRange'])
+    except (KeyError, TypeError):
+        return None
+    return int(achado.group(1)) if achado else None
+
+
+class HistoricoSheets(Historico):
+    """Aba da planilha (criada com o cabeçalho se não existir), acessada pelo planilha.CacheWorksheets.
+
+    A aba só cresce no fim, então o índice em memória se mantém com um
+    contador de linhas: sincronizar lê da linha seguinte à última conhecida em
+    diante (nada, se ninguém mais acrescentou), em vez de baixar a aba toda.
+    Linhas apagadas ou editadas à mão só aparecem depois de reiniciar o processo.
+    """
+
+    # Segundos mínimos entre duas consultas por linhas de outros processos
+    intervalo_sonda = 30.0
+
+    def __init__(self, worksheets, nome_aba, relogio=time.monotonic):
+        self.worksheets = worksheets
+        self.nome_aba = nome_aba
+        self.relogio = relogio
+        self._indice = None
+        self._sondado = None
+        self._lock = threading.Lock()
+
+    def _executar(self, operacao):
+        self.worksheets.garantir(self.nome_aba, COLUNAS_HISTORICO)
+        return self.worksheets.executar(self.nome_aba, operacao)
+
+    def _carregado(self):
+        with self._lock:
+            if self._indice is None:
+                valores = self._executar(lambda ws: ws.get_all_values())
+                self._indice = IndiceHistorico(valores[1:])
+                self._sondado = self.relogio()
+            return self._indice
+
+    def sincronizar(self, intervalo=None):
+        intervalo = self.intervalo_sonda if intervalo is None else intervalo
+        with self._lock:
+            # Sem índice não há o que atualizar: a primeira consulta lê a aba inteira
+            if self._indice is None or (self._sondado is not None and self.relogio() - self._sondado < intervalo):
+                return
+            self._sondado = self.relogio()
+            # Linha 1 = cabeçalho; as conhecidas ocupam as linhas 2 .. len + 1
+            faixa = f'A{len(self._indice.linhas) + 2}:{chr(ord("A") + len(COLUNAS_HISTORICO) - 1)}'
+            novas = self._executar(lambda ws: ws.batch_get([faixa]))[0]
+            self._indice.acrescentar(novas)
+
+    def anexar(self, linhas):
+        linhas = [[str(v) for v in l] for l in linhas]
+        resposta = self._executar(lambda ws: ws.append_rows(linhas, table_range='A1'))
+        with self._lock:
+            if self._indice is None:
+                return
+            inicio = _linha_inicial(resposta)
+            if inicio is not None and inicio != len(self._indice.linhas) + 2:
+                # Outro processo acrescentou antes de nós: o contador não vale mais, relê na próxima consulta
+                self._indice = None
+            else:
+                self._indice.acrescentar(linhas)
+
+    def memoria(self):
+        indice = self._indice
+        return 0 if indice is None else len(indice.linhas) * BYTES_POR_LINHA
+
+    def liberar(self):
+        with self._lock:
+            self._indice = None
+
+    def _linhas_membro(self, user_id, usuario):
+        indice = self._carregado()
+        return indice.selecionar(indice.por_id.get(user_id, []) if user_id else indice.por_nome.get(str(usuario), []))
+
+    def _linhas_semana(self, semana):
+        indice = self._carregado()
+        return indice.selecionar(indice.por_semana.get(semana, []))
+
+    def semanas(self):
+        return sorted(self._carregado().por_semana)
+
+
+class HistoricoSQLite(Historico):
+    """Tabela SQLite com índices em (user_id, semana), (usuario, semana) e semana; rowid = ordem de acréscimo."""
+
+    def __init__(self, caminho, tabela_sql):
+        self.tabela = tabela_sql
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(caminho, check_same_thread=False)
+        tipos = {c: ('REAL' if c in NUMERICAS_HISTORICO else 'TEXT') for c in COLUNAS_HISTORICO}
+        definicao = ', '.join(f'{self._q(c)} {tipos[c]}' for c in COLUNAS_HISTORICO)
+        with self._lock, self._con:
+            self._con.execute(f'CREATE TABLE IF NOT EXISTS {self._q(tabela_sql)} ({definicao})')
+            for nome, cols in (('id', ('user_id', 'semana')), ('nome', ('usuario', 'semana')), ('semana', ('semana',))):
+                self._con.execute(f'CREATE INDEX IF NOT EXISTS {self._q(f"idx_{tabela_sql}_{nome}")} '
+                                  f'ON {self._q(tabela_sql)} ({", ".join(self._q(c) for c in cols)})')
+
+    @staticmethod
+    def _q(nome):
+        return '"' + str(nome).replace('"', '""') + '"'
+
+    def _consultar(self, onde, parametros):
+        cols = ', '.join(self._q(c) for c in COLUNAS_HISTORICO)
+        with self._lock:
+            return self._con.execute(f'SELECT {cols} FROM {self._q(self.tabela)} WHERE {onde} ORDER BY rowid',
+                                     parametros).fetchall()
+
+    def anexar(self, linhas):
+        sql = (f'INSERT INTO {self._q(self.tabela)} ({", ".join(self._q(c) for c in COLUNAS_HISTORICO)}) '
+               f'VALUES ({", ".join("?" * len(COLUNAS_HISTORICO))})')
+        with self._lock, self._con:
+            self._con.executemany(sql, [list(l) for l in linhas])
+
+    def _linhas_membro(self, user_id, usuario):
+        if user_id:
+            return self._consultar(f'{self._q("user_id")} = ?', (user_id,))
+        return self._consultar(f'{self._q("usuario")} = ?', (str(usuario),))
+
+    def _linhas_semana(self, semana):
+        return self._consultar(f'{self._q("semana")} = ?', (semana,))
+
+    def semanas(self):
+        with self._lock:
+            return [s for (s,) in self._con.execute(f'SELECT DISTINCT {self._q("semana")} FROM {self._q(self.tabela)} ORDER BY 1')]
@@ -0,0 +1,64 @@
+"""Índice de membros por nome e por user_id (dicionários nome/ID -> posição no df).
+
+Montado uma vez por carga da tabela e reaproveitado em todas as buscas da
+execução: checagem de duplicados, renomear, remover, seleção do membro.
+"""
+from nucleo.busca import IndiceBusca
+
+# Valores de user_id que significam "sem ID" (não entram no índice)
+SEM_ID = {'', 'N/A', 'nan', 'None', '<NA>'}
+
+# Bytes por membro medidos com tracemalloc (100 mil membros): dicionários e lista de nomes; o IndiceBusca por cima
+BYTES_POR_MEMBRO = 260
+BYTES_POR_MEMBRO_BUSCA = 150
+
+
+class IndiceMembros:
+
+    def __init__(self, df, col_usuario='usuario', col_user_id='user_id'):
+        self.col_usuario = col_usuario
+        self.col_user_id = col_user_id
+        posicoes = df.index.tolist()
+        nomes = df[col_usuario].astype(str).tolist()
+        ids = df[col_user_id].astype(str).tolist() if col_user_id in df.columns else []
+        # Em nomes/IDs repetidos vale a primeira linha, como no filtro .index[0] antigo
+        self.por_nome = dict(zip(reversed(nomes), reversed(posicoes)))
+        self.por_id = {i: p for i, p in zip(reversed(ids), reversed(posicoes)) if i not in SEM_ID}
+        self.nomes = sorted(self.por_nome)
+        self._ids_nomes = (ids, nomes)
+        self._busca = None
+
+    def __len__(self):
+        return len(self.por_nome)
+
+    def memoria(self):
+        """Bytes estimados do índice (com o de busca, que é montado no primeiro uso, já contado)."""
+        return len(self) * (BYTES_POR_MEMBRO + BYTES_POR_MEMBRO_BUSCA)
+
+    @property
+    def busca(self):
+        """IndiceBusca dos nomes e IDs (prefixo e aproximada), montado no primeiro uso."""
+        if self._busca is None:
+            ids, nomes = self._ids_nomes
+            self._busca = IndiceBusca(self.nomes, ((i, n) for i, n in zip(ids, nomes) if i not in SEM_ID))
+        return self._busca
+
+    def tem_nome(self, nome):
+        return str(nome) in self.por_nome
+
+    def tem_id(self, user_id):
+        return str(user_id) not in SEM_ID and str(user_id) in self.por_id
+
+    def posicao(self, nome):
+        """Posição (índice do df) do membro, ou None."""
+        return self.por_nome.get(str(nome))
+
+    def posicao_id(self, user_id):
+        return self.por_id.get(str(user_id))
+
+    def confere(self, df, nome):
+        """Posição do membro em df se o índice ainda bate com ele; senão None."""
+        pos = self.posicao(nome)
+        if pos is not None and pos in df.index and str(df.at[pos, self.col_usuario]) == str(nome):
+            return pos
+        return None
@@ -0,0 +1,461 @@
+"""Recursos e componentes Streamlit comuns aos apps de Ups e de Call.
+
+Único módulo do núcleo que importa streamlit (a linha de comando não o usa).
+Cada função recebe o sistema (motor.UPS ou motor.CALL) e o id da guilda;
+clientes, armazenamentos, filas e históricos ficam em st.cache_resource,
+um por processo para cada par, compartilhados por todas as sessões.
+"""
+import functools
+import uuid
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from nucleo import cota, guildas, medicao, motor
+from nucleo.fila import CONFLITO, ERRO, GRAVANDO, PENDENTE, FilaEscrita, Operacao
+from nucleo.indice import IndiceMembros
+from nucleo.planilha import CacheWorksheets
+from nucleo.retratos import RepositorioRetratos
+from nucleo.versao import ControleVersoes
+
+# Recurso do processo; o sistema entra na chave do cache pelo nome
+recurso = functools.partial(st.cache_resource, hash_funcs={motor.Sistema: lambda s: s.nome})
+
+
+def ler_guildas():
+    """Guildas configuradas ([guildas.<id>] nos secrets; sem a seção, só a "principal")."""
+    try:
+        return guildas.ler_guildas(st.secrets)
+    except Exception:
+        return guildas.ler_guildas({})
+
+
+def ler_config_armazenamento(guilda=None):
+    """Seção [armazenamento] dos secrets (backend = "sheets" ou "sqlite", sqlite_path...).
+
+    Com a guilda, já com o que a seção [guildas.<id>] dela sobrepõe; sem,
+    os valores do processo (cota_por_minuto, limite_memoria_mb, limite_abas).
+    """
+    if guilda is not None:
+        return ler_guildas()[guilda].config
+    try:
+        return dict(st.secrets.get("armazenamento", {}))
+    except Exception:
+        return {}
+
+
+def chave_aba(sistema, guilda):
+    """Nome da aba do sistema na guilda, único no processo (versões, retratos e estado da sessão)."""
+    config = ler_guildas()[guilda]
+    return config.chave(config.aba(sistema))
+
+
+@recurso(ttl=3600)
+def get_gsheets_client():
+    """Cliente gspread autorizado, com a contagem de chamadas e a cota do processo."""
+    if "gcp_service_account" not in st.secrets:
+        st.error("Secrets não configurados (gcp_service_account).")
+        return None
+    try:
+        scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+        with medicao.fase('cliente'):
+            # Importados só aqui: o primeiro desenho da página não espera por eles
+            import gspread
+            from google.oauth2.service_account import Credentials
+            credentials = Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=scopes)
+            cliente = medicao.instrumentar_cliente(gspread.authorize(credentials))
+            # Um cliente e uma cota para todas as guildas: a cota do Google é da conta de serviço
+            return cota.proteger_cliente(cliente, cota.balde_processo(ler_config_armazenamento().get("cota_por_minuto")))
+    except Exception as e:
+        st.error(f"Erro de conexão com o Google Sheets: {e}")
+        return None
+
+
+@recurso(ttl=3600)
+def get_worksheets(guilda):
+    """Handles de Spreadsheet/Worksheet da planilha da guilda, reaproveitados entre chamadas (e sessões)."""
+    if get_gsheets_client() is None:
+        return None
+    url = ler_guildas()[guilda].spreadsheet_url
+    if not url:
+        st.error(f"Planilha da guilda '{guilda}' não configurada (spreadsheet_url).")
+        return None
+    return CacheWorksheets(get_gsheets_client, url, renovar_cliente=get_gsheets_client.clear)
+
+
+def _worksheets(guilda):
+    # Só abre o cliente do Google quando o backend é a planilha
+    if ler_config_armazenamento(guilda).get("backend", "sheets") == "sqlite":
+        return None
+    return get_worksheets(guilda)
+
+
+@recurso(ttl=3600)
+def get_armazenamento(sistema, guilda):
+    """Backend da aba do sistema na guilda, conforme os secrets (padrão: Google Sheets)."""
+    return motor.abrir_armazenamento(sistema, ler_config_armazenamento(guilda), _worksheets(guilda),
+                                     aba=ler_guildas()[guilda].aba(sistema))
+
+
+@recurso
+def get_controle_versoes():
+    """Versões das abas, compartilhadas por todas as sessões do processo."""
+    return ControleVersoes()
+
+
+@recurso
+def get_fila(sistema, guilda):
+    """Fila de gravação em segundo plano da aba (só chamar com armazenamento configurado).
+
+    Sem limite de entradas: uma fila despejada perderia alterações ainda não gravadas.
+    """
+    armazenamento = get_armazenamento(sistema, guilda)
+    janela = float(ler_config_armazenamento(guilda).get("janela_gravacao", 1.0))
+    # A gravação incrementa a versão da aba e registra a revisão que ela mesma causou (não conta como externa)
+    gravar = get_controle_versoes().gravacao(armazenamento.aplicar_operacoes, armazenamento.revisao,
+                                             chave_aba(sistema, guilda), armazenamento.origem)
+    return FilaEscrita(gravar, col_chave=sistema.col_usuario, janela=janela)
+
+
+@recurso(ttl=3600)
+def get_historico(sistema, guilda):
+    """Histórico semanal do sistema na guilda (None sem backend).
+
+    O índice em memória conta no limite dos retratos (cobrar_historico), não em entradas de cache.
+    """
+    return motor.abrir_historico(sistema, ler_config_armazenamento(guilda), _worksheets(guilda))
+
+
+@recurso
+def get_fila_historico(sistema, guilda):
+    """Acréscimos ao histórico em segundo plano: um append_rows por janela (só chamar com histórico configurado)."""
+    janela = float(ler_config_armazenamento(guilda).get("janela_gravacao", 1.0))
+    armazenamento = get_armazenamento(sistema, guilda)
+    # Na mesma planilha da tabela: acrescentar ao histórico não deve recarregar a tabela
+    gravar = get_controle_versoes().gravacao(get_historico(sistema, guilda).aplicar_operacoes,
+                                             armazenamento.revisao, origem=armazenamento.origem)
+    return FilaEscrita(gravar, col_chave='chave', janela=janela)
+
+
+@recurso
+def get_retratos():
+    """Um retrato (tabela imutável) por aba de cada guilda, lido uma vez e compartilhado por todas as sessões.
+
+    [armazenamento] limite_memoria_mb (padrão 512) e limite_abas: passando disso,
+    saem os usados há mais tempo e a guilda volta a ler na próxima visita.
+    """
+    config = ler_config_armazenamento()
+    limite_abas = config.get("limite_abas")
+    return RepositorioRetratos(limite_bytes=float(config.get("limite_memoria_mb", 512)) * 2 ** 20,
+                               limite_abas=int(limite_abas) if limite_abas is not None else None)
+
+
+def registrar_historico(sistema, guilda, df_base, df_novo, semana=None):
+    """Enfileira no histórico as linhas processadas de df_base para df_novo (uma por membro e semana)."""
+    if get_historico(sistema, guilda) is None:
+        return
+    fila = get_fila_historico(sistema, guilda)
+    # [armazenamento] dias_fechamento = N: processar nos N primeiros dias da semana ainda fecha a anterior
+    dias = int(ler_config_armazenamento(guilda).get("dias_fechamento", 0))
+    for linha in motor.linhas_historico(sistema, df_base, df_novo, semana, dias):
+        chave = f"{linha[2]}@{linha[0]}"  # usuario@semana: reprocessar antes de gravar fica só com a última
+        fila.enfileirar('anexar', chave, {'chave': chave}, linha)
+
+
+def cobrar_historico(sistema, guilda):
+    """Conta o índice do histórico no limite de memória dos retratos; despejado, a próxima consulta relê a aba."""
+    historico = get_historico(sistema, guilda)
+    get_retratos().cobrar(ler_guildas()[guilda].chave(sistema.aba_historico), historico.memoria(), historico.liberar)
+
+
+def versao_dados(sistema, guilda):
+    """(escritas nossas, mudanças externas, geração da fila) da aba.
+
+    A revisão do backend é sondada no máximo a cada intervalo_sonda s; painéis ociosos não leem nada.
+    """
+    armazenamento = get_armazenamento(sistema, guilda)
+    if armazenamento is None:
+        return (0, None, 0)
+    intervalo = float(ler_config_armazenamento(guilda).get("intervalo_sonda", armazenamento.intervalo_sonda))
+    versao = get_controle_versoes().versao(chave_aba(sistema, guilda), armazenamento.revisao, intervalo, armazenamento.origem)
+    return versao + (get_fila(sistema, guilda).geracao,)
+
+
+def get_classificacao(sistema, guilda):
+    """Posições da aba mantidas membro a membro, guardadas com o retrato (contam no limite; saem e são refeitas com ele)."""
+    retratos, chave = get_retratos(), chave_aba(sistema, guilda)
+
+    def montar():
+        classificacao, retrato = motor.classificacao(sistema), retratos.atual(chave)
+        if retrato is not None:
+            classificacao.sincronizar(retrato, get_fila(sistema, guilda).operacoes())
+        return classificacao
+
+    return retratos.derivado(chave, 'classificacao', None, montar, lambda c: c.memoria())
+
+
+def get_indice(sistema, guilda, versao, n_linhas, df):
+    """Índice de membros montado uma vez por versão da aba e guardado com o retrato (n_linhas separa uma carga que falhou)."""
+    return get_retratos().derivado(chave_aba(sistema, guilda), 'indice', (versao, n_linhas),
+                                   lambda: IndiceMembros(df, sistema.col_usuario, sistema.col_user_id),
+                                   lambda i: i.memoria())
+
+
+def get_ranking(sistema, guilda, versao, n_linhas, df, estilos=None):
+    """Ranking ordenado e com estilo por linha, montado uma vez por versão da aba e guardado com o retrato."""
+    def montar():
+        with medicao.fase('ranking.montar', linhas=n_linhas):
+            return motor.ranking(sistema, df, estilos)
+
+    return get_retratos().derivado(chave_aba(sistema, guilda), 'ranking', (versao, n_linhas), montar, lambda r: r.memoria())
+
+
+def ler_tabela(sistema, armazenamento, chave):
+    # Sem st.*: com revalidar_em_fundo roda numa thread fora da sessão
+    with medicao.fase('carregar.rede', aba=chave):
+        valores = armazenamento.carregar_valores()
+    with medicao.fase('carregar.montar', linhas=len(valores)):
+        return motor.tabela_de_valores(sistema, valores)
+
+
+def carregar_dados(sistema, guilda, versao=None):
+    """Retrato da aba na versão (lido só quando ela muda) com as alterações ainda na fila por cima.
+
+    Se a leitura falhar (cota, planilha fora do ar), devolve o último retrato com aviso,
+    e a versão dele em df.attrs['versao'] (para índice e ranking em cache).
+    """
+    armazenamento = get_armazenamento(sistema, guilda)
+    if armazenamento is None:
+        return pd.DataFrame(columns=sistema.colunas)
+    retratos, chave, fila = get_retratos(), chave_aba(sistema, guilda), get_fila(sistema, guilda)
+    # [armazenamento] revalidar_em_fundo = true: mostra o retrato anterior enquanto a versão nova é lida
+    em_fundo = bool(ler_config_armazenamento(guilda).get("revalidar_em_fundo", False))
+    with medicao.fase('carregar', aba=chave):
+        versao = versao_dados(sistema, guilda) if versao is None else versao
+        try:
+            # Voo único: sessões que pedem a mesma versão juntas esperam a mesma leitura
+            retrato = retratos.obter(chave, versao[:2], lambda: ler_tabela(sistema, armazenamento, chave), em_fundo)
+        except Exception as e:
+            retrato = retratos.atual(chave)
+            if retrato is None:
+                st.error(f"Erro ao carregar a aba '{ler_guildas()[guilda].aba(sistema)}': {e}")
+            else:
+                hora = datetime.fromtimestamp(retrato.instante).strftime('%H:%M:%S')
+                st.warning(f"Planilha indisponível ({e}). Mostrando os dados lidos às {hora}.")
+        # mostrar_fila_gravacao recarrega a página quando a geração ou a versão passam disto
+        st.session_state[f'retrato_visto_{chave}'] = (retratos.geracao(chave), versao[:2])
+        if retrato is None:
+            return pd.DataFrame(columns=sistema.colunas)
+        get_classificacao(sistema, guilda).sincronizar(retrato, fila.operacoes())
+        base = retrato.df
+        # Linhas novas da fila (concat) voltam aos tipos compactos; as demais colunas já estão neles.
+        # Cópia rasa: o retrato é de todas as sessões, e com copy-on-write ela não duplica colunas
+        df = fila.sobrepor(base, sistema.colunas, tipar=lambda r: motor.registro_tipado(sistema, r, base))
+        df = motor.compactar(sistema, df).copy(deep=False)
+        if retrato.versao != versao[:2]:
+            df.attrs['versao'] = retrato.versao + (fila.geracao,)
+        return df
+
+
+def salvar_dados(sistema, guilda, df, df_base=None):
+    """Sem df_base reescreve a aba inteira (na hora); com df_base enfileira só as linhas alteradas."""
+    armazenamento = get_armazenamento(sistema, guilda)
+    if armazenamento is None:
+        st.error("Não foi possível salvar: armazenamento não configurado.")
+        return False
+    fila, classificacao = get_fila(sistema, guilda), get_classificacao(sistema, guilda)
+    if df_base is not None:
+        with medicao.fase('salvar.diferencas'):
+            for op in motor.diferencas(sistema, df_base, df):
+                fila.enfileirar(op.acao, op.chave, op.registro, op.valores, op.anteriores)
+                classificacao.aplicar(op)
+        return True
+    try:
+        fila.descartar()
+        # Um lote ainda em gravação depois da reescrita voltaria linhas apagadas
+        if not fila.aguardar():
+            st.error("Ainda há uma gravação em andamento; a tabela não foi reescrita. Tente de novo em instantes.")
+            return False
+        reescrever = get_controle_versoes().gravacao(armazenamento.reescrever, armazenamento.revisao,
+                                                     chave_aba(sistema, guilda), armazenamento.origem)
+        with medicao.fase('salvar', linhas=len(df)):
+            reescrever(motor.tabela_texto(sistema, df).values.tolist())
+        return True
+    except Exception as e:
+        st.error(f"Erro ao salvar: {e}")
+        return False
+
+
+def salvar_linha(sistema, guilda, acao, registro=None, chave=None, anterior=None):
+    """Enfileira a escrita de um membro: 'anexar', 'atualizar' ou 'remover'.
+
+    chave = usuario antes da alteração; anterior = linha antiga (grava só as células que mudaram).
+    """
+    if get_armazenamento(sistema, guilda) is None:
+        st.error("Não foi possível salvar: armazenamento não configurado.")
+        return False
+    # Versão nova da linha: é por ela que a próxima gravação confere se alguém mexeu antes
+    registro = motor.carimbar(sistema, registro) if registro is not None else None
+    op = Operacao(acao, chave if chave is not None else registro[sistema.col_usuario], registro,
+                  motor.valores_linha(sistema, registro) if registro is not None else None,
+                  motor.valores_linha(sistema, anterior) if anterior is not None else None)
+    get_fila(sistema, guilda).enfileirar(op.acao, op.chave, op.registro, op.valores, op.anteriores)
+    # A posição no ranking muda já, sem esperar a gravação nem reordenar a tabela
+    get_classificacao(sistema, guilda).aplicar(op)
+    return True
+
+
+def texto_status_gravacao(sistema, guilda, usuario):
+    """Situação da última gravação do membro na fila (ou None se não houver)."""
+    if get_armazenamento(sistema, guilda) is None:
+        return None
+    status = get_fila(sistema, guilda).status(usuario)
+    if status is None:
+        return None
+    estado, instante, detalhe = status
+    hora = datetime.fromtimestamp(instante).strftime("%H:%M:%S")
+    if estado in (PENDENTE, GRAVANDO):
+        return f"⏳ Gravação {estado} ({hora})"
+    if estado == ERRO:
+        return f"⚠️ Erro ao gravar ({hora}): {detalhe}"
+    if estado == CONFLITO:
+        return f"⚠️ Conflito ({hora}): {detalhe}. Os dados foram recarregados; refaça a alteração."
+    return f"✔️ Gravado às {hora}"
+
+
+@st.fragment(run_every=2)
+def mostrar_fila_gravacao(sistema, guilda):
+    """Contador de alterações ainda não gravadas, conflitos e falhas da fila (atualiza sozinho)."""
+    if get_armazenamento(sistema, guilda) is None:
+        return
+    # Outra sessão trocou o retrato, ou a versão da aba mudou (gravação nossa ou externa): recarrega a página
+    chave = chave_aba(sistema, guilda)
+    visto = st.session_state.get(f'retrato_visto_{chave}')
+    if visto is not None and (get_retratos().geracao(chave), versao_dados(sistema, guilda)[:2]) != visto:
+        st.rerun(scope="app")
+    fila = get_fila(sistema, guilda)
+    pendentes, conflitos = fila.pendentes(), fila.conflitos()
+    st.caption(f"⏳ {pendentes} alteração(ões) aguardando gravação" if pendentes else "✔️ Todas as alterações gravadas")
+    if conflitos:
+        st.warning(f"Alterado por outra sessão, não gravado (refaça): {', '.join(conflitos)}")
+    falha = fila.falha()
+    if falha:
+        desde, erro, proxima = falha
+        st.error(f"Gravação falhando desde {datetime.fromtimestamp(desde).strftime('%H:%M:%S')} ({erro}). "
+                 f"As alterações continuam na fila; nova tentativa às {datetime.fromtimestamp(proxima).strftime('%H:%M:%S')}.")
+
+
+def escolher_membro(indice, rotulo, key, vazio=None, selecionado=None, on_change=None, label_visibility="collapsed"):
+    """Seletor de membro com busca.
+
+    O texto (começo ou trecho do nome, apelido aproximado ou começo do ID) reduz
+    as opções aos melhores resultados, em vez de mandar a lista inteira para o
+    navegador; o membro já selecionado continua entre elas. Sem vazio e sem
+    resultados, devolve None.
+    """
+    texto = st.text_input(f"Buscar ({rotulo})", key=f"{key}_busca", placeholder="🔎 Nome ou ID", label_visibility="collapsed")
+    opcoes = indice.busca.buscar(texto)
+    if selecionado is not None and indice.tem_nome(selecionado) and str(selecionado) not in opcoes:
+        opcoes = [str(selecionado)] + opcoes
+    if not opcoes and (texto or vazio is None):
+        st.caption("Nenhum membro encontrado.")
+    if vazio is not None:
+        opcoes = [vazio] + opcoes
+    elif not opcoes:
+        return None
+    idx = opcoes.index(str(selecionado)) if selecionado is not None and str(selecionado) in opcoes else 0
+    return st.selectbox(rotulo, opcoes, index=idx, key=key, label_visibility=label_visibility, on_change=on_change)
+
+
+def mostrar_historico_membro(sistema, guilda, dados, rotulo_valor):
+    """Semanas já processadas do membro: evolução do total e a tabela semana a semana (valor como rotulo_valor)."""
+    if get_historico(sistema, guilda) is None:
+        return
+    with st.expander("📈 Histórico"):
+        try:
+            historico = get_historico(sistema, guilda)
+            # Outra sessão (ou o cron) pode ter acrescentado linhas: lê só as que vieram depois das conhecidas
+            historico.sincronizar()
+            trajetoria = historico.trajetoria(dados.get(sistema.col_user_id), dados[sistema.col_usuario])
+            cobrar_historico(sistema, guilda)
+        except Exception as e:
+            st.caption(f"Histórico indisponível: {e}")
+            return
+        if trajetoria.empty:
+            st.caption("Nenhuma semana registrada ainda.")
+            return
+        st.line_chart(trajetoria.set_index('semana')[['total']])
+        st.dataframe(trajetoria[['semana', 'cargo_anterior', 'cargo', 'situação', 'valor', 'total']].rename(columns={'valor': rotulo_valor}),
+                     hide_index=True, use_container_width=True)
+
+
+def ler_config_debug():
+    """Seção [debug] dos secrets.
+
+    token = "..." libera o painel em ?debug=<token>; painel = true o deixa sempre
+    visível; nivel_log = "DEBUG" loga cada fase e chamada (padrão: INFO).
+    """
+    try:
+        return dict(st.secrets.get("debug", {}))
+    except Exception:
+        return {}
+
+
+def painel_debug_liberado():
+    """Só administradores (com o token na URL) veem o painel de depuração."""
+    config = ler_config_debug()
+    token = str(config.get("token", ""))
+    return bool(config.get("painel")) or (bool(token) and st.query_params.get("debug") == token)
+
+
+def get_medidor(sistema):
+    """Medidor de tempos e chamadas à API desta sessão no app do sistema (nucleo.medicao)."""
+    chave = f'medidor_{sistema.nome}'
+    if chave not in st.session_state:
+        st.session_state[chave] = medicao.Medidor(f"{sistema.nome}-{uuid.uuid4().hex[:8]}")
+    return st.session_state[chave]
+
+
+def mostrar_painel_debug(medidor, resumo):
+    """Painel de administração: fases desta execução, histórico da sessão e chamadas à API do processo."""
+    with st.sidebar.expander("🛠️ Depuração", expanded=True):
+        st.caption(f"Execução {resumo['execucao']}: {resumo['total_ms']} ms · {resumo['chamadas']} chamada(s) · {resumo['bytes'] / 1024:.1f} KiB")
+        fases = list(resumo['fases_ms'].items()) + [('interface (resto)', resumo['resto_ms'])]
+        st.dataframe(pd.DataFrame(fases, columns=['fase', 'ms']), hide_index=True, use_container_width=True)
+        st.markdown("**Sessão**")
+        st.caption(f"{medidor.total_chamadas()} chamada(s) · {medidor.bytes / 1024:.1f} KiB em {medidor.execucoes} execução(ões)")
+        st.dataframe(pd.DataFrame(medidor.resumo_fases()), hide_index=True, use_container_width=True)
+        st.markdown("**Processo** (todas as sessões e a fila de gravação)")
+        abas, memoria = get_retratos().uso()
+        st.caption(f"Retratos em memória: {abas} aba(s) · {memoria / 2 ** 20:.1f} MB com índices, rankings e histórico")
+        processo = medicao.PROCESSO
+        m1, m2 = st.columns(2)
+        with m1:
+            st.metric("Chamadas/min", processo.chamadas_por_minuto())
+        with m2:
+            st.metric("Total", processo.total_chamadas(), help=f"{processo.bytes / 1024:.1f} KiB")
+        chamadas = processo.resumo_chamadas()
+        if chamadas:
+            st.dataframe(pd.DataFrame(list(chamadas.items()), columns=['recurso', 'chamadas']), hide_index=True, use_container_width=True)
+
+
+def escolher_guilda(esquecer=()):
+    """Guilda desta sessão: ?guilda=<id> na URL ou, com mais de uma configurada, o seletor da barra lateral.
+
+    Ao trocar de guilda, as chaves de esquecer (seleção e confirmações feitas
+    na outra) saem do estado da sessão.
+    """
+    todas = ler_guildas()
+    guilda = guildas.escolher(todas, st.query_params.get("guilda"))
+    if len(todas) > 1:
+        ids = list(todas)
+        guilda = todas[st.sidebar.selectbox("Servidor", ids, index=ids.index(guilda.id),
+                                            format_func=lambda g: todas[g].nome, key='guilda_select')]
+        if st.query_params.get("guilda") != guilda.id:
+            st.query_params["guilda"] = guilda.id
+    if st.session_state.get('guilda_sessao') != guilda.id:
+        for key in esquecer:
+            st.session_state.pop(key, None)
+        st.session_state.guilda_sessao = guilda.id
+    return guilda
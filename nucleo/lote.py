@@ -0,0 +1,135 @@
+"""Processamento semanal em lote: um arquivo com as mensagens (Sistema de Ups)
+ou as horas em call (Call Ranking) de todos os membros vira uma única passada
+vetorizada e uma única escrita."""
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from nucleo.indice import IndiceMembros
+from nucleo.regras import SITUACOES
+
+COLUNAS_LOTE = ['usuario', 'user_id', 'mensagens', 'bonus', 'multiplicador']
+COLUNAS_LOTE_CALL = ['usuario', 'user_id', 'horas']
+
+
+def rotulo_semana(semana):
+    """'2026-S42 (a partir de 12/10)' para a semana ISO (ano, número)."""
+    ano, numero = semana
+    inicio = datetime.fromisocalendar(ano, numero, 1)
+    return f"{ano}-S{numero:02d} (a partir de {inicio.strftime('%d/%m')})"
+
+
+def ler_lote(arquivo, nome_arquivo=''):
+    """Lê CSV ou JSON (lista de objetos) com usuario/user_id, mensagens, bonus, multiplicador.
+
+    Ao menos uma das colunas usuario/user_id e a coluna mensagens são obrigatórias;
+    bonus vira 0 e multiplicador em branco mantém o multiplicador atual do membro.
+    """
+    if str(nome_arquivo).lower().endswith('.json'):
+        lote = pd.DataFrame(json.load(arquivo))
+    else:
+        lote = pd.read_csv(arquivo, dtype={'usuario': str, 'user_id': str})
+    lote.columns = [str(c).strip().lower() for c in lote.columns]
+    if 'mensagens' not in lote.columns or not ({'usuario', 'user_id'} & set(lote.columns)):
+        raise ValueError("O arquivo precisa das colunas 'mensagens' e 'usuario' ou 'user_id'.")
+    lote = lote.reindex(columns=COLUNAS_LOTE)
+    lote['usuario'] = lote['usuario'].astype(str).str.strip().where(lote['usuario'].notna(), '')
+    lote['user_id'] = lote['user_id'].astype(str).str.strip().where(lote['user_id'].notna(), '')
+    lote['mensagens'] = pd.to_numeric(lote['mensagens'], errors='coerce').fillna(0).clip(lower=0)
+    lote['bonus'] = pd.to_numeric(lote['bonus'], errors='coerce').fillna(0.0)
+    lote['multiplicador'] = pd.to_numeric(lote['multiplicador'], errors='coerce')
+    return lote
+
+
+def localizar_membros(lote, indice):
+    """Posição (índice do df) de cada linha do lote: pelo user_id quando houver, senão pelo nome."""
+    pos = lote['user_id'].map(indice.por_id)
+    return pos.fillna(lote['usuario'].map(indice.por_nome))
+
+
+def _casar_lote(df, lote, metas, indice):
+    """(linhas do lote com a posição do membro, sem repetição; linhas ignoradas)."""
+    lote = lote.copy()
+    lote['posicao'] = localizar_membros(lote, indice or IndiceMembros(df))
+    valido = lote['posicao'].map(df['cargo']).isin(list(metas.ordinal))
+    ignorados = lote.loc[~valido, ['usuario', 'user_id']]
+    return lote[valido].drop_duplicates('posicao', keep='last'), ignorados
+
+
+def processar_lote(df, lote, metas, mensagens_por_ponto, agora=None, indice=None):
+    """Aplica a semana do lote a todos os membros encontrados de uma vez
+    (metas = regras.MetasCompiladas; indice = IndiceMembros do df, se já existir).
+
+    Retorna (df_novo, previa, ignorados): previa tem uma linha por membro
+    processado (cargo antigo/novo, situação, pontos) e ignorados lista as
+    linhas do lote sem membro correspondente ou com cargo desconhecido.
+    """
+    agora = agora or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    lote, ignorados = _casar_lote(df, lote, metas, indice)
+
+    pos = lote['posicao'].astype(int).values
+    atual = df.loc[pos]
+    mult = lote['multiplicador'].fillna(pd.Series(atual['Multiplicador_Individual'].values, index=lote.index))
+    pontos = (((lote['mensagens'] / mensagens_por_ponto) + lote['bonus']) * mult).round(1).values
+
+    codigos, novos = metas.avaliar(metas.ordinais(atual['cargo']), pontos)
+    situacao = SITUACOES[codigos]
+    novo_cargo = metas.cargos[novos]
+
+    df_novo = df.copy()
+    df_novo.loc[pos, 'cargo'] = novo_cargo
+    df_novo.loc[pos, 'situação'] = situacao
+    df_novo.loc[pos, 'Semana_Atual'] = 1
+    df_novo.loc[pos, 'Pontos_Acumulados_Ciclo'] = 0.0
+    df_novo.loc[pos, 'Pontos_Semana'] = pontos
+    df_novo.loc[pos, 'Bonus_Semana'] = lote['bonus'].round(1).values
+    df_novo.loc[pos, 'Multiplicador_Individual'] = mult.round(1).values
+    df_novo.loc[pos, 'Data_Ultima_Atualizacao'] = agora
+    df_novo.loc[pos, 'Pontos_Total_Final'] = (atual['Pontos_Total_Final'].values + pontos).round(1)
+
+    previa = pd.DataFrame({
+        'usuario': atual['usuario'].values, 'user_id': atual['user_id'].values,
+        'cargo': atual['cargo'].values, 'novo cargo': novo_cargo,
+        'situação': situacao, 'pontos': pontos,
+    })
+    return df_novo, previa, ignorados
+
+
+def processar_horas(df, lote, metas, agora=None, indice=None):
+    """Semana de horas em call (Call Ranking) para todos os membros do lote de uma vez.
+
+    Mesma regra do processamento individual do app_call: ciclo já fechado
+    (UPADO/MANTEVE/REBAIXADO) recomeça das horas da semana, senão soma ao
+    acumulado; todo processamento fecha o ciclo (acumulado volta a 0).
+    Retorna (df_novo, previa, ignorados), como processar_lote.
+    """
+    agora = agora or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    lote, ignorados = _casar_lote(df, lote, metas, indice)
+
+    pos = lote['posicao'].astype(int).values
+    atual = df.loc[pos]
+    horas = lote['horas'].astype(float).values
+    ciclo_fechado = atual['situação'].isin(list(SITUACOES)).values
+    acumulado = np.where(ciclo_fechado, horas, atual['Horas_Acumuladas_Ciclo'].astype(float).values + horas)
+
+    codigos, novos = metas.avaliar(metas.ordinais(atual['cargo']), acumulado)
+    situacao = SITUACOES[codigos]
+    novo_cargo = metas.cargos[novos]
+
+    df_novo = df.copy()
+    df_novo.loc[pos, 'cargo'] = novo_cargo
+    df_novo.loc[pos, 'situação'] = situacao
+    df_novo.loc[pos, 'Semana_Atual'] = 1
+    df_novo.loc[pos, 'Horas_Acumuladas_Ciclo'] = 0.0
+    df_novo.loc[pos, 'Horas_Semana'] = horas.round(1)
+    df_novo.loc[pos, 'Data_Ultima_Atualizacao'] = agora
+    df_novo.loc[pos, 'Horas_Total_Final'] = (atual['Horas_Total_Final'].values + horas).round(1)
+
+    previa = pd.DataFrame({
+        'usuario': atual['usuario'].values, 'user_id': atual['user_id'].values,
+        'cargo': atual['cargo'].values, 'novo cargo': novo_cargo,
+        'situação': situacao, 'horas': horas.round(1),
+    })
+    return df_novo, previa, ignorados
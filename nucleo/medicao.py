@@ -0,0 +1,194 @@
+"""Tempo por fase e chamadas à API do Google, por sessão e no processo.
+
+Cada sessão do Streamlit tem o seu Medidor, ativado no começo de cada
+execução do script (usar); o que roda fora de uma sessão (a fila de
+gravação, na thread dela) cai no medidor do processo, que também soma o
+de todas as sessões. As requisições HTTP do gspread são contadas por
+instrumentar_cliente. Fases, chamadas e o resumo de cada execução saem no
+log 'sistema_ups' como uma linha JSON (fases e chamadas em DEBUG, resumo em INFO).
+"""
+import json
+import logging
+import re
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+log = logging.getLogger('sistema_ups')
+
+# Execuções guardadas por fase (mediana e máximo do painel)
+HISTORICO = 50
+
+_ACOES_API = re.compile(r':(append|batchGet|batchUpdate|batchClear|clear|batchGetByDataFilter)$')
+
+
+class Medidor:
+
+    def __init__(self, nome, historico=HISTORICO):
+        self.nome = nome
+        self.tempos = defaultdict(lambda: deque(maxlen=historico))
+        self.chamadas = Counter()
+        self.bytes = 0
+        self.execucoes = 0
+        self.rodada = {}
+        self._em_fases = 0.0  # só fases de fora (as aninhadas já estão dentro delas)
+        self._instantes = deque(maxlen=1000)  # das chamadas, para a taxa por minuto
+        self._inicio_rodada = None
+        self._contagem_inicio = (0, 0)
+        self._trava = threading.Lock()
+
+    def registrar_fase(self, fase, segundos, externa=True):
+        with self._trava:
+            self.tempos[fase].append(segundos)
+            self.rodada[fase] = self.rodada.get(fase, 0.0) + segundos
+            if externa:
+                self._em_fases += segundos
+
+    def registrar_chamada(self, recurso, n_bytes, agora=None):
+        with self._trava:
+            self.chamadas[recurso] += 1
+            self.bytes += n_bytes
+            self._instantes.append(time.monotonic() if agora is None else agora)
+
+    def chamadas_por_minuto(self, agora=None):
+        """Chamadas nos últimos 60 s (a cota de leitura do Sheets é por minuto)."""
+        agora = time.monotonic() if agora is None else agora
+        with self._trava:
+            return sum(1 for t in self._instantes if agora - t <= 60)
+
+    def total_chamadas(self):
+        with self._trava:
+            return sum(self.chamadas.values())
+
+    def iniciar_rodada(self):
+        with self._trava:
+            self.rodada = {}
+            self._em_fases = 0.0
+            self.execucoes += 1
+            self._inicio_rodada = time.perf_counter()
+            self._contagem_inicio = (sum(self.chamadas.values()), self.bytes)
+
+    def encerrar_rodada(self, **campos):
+        """Fecha a execução do script e loga tempo total, fases e chamadas dela. Devolve o resumo."""
+        with self._trava:
+            if self._inicio_rodada is None:
+                return None
+            total = time.perf_counter() - self._inicio_rodada
+            self._inicio_rodada = None
+            chamadas, n_bytes = self._contagem_inicio
+            resumo = {
+                'medidor': self.nome, 'execucao': self.execucoes, 'total_ms': _ms(total),
+                'fases_ms': {fase: _ms(s) for fase, s in self.rodada.items()},
+                # O que não está em nenhuma fase: montagem da interface
+                'resto_ms': _ms(max(0.0, total - self._em_fases)),
+                'chamadas': sum(self.chamadas.values()) - chamadas, 'bytes': self.bytes - n_bytes,
+                **campos,
+            }
+        registrar_log('rodada', logging.INFO, **resumo)
+        return resumo
+
+    def resumo_fases(self):
+        """[{fase, execucoes, ultima_ms, mediana_ms, max_ms}] das fases medidas."""
+        with self._trava:
+            return [{'fase': fase, 'execucoes': len(t), 'ultima_ms': _ms(t[-1]),
+                     'mediana_ms': _ms(statistics.median(t)), 'max_ms': _ms(max(t))}
+                    for fase, t in sorted(self.tempos.items()) if t]
+
+    def resumo_chamadas(self):
+        with self._trava:
+            return dict(self.chamadas.most_common())
+
+
+def _ms(segundos):
+    return round(segundos * 1000, 1)
+
+
+# Medidor de tudo o que roda no processo (todas as sessões e a fila de gravação)
+PROCESSO = Medidor('processo')
+_local = threading.local()
+
+
+def usar(medidor):
+    """Medidor das fases e chamadas feitas daqui em diante nesta thread (a do script da sessão)."""
+    _local.medidor = medidor
+
+
+def atual():
+    return getattr(_local, 'medidor', None) or PROCESSO
+
+
+def registrar_log(evento, nivel=logging.DEBUG, **campos):
+    if log.isEnabledFor(nivel):
+        log.log(nivel, json.dumps({'evento': evento, **campos}, ensure_ascii=False, default=str))
+
+
+@contextmanager
+def fase(nome, **campos):
+    """Mede o bloco como a fase `nome` no medidor atual (e no do processo)."""
+    profundidade = getattr(_local, 'profundidade', 0)
+    _local.profundidade = profundidade + 1
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        _local.profundidade = profundidade
+        medidor = atual()
+        medidor.registrar_fase(nome, segundos, externa=profundidade == 0)
+        if medidor is not PROCESSO:
+            PROCESSO.registrar_fase(nome, segundos, externa=profundidade == 0)
+        registrar_log('fase', medidor=medidor.nome, fase=nome, ms=_ms(segundos), **campos)
+
+
+def registrar_chamada(recurso, n_bytes):
+    medidor = atual()
+    medidor.registrar_chamada(recurso, n_bytes)
+    if medidor is not PROCESSO:
+        PROCESSO.registrar_chamada(recurso, n_bytes)
+    registrar_log('chamada', medidor=medidor.nome, recurso=recurso, bytes=n_bytes)
+
+
+def recurso_api(metodo, endpoint):
+    """Rótulo da requisição sem IDs nem intervalos: 'GET values:batchGet', 'GET drive', ..."""
+    caminho = urlsplit(str(endpoint)).path
+    base = 'drive' if '/drive/' in caminho else 'values' if '/values' in caminho else 'spreadsheets'
+    acao = _ACOES_API.search(caminho)
+    return f"{str(metodo).upper()} {base}" + (f":{acao.group(1)}" if acao else '')
+
+
+def instrumentar_cliente(cliente):
+    """Conta cada requisição HTTP do cliente gspread (recurso e bytes de ida e volta)."""
+    # gspread 6 faz as requisições pelo http_client; versões antigas, pelo próprio Client
+    alvo = getattr(cliente, 'http_client', None) or cliente
+    original = alvo.request
+    if getattr(original, 'medido', False):
+        return cliente
+
+    def request(method, endpoint, *args, **kwargs):
+        enviado = len(kwargs.get('data') or b'')
+        if kwargs.get('json') is not None:
+            enviado += len(json.dumps(kwargs['json'], default=str))
+        recebido = 0
+        try:
+            resposta = original(method, endpoint, *args, **kwargs)
+            recebido = len(resposta.content or b'')
+            return resposta
+        finally:
+            registrar_chamada(recurso_api(method, endpoint), enviado + recebido)
+
+    request.medido = True
+    alvo.request = request
+    return cliente
+
+
+def configurar_log(nivel='INFO'):
+    """Handler no stderr para o log 'sistema_ups' (uma vez por processo)."""
+    if not log.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+        log.addHandler(handler)
+        log.propagate = False
+    log.setLevel(str(nivel).upper())
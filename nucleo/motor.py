@@ -0,0 +1,430 @@
+"""Motor sem interface, compartilhado por app.py, app_call.py e a linha de comando.
+
+Define os dois sistemas (colunas, metas, aba) e as operações sobre a tabela
+de membros como funções puras: montar o DataFrame a partir das células do
+backend, processar a semana de um lote, calcular as diferenças a gravar,
+ranking e exportação. Nada aqui importa streamlit.
+"""
+import json
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from nucleo import lote as lotes
+from nucleo.armazenamento import ArmazenamentoSheets, ArmazenamentoSQLite
+from nucleo.classificacao import ClassificacaoAba
+from nucleo.fila import Operacao
+from nucleo.historico import COLUNAS_HISTORICO, HistoricoSheets, HistoricoSQLite, chave_semana
+from nucleo.ranking import Ranking
+from nucleo.regras import MetasCompiladas
+
+# Lista ordenada do Menor para o Maior (igual nos dois sistemas)
+CARGOS_LISTA = [
+    'f*ck', '100%', 'woo', 'sex', 'note', 'aura', 'all wild',
+    'cute', 'mello',
+    'void', 'dawn', 'upper', 'Light'
+]
+
+# --- SISTEMA DE UPS (mensagens) ---
+
+METAS_PONTUACAO = {
+    'f*ck':      {'ciclo': 1, 'meta_up': 10, 'meta_manter': 7},
+    '100%':      {'ciclo': 1, 'meta_up': 17, 'meta_manter': 13},
+    'woo':       {'ciclo': 1, 'meta_up': 25, 'meta_manter': 20},
+    'sex':       {'ciclo': 1, 'meta_up': 35, 'meta_manter': 28},
+    'note':      {'ciclo': 1, 'meta_up': 45, 'meta_manter': 36},
+    'aura':      {'ciclo': 1, 'meta_up': 55, 'meta_manter': 44},
+    'all wild':  {'ciclo': 1, 'meta_up': 66, 'meta_manter': 53},
+    'cute':      {'ciclo': 1, 'meta_up': 78, 'meta_manter': 62},
+    'mello':     {'ciclo': 1, 'meta_up': 92, 'meta_manter': 74},
+    'void':      {'ciclo': 1, 'meta_up': 106, 'meta_manter': 85},
+    'dawn':      {'ciclo': 1, 'meta_up': 122, 'meta_manter': 98},
+    'upper':     {'ciclo': 1, 'meta_up': 140, 'meta_manter': 112},
+    'Light':     {'ciclo': 1, 'meta_up': 160, 'meta_manter': 128},
+}
+
+MENSAGENS_POR_PONTO = 50
+
+COLUNAS_UPS = [
+    'usuario', 'user_id', 'cargo', 'situação', 'Semana_Atual',
+    'Pontos_Acumulados_Ciclo', 'Pontos_Semana', 'Bonus_Semana',
+    'Multiplicador_Individual', 'Data_Ultima_Atualizacao', 'Pontos_Total_Final', 'Versao'
+]
+NUMERICAS_UPS = ['Semana_Atual', 'Pontos_Acumulados_Ciclo', 'Pontos_Semana', 'Bonus_Semana',
+                 'Multiplicador_Individual', 'Pontos_Total_Final']
+
+# 'Versao' (última coluna das duas tabelas) é a versão da linha para o
+# compare-and-swap da gravação: um token novo a cada escrita (ver carimbar).
+# Planilhas antigas, sem a coluna, ganham o cabeçalho na primeira gravação.
+
+# Esquema das duas tabelas: numéricas são float, fora as inteiras; o resto é texto.
+# Coluna ausente (ou célula vazia) entra com o padrão: o de PADROES ou 0, 0.0 e ''.
+INTEIRAS = ['Semana_Atual']
+PADROES = {'user_id': 'N/A', 'Multiplicador_Individual': 1.0}
+
+# Em memória: cargo categórico ordenado (ordem de CARGOS_LISTA), situação
+# categórica, user_id Int64 (N/A = nulo) e o carimbo como datetime64; tudo
+# volta ao mesmo texto ao gravar (ver compactar e tabela_texto).
+FORMATO_DATA = '%Y-%m-%d %H:%M:%S'
+SITUACOES_CONHECIDAS = ['REBAIXADO', 'MANTEVE', 'UPADO', 'Em andamento (1/1)']
+
+# --- CALL RANKING (horas em call) ---
+
+# Os valores são (Meta UP / Meta Manter) em HORAS acumuladas por ciclo (1 semana)
+METAS_CALL = {
+    # Posições 1 a 4 (Base)
+    'f*ck':      {'ciclo': 1, 'meta_up': 14, 'meta_manter': 12},      # Posição 1
+    '100%':      {'ciclo': 1, 'meta_up': 21, 'meta_manter': 14},      # Posição 2
+    'woo':       {'ciclo': 1, 'meta_up': 28, 'meta_manter': 21},      # Posição 3
+    'sex':       {'ciclo': 1, 'meta_up': 33, 'meta_manter': 28},      # Posição 4
+
+    # Posição 5
+    'note':      {'ciclo': 1, 'meta_up': 38, 'meta_manter': 33},      # Posição 5
+
+    # Posições 6 e 7
+    'aura':      {'ciclo': 1, 'meta_up': 42, 'meta_manter': 38},      # Posição 6
+    'all wild':  {'ciclo': 1, 'meta_up': 45, 'meta_manter': 42},      # Posição 7
+
+    # Posições 8 e 9
+    'cute':      {'ciclo': 1, 'meta_up': 51, 'meta_manter': 45},      # Posição 8
+    'mello':     {'ciclo': 1, 'meta_up': 56, 'meta_manter': 51},      # Posição 9
+
+    # Posições 10 a 12
+    'void':      {'ciclo': 1, 'meta_up': 60, 'meta_manter': 56},      # Posição 10
+    'dawn':      {'ciclo': 1, 'meta_up': 64, 'meta_manter': 60},      # Posição 11
+    'upper':     {'ciclo': 1, 'meta_up': 67, 'meta_manter': 64},      # Posição 12
+
+    # Posição 13 (Topo)
+    'Light':     {'ciclo': 1, 'meta_up': 72, 'meta_manter': 67},      # Posição 13
+}
+
+COLUNAS_CALL = [
+    'usuario', 'user_id', 'cargo', 'situação', 'Semana_Atual',
+    'Horas_Acumuladas_Ciclo', 'Horas_Semana', 'Data_Ultima_Atualizacao',
+    'Horas_Total_Final', 'Versao'
+]
+NUMERICAS_CALL = ['Semana_Atual', 'Horas_Acumuladas_Ciclo', 'Horas_Semana', 'Horas_Total_Final']
+
+
+class Sistema:
+    """O que distingue o Sistema de Ups do Call Ranking: aba, colunas, metas e o processamento da semana."""
+
+    def __init__(self, nome, aba, colunas, colunas_numericas, col_total, metas, cargos=CARGOS_LISTA,
+                 col_usuario='usuario', col_user_id='user_id', col_cargo='cargo', col_sit='situação',
+                 col_data='Data_Ultima_Atualizacao', col_versao='Versao', colunas_inteiras=INTEIRAS, padroes=PADROES,
+                 col_semana=None, aba_historico=None):
+        self.nome = nome
+        self.aba = aba
+        self.aba_historico = aba_historico or f'Historico_{nome.capitalize()}'
+        self.colunas = list(colunas)
+        self.colunas_numericas = list(colunas_numericas)
+        self.col_total = col_total
+        self.metas = metas
+        self.cargos = list(cargos)
+        self.metas_compiladas = MetasCompiladas(metas, cargos)
+        self.col_usuario = col_usuario
+        self.col_user_id = col_user_id
+        self.col_cargo = col_cargo
+        self.col_sit = col_sit
+        self.col_data = col_data
+        self.col_versao = col_versao
+        self.col_semana = col_semana
+        # {coluna: (dtype, valor padrão)} como vem da planilha; compactar troca os tipos de cargo, situação, ID e data
+        self.esquema = {}
+        for c in self.colunas:
+            if c in colunas_inteiras and c in self.colunas_numericas:
+                self.esquema[c] = ('int64', int(padroes.get(c, 0)))
+            elif c in self.colunas_numericas:
+                self.esquema[c] = ('float64', float(padroes.get(c, 0.0)))
+            else:
+                self.esquema[c] = (str, padroes.get(c, ''))
+
+    def __repr__(self):
+        return f'Sistema({self.nome!r}, aba={self.aba!r})'
+
+
+UPS = Sistema('ups', 'dados sistema', COLUNAS_UPS, NUMERICAS_UPS, 'Pontos_Total_Final', METAS_PONTUACAO,
+              col_semana='Pontos_Semana')
+CALL = Sistema('call', 'Call_Ranking', COLUNAS_CALL, NUMERICAS_CALL, 'Horas_Total_Final', METAS_CALL,
+               col_semana='Horas_Semana')
+SISTEMAS = {UPS.nome: UPS, CALL.nome: CALL}
+
+
+# --- Armazenamento ---
+
+def abrir_armazenamento(sistema, config, worksheets=None, aba=None):
+    """Backend da aba conforme a seção [armazenamento] (backend = "sheets" ou "sqlite").
+
+    Para "sheets" é preciso um planilha.CacheWorksheets; sem ele devolve None.
+    """
+    aba = aba or sistema.aba
+    if config.get("backend", "sheets") == "sqlite":
+        return ArmazenamentoSQLite(config.get("sqlite_path", "sistema_ups.db"), aba,
+                                   sistema.colunas, sistema.colunas_numericas, sistema.col_total,
+                                   col_versao=sistema.col_versao)
+    if worksheets is None:
+        return None
+    return ArmazenamentoSheets(worksheets, aba, sistema.colunas, col_versao=sistema.col_versao)
+
+
+def abrir_historico(sistema, config, worksheets=None):
+    """Histórico semanal (nucleo.historico) do sistema no mesmo backend da tabela; sem worksheets no "sheets", None."""
+    if config.get("backend", "sheets") == "sqlite":
+        return HistoricoSQLite(config.get("sqlite_path", "sistema_ups.db"), sistema.aba_historico)
+    if worksheets is None:
+        return None
+    return HistoricoSheets(worksheets, sistema.aba_historico)
+
+
+def _coluna_tipada(celulas, dtype, padrao):
+    if dtype is str:
+        return pd.Series(celulas, dtype=str).fillna(padrao)
+    try:
+        # Caminho rápido: todas as células são números
+        valores = np.array(celulas, dtype='float64')
+    except (TypeError, ValueError):
+        valores = pd.to_numeric(pd.Series(celulas, dtype=object), errors='coerce').to_numpy(dtype='float64')
+    valores = np.where(np.isnan(valores), padrao, valores)
+    return pd.Series(valores.astype(dtype, copy=False))
+
+
+def tabela_de_valores(sistema, valores):
+    """DataFrame da tabela direto das células (formato de get_all_values: cabeçalho e linhas).
+
+    Cada coluna do esquema é montada de uma vez, já com o tipo dela, sem um
+    dict por linha; coluna ausente entra com o padrão tipado e célula vazia ou
+    inválida numa coluna numérica vira 0.
+    """
+    cabecalho, linhas = (list(valores[0]), valores[1:]) if valores else ([], [])
+    posicoes = {}
+    for i, nome in enumerate(cabecalho):
+        posicoes.setdefault(nome, i)
+    dados = {}
+    for c, (dtype, padrao) in sistema.esquema.items():
+        pos = posicoes.get(c)
+        if pos is None:
+            celulas = [padrao] * len(linhas)
+        else:
+            # Linha mais curta que o cabeçalho: células finais vazias
+            celulas = [l[pos] if pos < len(l) else '' for l in linhas]
+        dados[c] = _coluna_tipada(celulas, dtype, padrao)
+    return compactar(sistema, pd.DataFrame(dados, columns=sistema.colunas))
+
+
+# --- Tipos compactos ---
+
+def _celula(valor, padrao=''):
+    """Texto da célula como é gravado: nulo vira o padrão da coluna e data volta a FORMATO_DATA."""
+    if valor is None or valor is pd.NA or valor is pd.NaT or (isinstance(valor, float) and np.isnan(valor)):
+        return str(padrao)
+    if isinstance(valor, pd.Timestamp):
+        return valor.strftime(FORMATO_DATA)
+    return str(valor)
+
+
+def _texto_coluna(serie, padrao=''):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.astype(str)
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        return serie.dt.strftime(FORMATO_DATA).fillna(str(padrao)).astype(str)
+    if isinstance(serie.dtype, pd.Int64Dtype):
+        return serie.astype(str).where(serie.notna(), str(padrao))
+    if serie.dtype == object:
+        return serie.map(lambda v: _celula(v, padrao)).astype(str)
+    return serie.astype(str)
+
+
+def _categorica(texto, categorias, ordenada):
+    extras = sorted(set(texto.unique()) - set(categorias))
+    return pd.Series(pd.Categorical(texto, categories=list(categorias) + extras, ordered=ordenada), index=texto.index)
+
+
+def _ids(texto, padrao):
+    """Int64 se todo ID for um número sem zeros à esquerda (ou o padrão, que vira nulo); senão None."""
+    numerico = texto.str.fullmatch(r'[1-9]\d{0,18}')
+    if not (numerico | (texto == padrao)).all():
+        return None
+    ids = pd.to_numeric(texto.where(numerico), errors='coerce', dtype_backend='numpy_nullable')
+    return ids.astype('Int64') if pd.api.types.is_integer_dtype(ids.dtype) and ids.dtype.kind == 'i' else None
+
+
+def _datas(texto):
+    """datetime64 se toda data não vazia voltar idêntica por FORMATO_DATA; senão None."""
+    vazio = texto == ''
+    datas = pd.to_datetime(texto.where(~vazio), format=FORMATO_DATA, errors='coerce')
+    preenchidas = datas[~vazio]
+    if preenchidas.isna().any() or not (preenchidas.dt.strftime(FORMATO_DATA) == texto[~vazio]).all():
+        return None
+    return datas
+
+
+def compactar(sistema, df):
+    """df com cargo/situação categóricos, user_id Int64 e o carimbo em datetime64.
+
+    Só converte a coluna se a conversão voltar exatamente ao mesmo texto; uma
+    coluna com valores fora do padrão fica como texto. Colunas que já estão no
+    tipo compacto não são tocadas (barato chamar de novo depois de sobrepor).
+    """
+    df = df.copy(deep=False)
+    cargo, sit, user_id, data = sistema.col_cargo, sistema.col_sit, sistema.col_user_id, sistema.col_data
+    if cargo in df.columns and not (isinstance(df[cargo].dtype, pd.CategoricalDtype) and df[cargo].cat.ordered):
+        df[cargo] = _categorica(_texto_coluna(df[cargo]), sistema.cargos, ordenada=True)
+    if sit in df.columns and not isinstance(df[sit].dtype, pd.CategoricalDtype):
+        df[sit] = _categorica(_texto_coluna(df[sit]), SITUACOES_CONHECIDAS, ordenada=False)
+    if user_id in df.columns and not isinstance(df[user_id].dtype, pd.Int64Dtype):
+        padrao = sistema.esquema[user_id][1]
+        ids = _ids(_texto_coluna(df[user_id], padrao), padrao)
+        if ids is not None:
+            df[user_id] = ids
+    if data in df.columns and not pd.api.types.is_datetime64_any_dtype(df[data].dtype):
+        datas = _datas(_texto_coluna(df[data]))
+        if datas is not None:
+            df[data] = datas
+    return df
+
+
+def tabela_texto(sistema, df, colunas=None):
+    """As colunas (padrão: todas do sistema) como texto, exatamente como são gravadas."""
+    colunas = sistema.colunas if colunas is None else colunas
+    return pd.DataFrame({c: _texto_coluna(df[c], sistema.esquema[c][1]) for c in colunas}, index=df.index)
+
+
+def registro_tipado(sistema, registro, df):
+    """Registro (dict) com ID e data no tipo das colunas de df, para sobrepor a ele (FilaEscrita.sobrepor)."""
+    registro = dict(registro)
+    uid, data = sistema.col_user_id, sistema.col_data
+    if uid in registro and isinstance(df[uid].dtype, pd.Int64Dtype):
+        texto = _celula(registro[uid], sistema.esquema[uid][1])
+        registro[uid] = int(texto) if texto.isdigit() and texto[0] != '0' else pd.NA
+    elif uid in registro:
+        registro[uid] = _celula(registro[uid], sistema.esquema[uid][1])
+    if data in registro and pd.api.types.is_datetime64_any_dtype(df[data].dtype) and not isinstance(registro[data], pd.Timestamp):
+        registro[data] = pd.to_datetime(_celula(registro[data]) or None, format=FORMATO_DATA, errors='coerce')
+    elif data in registro:
+        registro[data] = _celula(registro[data])
+    return registro
+
+
+def carregar(sistema, armazenamento):
+    return tabela_de_valores(sistema, armazenamento.carregar_valores())
+
+
+def celula(sistema, coluna, valor):
+    """Valor de uma coluna como texto da planilha (ID nulo = 'N/A'), para exibir ou gravar."""
+    return _celula(valor, sistema.esquema[coluna][1])
+
+
+def valores_linha(sistema, registro):
+    """Registro (dict ou Series) como lista de células, na ordem das colunas."""
+    return [_celula(registro[c], sistema.esquema[c][1]) for c in sistema.colunas]
+
+
+def nova_versao():
+    """Token de versão de uma escrita; dois gravadores no mesmo segundo não se confundem (ao contrário do horário)."""
+    return uuid.uuid4().hex[:12]
+
+
+def carimbar(sistema, registro):
+    """Cópia do registro (dict ou Series) com versão nova, como deve ser gravado por esta escrita."""
+    registro = dict(registro)
+    registro[sistema.col_versao] = nova_versao()
+    return registro
+
+
+def diferencas(sistema, df_base, df_novo):
+    """Operações (nucleo.fila.Operacao) que levam df_base a df_novo, comparando as
+    linhas pelo índice: só as linhas alteradas, novas ou removidas, cada
+    alterada ou nova com versão nova (ver carimbar)."""
+    base, novo = tabela_texto(sistema, df_base), tabela_texto(sistema, df_novo)
+    pos_chave, pos_versao = sistema.colunas.index(sistema.col_usuario), sistema.colunas.index(sistema.col_versao)
+    comuns = novo.index.intersection(base.index)
+    alteradas = comuns[(novo.loc[comuns].to_numpy() != base.loc[comuns].to_numpy()).any(axis=1)]
+    novas = novo.index.difference(base.index)
+    removidas = base.index.difference(novo.index)
+
+    def carimbada(acao, depois, registro, antes=None):
+        depois[pos_versao] = registro[sistema.col_versao] = nova_versao()
+        return Operacao(acao, (depois if antes is None else antes)[pos_chave], registro, depois, antes)
+
+    # Linhas convertidas em bloco: .loc linha a linha custa ~1 ms por membro
+    operacoes = [
+        carimbada('atualizar', depois, registro, antes)
+        for antes, depois, registro in zip(base.loc[alteradas].to_numpy().tolist(),
+                                           novo.loc[alteradas].to_numpy().tolist(),
+                                           df_novo.loc[alteradas].to_dict('records'))
+    ]
+    operacoes += [
+        carimbada('anexar', depois, registro)
+        for depois, registro in zip(novo.loc[novas].to_numpy().tolist(), df_novo.loc[novas].to_dict('records'))
+    ]
+    operacoes += [Operacao('remover', antes[pos_chave], anteriores=antes)
+                  for antes in base.loc[removidas].to_numpy().tolist()]
+    return operacoes
+
+
+def linhas_historico(sistema, df_base, df_novo, semana=None, dias_fechamento=0):
+    """Linhas do histórico (nucleo.historico.COLUNAS_HISTORICO) da semana processada de df_base para df_novo.
+
+    Entram as linhas com carimbo de atualização novo (processar a semana
+    sempre carimba), casadas com df_base pelo índice. Sem `semana` (ano,
+    número), vale a semana que o processamento fechou: historico.semana_fechada
+    do carimbo de cada linha, a semana ISO dele salvo dias_fechamento de tolerância.
+    """
+    usuario, uid, cargo, sit, data = (sistema.col_usuario, sistema.col_user_id, sistema.col_cargo,
+                                      sistema.col_sit, sistema.col_data)
+    novo = tabela_texto(sistema, df_novo, [usuario, uid, cargo, sit, sistema.col_semana, sistema.col_total, data])
+    base = tabela_texto(sistema, df_base, [cargo, data]).reindex(novo.index)
+    processadas = novo[data].ne(base[data]) & novo[data].ne('')
+    novo, base = novo[processadas], base[processadas]
+    if semana is None:
+        iso = (pd.to_datetime(novo[data], format=FORMATO_DATA) - pd.Timedelta(days=dias_fechamento)).dt.isocalendar()
+        semanas = iso['year'].astype(str) + '-' + iso['week'].astype(str).str.zfill(2)
+    else:
+        semanas = pd.Series(chave_semana(semana), index=novo.index)
+    return pd.DataFrame({
+        'semana': semanas, 'data': novo[data], 'usuario': novo[usuario], 'user_id': novo[uid],
+        'cargo_anterior': base[cargo].fillna(novo[cargo]), 'cargo': novo[cargo], 'situação': novo[sit],
+        'valor': novo[sistema.col_semana], 'total': novo[sistema.col_total],
+    }, columns=COLUNAS_HISTORICO).to_numpy().tolist()
+
+
+# --- Regras ---
+
+def pontuacao_semana(pontos_base, bonus, mult_ind):
+    return round((pontos_base + bonus) * mult_ind, 1)
+
+
+def processar_semana(sistema, df, lote, agora=None, indice=None):
+    """(df_novo, previa, ignorados) da semana do lote: mensagens no Ups, horas no Call."""
+    if sistema is CALL:
+        return lotes.processar_horas(df, lote, sistema.metas_compiladas, agora=agora, indice=indice)
+    return lotes.processar_lote(df, lote, sistema.metas_compiladas, MENSAGENS_POR_PONTO, agora=agora, indice=indice)
+
+
+def ranking(sistema, df, estilos=None):
+    """Ranking (total, depois cargo) da tabela; estilos = cores da situação, só para a interface."""
+    return Ranking(df, sistema.col_total, sistema.cargos, estilos or {},
+                   sistema.col_usuario, sistema.col_cargo, sistema.col_sit)
+
+
+def classificacao(sistema):
+    """Classificação viva da aba (posição, vizinhos e topo sem ordenar), na ordem do ranking."""
+    return ClassificacaoAba(sistema.col_total, sistema.cargos, sistema.col_usuario, sistema.col_cargo)
+
+
+def exportar(sistema, df, destino, formato='csv'):
+    """Grava um retrato da tabela em CSV ou JSON (lista de registros) no arquivo ou stream `destino`."""
+    tabela = df[sistema.colunas].copy()
+    # ID, cargo, situação e data como na planilha; números continuam números
+    texto = [sistema.col_user_id, sistema.col_cargo, sistema.col_sit, sistema.col_data]
+    tabela[texto] = tabela_texto(sistema, df, texto)
+    if formato == 'json':
+        texto = json.dumps(tabela.to_dict('records'), ensure_ascii=False, indent=2, default=str)
+    else:
+        texto = tabela.to_csv(index=False)
+    if hasattr(destino, 'write'):
+        destino.write(texto)
+    else:
+        with open(destino, 'w', encoding='utf-8', newline='') as arquivo:
+            arquivo.write(texto)
@@ -0,0 +1,261 @@
+"""Acesso à planilha Google: handles reaproveitados e escritas pontuais
+(custo proporcional às linhas alteradas)."""
+import threading
+
+from nucleo import medicao
+
+# O gspread só é importado quando se fala com a planilha (importá-lo custa
+# ~0,3 s, e o app com backend SQLite, a CLI e os benchmarks não precisam dele)
+
+# A linha 1 é o cabeçalho; a posição 0 do DataFrame fica na linha 2 da planilha.
+PRIMEIRA_LINHA_DADOS = 2
+
+
+def linha_da_posicao(posicao):
+    return int(posicao) + PRIMEIRA_LINHA_DADOS
+
+
+def _letra_coluna(col):
+    """Letras A1 da coluna (1 = A, 27 = AA), como gspread.utils.rowcol_to_a1."""
+    letras = ''
+    while col > 0:
+        col, resto = divmod(col - 1, 26)
+        letras = chr(ord('A') + resto) + letras
+    return letras
+
+
+def intervalo_linha(linha, col_inicio, col_fim):
+    return f"{_letra_coluna(col_inicio)}{linha}:{_letra_coluna(col_fim)}{linha}"
+
+
+def intervalos_linha(linha, antiga, nova):
+    """Um intervalo por sequência contígua de células diferentes entre as duas versões da linha."""
+    intervalos = []
+    inicio = None
+    for col in range(len(nova) + 1):
+        mudou = col < len(nova) and (col >= len(antiga) or antiga[col] != nova[col])
+        if mudou and inicio is None:
+            inicio = col
+        elif not mudou and inicio is not None:
+            intervalos.append({'range': intervalo_linha(linha, inicio + 1, col), 'values': [list(nova[inicio:col])]})
+            inicio = None
+    return intervalos
+
+
+# Motivos de recusa devolvidos por aplicar_operacoes
+SEM_LINHA = 'sem_linha'
+CONFLITO = 'conflito'
+
+
+def conferir_versao(op, atual, col_versao):
+    """Compare-and-swap pela versão da linha (coluna col_versao, base 1).
+
+    A versão é um token novo a cada escrita (motor.carimbar), não um horário:
+    duas sessões gravando no mesmo segundo não têm a mesma versão.
+    True = pode gravar; False = outra sessão alterou a linha depois da carga.
+    Sem valores anteriores não há o que comparar (gravação cega, como antes).
+    Se a linha já tem o token desta operação, o lote está sendo repetido e a escrita é idempotente.
+    """
+    if col_versao is None or op.anteriores is None or len(op.anteriores) < col_versao:
+        return True
+    esperado = str(op.anteriores[col_versao - 1])
+    if str(atual) == esperado:
+        return True
+    return op.valores is not None and str(atual) == str(op.valores[col_versao - 1])
+
+
+def mesma_linha(gravada, valores):
+    """Células iguais às de `valores` (número lido como 1 ou 1.0 conta igual; células finais vazias podem faltar)."""
+    gravada = list(gravada) + [''] * (len(valores) - len(gravada))
+    for atual, novo in zip(gravada, valores):
+        if str('' if atual is None else atual) == str(novo):
+            continue
+        try:
+            if float(atual) != float(novo):
+                return False
+        except (TypeError, ValueError):
+            return False
+    return True
+
+
+def aplicar_operacoes(worksheet, operacoes, col_chave=1, col_versao=None, nome_versao=None):
+    """Grava um lote da fila (nucleo.fila.Operacao) localizando as linhas pela chave.
+
+    Lê só a coluna da chave (e a do carimbo de versão, no mesmo batch_get) para
+    achar as linhas atuais (outras sessões podem ter inserido ou apagado linhas)
+    e faz no máximo quatro requisições: leitura, batch_update das células,
+    exclusão das linhas, append.
+    As chaves são resolvidas na ordem do lote, já com as renomeações, remoções
+    e linhas anexadas anteriores dele: renomear A para B e anexar um novo A no
+    mesmo lote cria uma linha nova em vez de reescrever a de B, e atualizar ou
+    remover uma linha anexada no lote altera (ou tira) o que vai no append.
+    Um 'anexar' cuja chave já existe só é aceito se a linha gravada já for igual
+    aos valores dele (o lote está sendo repetido); senão é CONFLITO, sem tocar
+    na linha (só nesse caso há uma leitura a mais, das linhas em questão).
+    Devolve [(operação, motivo)] das que não foram aplicadas: SEM_LINHA (membro
+    apagado por outra sessão) ou CONFLITO (linha alterada depois da carga).
+
+    A API da planilha não tem escrita condicional, então o compare-and-swap
+    aqui não é atômico: uma sessão que grave a mesma linha entre o batch_get
+    das versões e o batch_update deste lote (tipicamente algumas centenas de
+    ms) é sobrescrita sem aviso. Fora dessa janela o conflito é sempre
+    detectado. O ArmazenamentoSQLite não tem a janela (tudo numa transação).
+    Com nome_versao, a célula de cabeçalho da coluna de versão é gravada junto
+    se ainda não tiver esse nome (planilha de antes da coluna existir).
+    """
+    if col_versao is None:
+        chaves, versoes = worksheet.col_values(col_chave), []
+    else:
+        faixas = [f'{_letra_coluna(c)}1:{_letra_coluna(c)}' for c in (col_chave, col_versao)]
+        chaves, versoes = [(v[0] if v else []) for v in worksheet.batch_get(faixas, major_dimension='COLUMNS')]
+    cabecalho_versao = str(versoes[0]) if versoes else ''
+    posicoes = {}
+    for pos, chave in enumerate(chaves[1:]):
+        posicoes.setdefault(str(chave), pos)
+    versoes = list(versoes[1:])
+    intervalos, remover, anexar, recusadas, existentes = [], set(), [], [], []
+    novas = {}  # posição de uma linha anexada neste lote -> índice dela em anexar
+    for op in operacoes:
+        pos = posicoes.get(op.chave)
+        if op.acao == 'anexar':
+            if pos is None:
+                pos = max(len(chaves) - 1, 0) + len(anexar)
+                novas[pos] = len(anexar)
+                anexar.append(list(op.valores))
+                posicoes[op.chave] = pos
+            elif pos in novas:
+                if not mesma_linha(anexar[novas[pos]], op.valores):
+                    recusadas.append((op, CONFLITO))
+            else:
+                existentes.append((op, pos))
+            continue
+        if pos is None:
+            if op.acao != 'remover':
+                recusadas.append((op, SEM_LINHA))
+            continue
+        nova = novas.get(pos)
+        if nova is not None:
+            atual = anexar[nova][col_versao - 1] if col_versao and len(anexar[nova]) >= col_versao else ''
+        else:
+            atual = versoes[pos] if pos < len(versoes) else ''
+        if not conferir_versao(op, atual, col_versao):
+            recusadas.append((op, CONFLITO))
+            continue
+        if op.acao == 'remover':
+            if nova is not None:
+                anexar[nova] = None
+            else:
+                remover.add(pos)
+            del posicoes[op.chave]
+            continue
+        if nova is not None:
+            # A linha ainda não existe na planilha: o append já leva os valores novos
+            anexar[nova] = list(op.valores)
+        elif op.anteriores is not None:
+            intervalos += intervalos_linha(linha_da_posicao(pos), op.anteriores, op.valores)
+        else:
+            linha = linha_da_posicao(pos)
+            intervalos.append({'range': intervalo_linha(linha, 1, len(op.valores)), 'values': [list(op.valores)]})
+        nome = str(op.valores[col_chave - 1])
+        if nome != op.chave:
+            del posicoes[op.chave]
+            posicoes[nome] = pos
+    anexar = [linha for linha in anexar if linha is not None]
+    if existentes:
+        gravadas = worksheet.batch_get([intervalo_linha(linha_da_posicao(pos), 1, len(op.valores))
+                                        for op, pos in existentes])
+        for (op, _), linhas in zip(existentes, gravadas):
+            if not mesma_linha(linhas[0] if linhas else [], op.valores):
+                recusadas.append((op, CONFLITO))
+    if nome_versao and col_versao and cabecalho_versao != nome_versao and (intervalos or anexar):
+        intervalos.append({'range': f'{_letra_coluna(col_versao)}1', 'values': [[nome_versao]]})
+    if intervalos:
+        worksheet.batch_update(intervalos)
+    if remover:
+        # De baixo para cima, para as posições lidas continuarem válidas
+        worksheet.spreadsheet.batch_update({'requests': [
+            {'deleteDimension': {'range': {'sheetId': worksheet.id, 'dimension': 'ROWS',
+                                           'startIndex': linha_da_posicao(pos) - 1, 'endIndex': linha_da_posicao(pos)}}}
+            for pos in sorted(remover, reverse=True)
+        ]})
+    if anexar:
+        worksheet.append_rows(anexar, table_range='A1')
+    return recusadas
+
+
+def reescrever_tabela(worksheet, cabecalho, linhas):
+    """Caminho antigo (clear + update a partir de A1); usado no reset da tabela."""
+    with medicao.fase('salvar.limpar'):
+        worksheet.clear()
+    with medicao.fase('salvar.escrever', linhas=len(linhas)):
+        worksheet.update(range_name='A1', values=[list(cabecalho)] + [list(l) for l in linhas])
+
+
+def _handle_invalido(erro):
+    """401 = credencial expirada; 404 / range inválido = aba apagada ou renomeada."""
+    from gspread.exceptions import APIError, WorksheetNotFound
+    if isinstance(erro, WorksheetNotFound):
+        return True
+    if isinstance(erro, APIError):
+        status = getattr(erro.response, 'status_code', None)
+        return status in (401, 404) or (status == 400 and 'Unable to parse range' in str(erro))
+    return False
+
+
+class CacheWorksheets:
+    """Mantém o Spreadsheet e os Worksheets já resolvidos, por nome de aba.
+
+    Sem cache, cada leitura/escrita gastava duas requisições de metadados
+    (open_by_url + worksheet) antes da requisição de dados. Os handles só são
+    reabertos quando a credencial expira ou a aba deixa de existir.
+    """
+
+    def __init__(self, obter_cliente, spreadsheet_url, renovar_cliente=None):
+        self.obter_cliente = obter_cliente
+        self.spreadsheet_url = spreadsheet_url
+        self.renovar_cliente = renovar_cliente
+        self._spreadsheet = None
+        self._worksheets = {}
+        self._lock = threading.Lock()
+
+    def worksheet(self, nome):
+        with self._lock:
+            if nome not in self._worksheets:
+                if self._spreadsheet is None:
+                    self._spreadsheet = self.obter_cliente().open_by_url(self.spreadsheet_url)
+                self._worksheets[nome] = self._spreadsheet.worksheet(nome)
+            return self._worksheets[nome]
+
+    def garantir(self, nome, cabecalho, linhas=1000):
+        """Worksheet da aba; se ainda não existir, cria com o cabeçalho na linha 1."""
+        from gspread.exceptions import WorksheetNotFound
+        try:
+            return self.worksheet(nome)
+        except WorksheetNotFound:
+            with self._lock:
+                worksheet = self._spreadsheet.add_worksheet(nome, rows=linhas, cols=len(cabecalho))
+                worksheet.update(range_name='A1', values=[list(cabecalho)])
+                self._worksheets[nome] = worksheet
+            return worksheet
+
+    def invalidar(self, nome=None):
+        with self._lock:
+            if nome is None:
+                self._spreadsheet = None
+                self._worksheets.clear()
+            else:
+                self._worksheets.pop(nome, None)
+
+    def executar(self, nome, operacao):
+        """Roda operacao(worksheet); em handle inválido reabre e tenta uma vez mais."""
+        from gspread.exceptions import APIError, WorksheetNotFound
+        try:
+            return operacao(self.worksheet(nome))
+        except (APIError, WorksheetNotFound) as e:
+            if not _handle_invalido(e):
+                raise
+            expirou = isinstance(e, APIError) and getattr(e.response, 'status_code', None) == 401
+            if expirou and self.renovar_cliente is not None:
+                self.renovar_cliente()
+            self.invalidar(None if expirou or isinstance(e, WorksheetNotFound) else nome)
+            return operacao(self.worksheet(nome))
@@ -0,0 +1,77 @@
+"""Ranking ordenado e pré-estilizado, montado uma vez por versão dos dados.
+
+A cada execução só a página visível é fatiada e estilizada, então o custo
+de renderizar não cresce com o número de membros. O ranking guarda só a
+ordem, o estilo e o nome para o filtro: as colunas da página vêm da tabela
+original (a do retrato), sem uma segunda cópia dela por versão.
+"""
+import numpy as np
+import pandas as pd
+
+COL_ESTILO = '_estilo'
+COL_BUSCA = '_busca'
+COL_LINHA = '_linha'
+
+
+def ordinal_cargos(cargo, cargos):
+    """Posição de cada cargo na lista (do menor para o maior); -1 para cargo desconhecido."""
+    if isinstance(cargo.dtype, pd.CategoricalDtype) and list(cargo.cat.categories[:len(cargos)]) == list(cargos):
+        # Categórico na ordem dos cargos: o código já é a posição (cargos fora da lista ficam em -1)
+        codigos = cargo.cat.codes.to_numpy()
+        return np.where(codigos < len(cargos), codigos, -1)
+    return cargo.map({c: i for i, c in enumerate(cargos)}).fillna(-1).to_numpy()
+
+
+class Ranking:
+
+    def __init__(self, df, col_total, cargos, estilos, col_usuario='usuario', col_cargo='cargo', col_sit='situação'):
+        """estilos: {'UPADO': css, 'REBAIXADO': css, 'MANTEVE': css}, testados nessa ordem
+        como substring da situação (mesma regra do Styler.map antigo)."""
+        self.col_usuario = col_usuario
+        self.col_sit = col_sit
+        self.df = df
+        rank_cargo = ordinal_cargos(df[col_cargo], cargos)
+        total = pd.to_numeric(df[col_total], errors='coerce').fillna(0).to_numpy()
+        # Total desc, depois cargo desc (np.lexsort usa a última chave como principal)
+        ordem = np.lexsort((-rank_cargo, -total))
+        posicoes = pd.RangeIndex(1, len(df) + 1, name='#')
+
+        situacao = pd.Series(df[col_sit].astype(str).to_numpy()[ordem], index=posicoes)
+        estilo = pd.Series('', index=posicoes, dtype=object)
+        for chave, css in reversed(list(estilos.items())):
+            estilo = estilo.mask(situacao.str.contains(chave, regex=False), css)
+        busca = df[col_usuario].astype(str).str.casefold().to_numpy()[ordem]
+        self.tabela = pd.DataFrame({COL_LINHA: ordem, COL_ESTILO: estilo, COL_BUSCA: busca}, index=posicoes)
+
+    def __len__(self):
+        return len(self.tabela)
+
+    def memoria(self):
+        """Bytes do ranking além da tabela original (ordem, estilos e nomes do filtro)."""
+        return int(self.tabela.memory_usage(index=True, deep=True).sum())
+
+    def dados(self, linhas):
+        """Colunas da tabela original para as `linhas` do ranking (de filtrar ou fatias dele), com a posição no índice."""
+        dados = self.df.iloc[linhas[COL_LINHA].to_numpy()]
+        dados.index = linhas.index
+        return dados
+
+    def filtrar(self, texto):
+        """Linhas cujo nome contém o texto (sem diferenciar maiúsculas); posição no ranking preservada."""
+        texto = (texto or '').strip().casefold()
+        if not texto:
+            return self.tabela
+        return self.tabela[self.tabela[COL_BUSCA].str.contains(texto, regex=False)]
+
+    @staticmethod
+    def total_paginas(linhas, tamanho):
+        return max(1, -(-len(linhas) // tamanho))
+
+    def pagina(self, linhas, numero, tamanho):
+        """Fatia da página `numero` (1 = topo) já com o Styler aplicado."""
+        inicio = (int(numero) - 1) * tamanho
+        fatia = linhas.iloc[inicio:inicio + tamanho]
+        estilos = fatia[COL_ESTILO].to_numpy()
+        return (self.dados(fatia).style
+                .apply(lambda _: estilos, subset=[self.col_sit])
+                .format(precision=1))
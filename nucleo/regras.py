@@ -0,0 +1,49 @@
+"""Motor de UP/MANTER/REBAIXAR vetorizado sobre as tabelas de metas.
+
+As metas viram arrays NumPy indexados pelo ordinal do cargo (posição em
+CARGOS_LISTA), e a tabela inteira é avaliada de uma vez.
+"""
+import numpy as np
+
+SITUACOES = np.array(['REBAIXADO', 'MANTEVE', 'UPADO'], dtype=object)
+REBAIXADO, MANTEVE, UPADO = 0, 1, 2
+
+
+class MetasCompiladas:
+    """METAS_PONTUACAO / METAS_CALL em arrays ordenados por ordinal do cargo."""
+
+    def __init__(self, metas, cargos):
+        self.cargos = np.asarray(cargos, dtype=object)
+        self.ordinal = {c: i for i, c in enumerate(cargos)}
+        self.meta_up = np.array([metas[c]['meta_up'] for c in cargos], dtype=np.float64)
+        self.meta_manter = np.array([metas[c]['meta_manter'] for c in cargos], dtype=np.float64)
+
+    def ordinais(self, cargos):
+        """Ordinal de cada cargo; -1 para cargo desconhecido (avaliar recusa: filtrar antes, como o lote faz)."""
+        return np.array([self.ordinal.get(c, -1) for c in cargos], dtype=np.intp)
+
+    def avaliar(self, ordinais, pontos):
+        """Avalia a tabela toda: devolve (códigos de situação, novos ordinais).
+
+        Códigos: 0 = REBAIXADO, 1 = MANTEVE, 2 = UPADO (SITUACOES[codigo] dá o texto).
+        O novo cargo sobe/desce um nível, preso entre o primeiro (f*ck) e o último (Light).
+        Ordinal fora da lista (cargo desconhecido) levanta ValueError em vez de
+        cair na meta de outro cargo pelo índice negativo.
+        """
+        ordinais = np.asarray(ordinais, dtype=np.intp)
+        desconhecidos = (ordinais < 0) | (ordinais >= len(self.cargos))
+        if desconhecidos.any():
+            raise ValueError(f"{int(desconhecidos.sum())} linha(s) com cargo desconhecido "
+                             f"(ordinal fora de 0..{len(self.cargos) - 1})")
+        pontos = np.asarray(pontos, dtype=np.float64)
+        codigos = np.where(pontos >= self.meta_up[ordinais], UPADO,
+                           np.where(pontos >= self.meta_manter[ordinais], MANTEVE, REBAIXADO)).astype(np.int8)
+        novos = np.clip(ordinais + codigos - 1, 0, len(self.cargos) - 1)
+        return codigos, novos
+
+    def avaliar_membro(self, cargo, pontos):
+        """Versão de um membro só: devolve (situação, novo cargo)."""
+        if cargo not in self.ordinal:
+            raise ValueError(f"Cargo desconhecido: {cargo!r}")
+        codigos, novos = self.avaliar([self.ordinal[cargo]], [pontos])
+        return SITUACOES[codigos[0]], self.cargos[novos[0]]
@@ -0,0 +1,256 @@
+"""Retratos imutáveis das abas, um por aba no processo, trocados a cada gravação.
+
+Com st.cache_data cada sessão recebia a sua cópia (desserializada) da tabela
+inteira. Aqui o processo guarda um único Retrato por aba (versão + DataFrame)
+e todas as sessões leem o mesmo objeto. Ninguém altera um retrato publicado:
+uma versão nova entra como outro Retrato, trocado de uma vez sob o lock, e
+quem ainda segura o antigo continua com uma tabela consistente.
+
+Cada troca incrementa a geração da aba; as sessões guardam a geração (e a
+versão) que exibiram e recarregam quando uma delas muda.
+
+Quando a versão muda, todas as sessões abertas recarregam ao mesmo tempo.
+A leitura é de voo único: a primeira sessão lê, as outras esperam o mesmo
+Future e recebem o mesmo retrato (uma leitura por versão, não uma por
+sessão). Com em_fundo, quem já tem um retrato nem espera: recebe o antigo
+enquanto a leitura corre numa thread (stale-while-revalidate).
+
+Leitores que precisam alterar o DataFrame fazem df.copy(deep=False): com
+copy-on-write (padrão no pandas 3, ligado aqui nas versões anteriores) a
+cópia não duplica as colunas, e a escrita copia só o que mudou.
+
+Com várias guildas no processo, o repositório pode ter limite de abas e de
+memória: passando dele, os retratos usados há mais tempo saem (LRU). Quem
+ainda segura um retrato despejado continua com ele; a próxima leitura da
+aba simplesmente lê de novo.
+
+O que é montado a partir de um retrato (índice, ranking, classificação)
+fica guardado nele (derivado) e conta no mesmo limite: sai da memória junto
+com o retrato. Memória de fora dos retratos, como o índice do histórico,
+entra no mesmo limite e na mesma ordem com cobrar().
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import pandas as pd
+
+from nucleo import medicao
+
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+
+class Retrato:
+    """Tabela de uma aba numa versão; não alterar `df`."""
+    __slots__ = ('nome', 'versao', 'df', 'geracao', 'instante', 'bytes', '_derivados')
+
+    def __init__(self, nome, versao, df, geracao, instante):
+        self.nome = nome
+        self.versao = versao
+        self.df = df
+        self.geracao = geracao
+        self.instante = instante
+        self.bytes = tamanho(df)
+        self._derivados = {}  # rótulo -> (chave, objeto, bytes)
+
+    def __repr__(self):
+        return f'Retrato({self.nome!r}, versao={self.versao!r}, linhas={len(self.df)}, geracao={self.geracao})'
+
+
+class Consumo:
+    """Memória de fora dos retratos cobrada no limite do repositório; liberar() é chamado no despejo."""
+    __slots__ = ('nome', 'bytes', 'liberar')
+
+    def __init__(self, nome, bytes_, liberar):
+        self.nome = nome
+        self.bytes = bytes_
+        self.liberar = liberar
+
+
+def tamanho(df):
+    """Memória do DataFrame em bytes (com o conteúdo das colunas de texto)."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class RepositorioRetratos:
+
+    def __init__(self, relogio=time.time, limite_bytes=None, limite_abas=None):
+        self.relogio = relogio
+        self.limite_bytes = limite_bytes
+        self.limite_abas = limite_abas
+        self._lock = threading.Lock()
+        self._retratos = OrderedDict()  # do usado há mais tempo ao mais recente
+        self._bytes = 0
+        self._geracoes = {}
+        self._em_voo = {}     # (nome, versao) -> Future da leitura em andamento
+        self._sequencia = 0   # ordem de início das leituras
+        self._publicada = {}  # nome -> sequência da leitura do retrato atual
+
+    def atual(self, nome):
+        """Último retrato publicado da aba (a última leitura boa), ou None."""
+        with self._lock:
+            retrato = self._retratos.get(nome)
+            if not isinstance(retrato, Retrato):
+                return None
+            self._retratos.move_to_end(nome)
+            return retrato
+
+    def uso(self):
+        """(abas em memória, bytes) dos retratos guardados, com o que foi montado a partir deles e o cobrado."""
+        with self._lock:
+            return self._abas(), self._bytes
+
+    def _abas(self):
+        return sum(isinstance(r, Retrato) for r in self._retratos.values())
+
+    def derivado(self, nome, rotulo, chave, construir, medir=None):
+        """Objeto montado a partir do retrato atual da aba (índice, ranking...), guardado junto com ele.
+
+        Um por rótulo: com outra `chave`, construir() monta de novo e o novo
+        substitui o guardado. medir(objeto) dá os bytes que entram no limite;
+        o objeto sai da memória com o retrato. Sem retrato da aba, só monta.
+        """
+        with self._lock:
+            retrato = self._retratos.get(nome)
+            if not isinstance(retrato, Retrato):
+                retrato = None
+            else:
+                guardado = retrato._derivados.get(rotulo)
+                if guardado is not None and guardado[0] == chave:
+                    self._retratos.move_to_end(nome)
+                    return guardado[1]
+        objeto = construir()
+        if retrato is None:
+            return objeto
+        bytes_ = int(medir(objeto)) if medir is not None else 0
+        with self._lock:
+            if self._retratos.get(nome) is not retrato:
+                return objeto  # trocado ou despejado enquanto montava: não guarda em retrato que saiu
+            anterior = retrato._derivados.get(rotulo)
+            retrato._derivados[rotulo] = (chave, objeto, bytes_)
+            self._cobrar(retrato, bytes_ - (anterior[2] if anterior is not None else 0))
+            self._retratos.move_to_end(nome)
+            despejados = self._despejar()
+        self._liberar(despejados)
+        return objeto
+
+    def cobrar(self, nome, bytes_, liberar):
+        """Conta `bytes_` de memória de fora dos retratos (ex.: índice do histórico) no limite, como usada agora.
+
+        Chamar de novo com o mesmo nome atualiza o tamanho. Se sair no
+        despejo, liberar() é chamado (quem a usava monta de novo quando precisar).
+        Com outro liberar no mesmo nome (o dono foi recriado), o anterior é
+        chamado na hora: a memória do dono antigo não fica sem conta.
+        """
+        with self._lock:
+            consumo = self._retratos.get(nome)
+            if not isinstance(consumo, Consumo):
+                consumo = self._retratos[nome] = Consumo(nome, 0, liberar)
+            substituido = consumo.liberar if consumo.liberar != liberar else None
+            consumo.liberar = liberar
+            self._cobrar(consumo, int(bytes_) - consumo.bytes)
+            self._retratos.move_to_end(nome)
+            despejados = self._despejar()
+        if substituido is not None:
+            self._liberar([Consumo(nome, 0, substituido)])
+        self._liberar(despejados)
+
+    def _cobrar(self, entrada, bytes_):
+        entrada.bytes += bytes_
+        self._bytes += bytes_
+
+    def geracao(self, nome):
+        with self._lock:
+            return self._geracoes.get(nome, 0)
+
+    def obter(self, nome, versao, carregar, em_fundo=False):
+        """Retrato da aba na `versao`; se o atual for de outra versão, carregar() monta a tabela e ela é publicada.
+
+        Chamadas simultâneas para a mesma versão compartilham uma só
+        chamada a carregar(). Erros sobem para todas elas e o retrato atual
+        fica como está. Com em_fundo e um retrato já publicado, devolve esse
+        na hora e lê a versão nova numa thread (carregar não pode depender
+        do contexto da sessão).
+        """
+        retrato = self.atual(nome)
+        if retrato is not None and retrato.versao == versao:
+            return retrato
+        futuro, dono = self._reservar(nome, versao)
+        if em_fundo and retrato is not None:
+            if dono:
+                threading.Thread(target=self._ler, args=(nome, versao, carregar, futuro), daemon=True,
+                                 name=f'retrato-{nome}').start()
+            return retrato
+        if dono:
+            self._ler(nome, versao, carregar, futuro)
+        return futuro.result()
+
+    def _reservar(self, nome, versao):
+        """(Future da leitura de nome/versão, True se quem chamou é quem deve ler)."""
+        with self._lock:
+            futuro = self._em_voo.get((nome, versao))
+            if futuro is not None:
+                return futuro, False
+            futuro = self._em_voo[(nome, versao)] = Future()
+            self._sequencia += 1
+            futuro.sequencia = self._sequencia
+            return futuro, True
+
+    def _ler(self, nome, versao, carregar, futuro):
+        try:
+            futuro.set_result(self.publicar(nome, versao, carregar(), futuro.sequencia))
+        except Exception as e:
+            medicao.registrar_log('retrato', logging.WARNING, aba=nome, erro=str(e))
+            futuro.set_exception(e)
+        finally:
+            with self._lock:
+                self._em_voo.pop((nome, versao), None)
+
+    def publicar(self, nome, versao, df, sequencia=None):
+        """Troca o retrato da aba (e a geração, para as sessões abertas recarregarem).
+
+        Uma leitura que começou antes da do retrato atual e terminou depois
+        dela não o substitui: devolve o atual.
+        """
+        with self._lock:
+            if sequencia is not None and sequencia < self._publicada.get(nome, 0):
+                return self._retratos[nome]
+            geracao = self._geracoes.get(nome, 0) + 1
+            retrato = Retrato(nome, versao, df, geracao, self.relogio())
+            anterior = self._retratos.pop(nome, None)
+            self._bytes += retrato.bytes - (anterior.bytes if anterior is not None else 0)
+            self._retratos[nome] = retrato
+            self._geracoes[nome] = geracao
+            if sequencia is not None:
+                self._publicada[nome] = sequencia
+            despejados = self._despejar()
+        self._liberar(despejados)
+        return retrato
+
+    @staticmethod
+    def _liberar(despejados):
+        # Fora do lock: liberar() é código de quem cobrou
+        for velho in despejados:
+            medicao.registrar_log('retrato.despejo', logging.INFO, aba=velho.nome, bytes=velho.bytes)
+            if isinstance(velho, Consumo):
+                try:
+                    velho.liberar()
+                except Exception as e:
+                    medicao.registrar_log('retrato.liberar', logging.ERROR, aba=velho.nome, erro=str(e))
+
+    def _despejar(self):
+        """Tira os retratos (e consumos) usados há mais tempo até caber nos limites (o mais recente sempre fica)."""
+        despejados = []
+        abas = self._abas()
+        while len(self._retratos) > 1 and (
+                (self.limite_abas is not None and abas > self.limite_abas)
+                or (self.limite_bytes is not None and self._bytes > self.limite_bytes)):
+            nome, velho = self._retratos.popitem(last=False)
+            self._bytes -= velho.bytes
+            self._publicada.pop(nome, None)
+            abas -= isinstance(velho, Retrato)
+            despejados.append(velho)
+        return despejados
@@ -0,0 +1,99 @@
+"""Versão dos dados por aba, usada como chave do cache de carregar_dados.
+
+A versão junta um contador incrementado pelas nossas próprias escritas com um
+contador de mudanças externas: vezes em que a revisão do backend (modifiedTime
+da planilha, PRAGMA data_version do SQLite), consultada só a cada `intervalo`
+segundos, veio diferente da última conhecida. Enquanto nada muda, a chave
+do cache fica igual e nenhuma leitura é feita.
+
+As nossas gravações passam por gravacao(): a revisão que elas mesmas causam
+é registrada como já vista, então cada escrita nossa provoca uma recarga só
+(pelo contador), e gravar numa aba não invalida as outras da mesma planilha.
+"""
+import threading
+import time
+
+
+class ControleVersoes:
+
+    def __init__(self, relogio=time.monotonic):
+        self.relogio = relogio
+        self._lock = threading.Lock()
+        self._locais = {}
+        self._externas = {}  # última revisão conhecida
+        self._mudancas = {}
+        self._ultima_sonda = {}
+        self._origens = {}
+
+    def versao(self, nome, sonda=None, intervalo=30.0, origem=None):
+        """Versão atual de `nome`; chama sonda() (revisão externa) no máximo uma vez por intervalo.
+
+        origem: o que a revisão mede (a URL da planilha, cujo modifiedTime é um
+        só para todas as abas); None quando cada aba tem a sua."""
+        agora = self.relogio()
+        if origem is not None:
+            with self._lock:
+                self._origens[nome] = origem
+        if sonda is not None:
+            with self._lock:
+                vencida = agora - self._ultima_sonda.get(nome, float('-inf')) >= intervalo
+                if vencida:
+                    self._ultima_sonda[nome] = agora
+            if vencida:
+                revisao = self._sondar(sonda)
+                with self._lock:
+                    self._conhecer(nome, revisao)
+        with self._lock:
+            return (self._locais.get(nome, 0), self._mudancas.get(nome, 0))
+
+    def _conhecer(self, nome, revisao):
+        # Revisão nova = mudança externa; None (falha na sonda) mantém a última conhecida
+        if revisao is None:
+            return
+        if nome in self._externas and self._externas[nome] != revisao:
+            self._mudancas[nome] = self._mudancas.get(nome, 0) + 1
+        self._externas[nome] = revisao
+
+    def incrementar(self, nome):
+        """Marca uma escrita nossa em `nome` (invalida só o cache dessa aba)."""
+        with self._lock:
+            self._locais[nome] = self._locais.get(nome, 0) + 1
+            return self._locais[nome]
+
+    @staticmethod
+    def _sondar(sonda):
+        try:
+            return sonda()
+        except Exception:
+            return None
+
+    def gravacao(self, gravar, sonda, nome=None, origem=None):
+        """gravar embrulhado para que a mudança de revisão que ele causa não conte como externa.
+
+        Depois de cada gravação bem-sucedida incrementa `nome` (a aba gravada;
+        None para abas sem retrato, como o histórico) e guarda a revisão lida
+        logo depois como a conhecida dela: a recarga que o incremento provoca lê
+        a aba inteira, inclusive o que outro processo tenha gravado junto. As
+        outras abas da mesma `origem` ficam com a revisão nova só se estavam na
+        de logo antes da gravação (sem mudança externa ainda não vista).
+        Custo: uma sonda depois de cada gravação, e outra antes quando há outras
+        abas da mesma origem (na planilha, modifiedTime pelo Drive).
+        """
+        def gravar_absorvendo(*args, **kwargs):
+            with self._lock:
+                outras = [n for n, o in self._origens.items() if origem is not None and o == origem and n != nome]
+            antes = self._sondar(sonda) if outras else None
+            resultado = gravar(*args, **kwargs)
+            depois = self._sondar(sonda)
+            with self._lock:
+                if nome is not None:
+                    self._locais[nome] = self._locais.get(nome, 0) + 1
+                    if depois is not None:
+                        self._externas[nome] = depois
+                        self._ultima_sonda[nome] = self.relogio()
+                if antes is not None and depois is not None:
+                    for outra in outras:
+                        if self._externas.get(outra) == antes:
+                            self._externas[outra] = depois
+            return resultado
+        return gravar_absorvendo
@@ -0,0 +1,147 @@
+"""Horas em call por membro e semana ISO a partir de logs de eventos de voz.
+
+Cada evento (NDJSON, um por linha, em ordem cronológica) tem user_id,
+timestamp e type: 'join', 'leave' ou 'move'. Sem 'type', channel_id nulo
+vale como saída e preenchido como entrada. Os eventos são lidos em fluxo
+(nucleo.fluxo) e pareados em sessões por membro; as sessões de cada membro
+são ordenadas e fundidas (O(n log n)), cortadas nas viradas de semana e somadas.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from nucleo import fluxo
+from nucleo.lote import COLUNAS_LOTE_CALL
+
+ENTRADA = 'join'
+SAIDA = 'leave'
+TROCA = 'move'
+
+# Sessão sem par (leave perdido, log cortado) conta no máximo isto
+DURACAO_MAXIMA = 12 * 3600.0
+
+
+def ler_eventos(arquivo, nome_arquivo=''):
+    """Gerador dos eventos (dicts) do arquivo; JSON com lista no topo ou em "events" também serve."""
+    return fluxo.ler_registros(arquivo, nome_arquivo, chave_lista='events')
+
+
+def instante(valor, fuso=timezone.utc):
+    """Segundos desde a época: ISO 8601 (sem fuso = `fuso`) ou número em s/ms."""
+    if isinstance(valor, (int, float)):
+        return valor / 1000.0 if valor > 1e11 else float(valor)
+    data = datetime.fromisoformat(str(valor).replace('Z', '+00:00'))
+    if data.tzinfo is None:
+        data = data.replace(tzinfo=fuso)
+    return data.timestamp()
+
+
+def ler_evento(evento, fuso=timezone.utc):
+    """(user_id, instante, tipo) do evento, ou None se faltar membro/horário ou o tipo for outro."""
+    usuario = evento.get('user_id')
+    if usuario is None and isinstance(evento.get('user'), dict):
+        usuario = evento['user'].get('id')
+    timestamp = evento.get('timestamp')
+    if usuario in (None, '') or timestamp in (None, ''):
+        return None
+    tipo = str(evento.get('type') or evento.get('event') or '').lower()
+    if not tipo:
+        tipo = SAIDA if evento.get('channel_id') is None else ENTRADA
+    if tipo not in (ENTRADA, SAIDA, TROCA):
+        return None
+    return str(usuario), instante(timestamp, fuso), tipo
+
+
+def montar_sessoes(eventos, fuso=timezone.utc, fim=None, duracao_maxima=DURACAO_MAXIMA):
+    """{user_id: [(inicio, fim)]} pareando entradas e saídas numa passada.
+
+    'move' só troca de canal (a sessão continua); 'move' sem entrada vista
+    abre a sessão. Uma saída sem entrada (membro já estava na call quando o
+    log começou) conta desde o primeiro evento do log, e uma sessão ainda
+    aberta no fim fecha em `fim` (padrão: último evento); ambas limitadas a
+    `duracao_maxima`, assim como uma entrada repetida sem saída no meio.
+    """
+    abertas, sessoes = {}, defaultdict(list)
+    primeiro = ultimo = None
+    for evento in eventos:
+        lido = ler_evento(evento, fuso)
+        if lido is None:
+            continue
+        usuario, t, tipo = lido
+        primeiro = t if primeiro is None else min(primeiro, t)
+        ultimo = t if ultimo is None else max(ultimo, t)
+        inicio = abertas.get(usuario)
+        if tipo == SAIDA:
+            if inicio is None:
+                inicio = max(primeiro, t - duracao_maxima)
+            else:
+                del abertas[usuario]
+            if t > inicio:
+                sessoes[usuario].append((inicio, min(t, inicio + duracao_maxima)))
+        elif inicio is None:
+            abertas[usuario] = t
+        elif tipo == ENTRADA and t - inicio > duracao_maxima:
+            # Saída perdida: fecha a sessão antiga no limite e abre outra
+            sessoes[usuario].append((inicio, inicio + duracao_maxima))
+            abertas[usuario] = t
+    corte = fim if fim is not None else ultimo
+    for usuario, inicio in abertas.items():
+        termino = min(corte, inicio + duracao_maxima)
+        if termino > inicio:
+            sessoes[usuario].append((inicio, termino))
+    return sessoes
+
+
+def fundir(intervalos):
+    """Intervalos ordenados e sem sobreposição (duas conexões ao mesmo tempo contam uma vez)."""
+    fundidos = []
+    for inicio, fim in sorted(intervalos):
+        if fundidos and inicio <= fundidos[-1][1]:
+            if fim > fundidos[-1][1]:
+                fundidos[-1][1] = fim
+        else:
+            fundidos.append([inicio, fim])
+    return fundidos
+
+
+def _inicio_semana(t, fuso):
+    data = datetime.fromtimestamp(t, fuso)
+    return (data - timedelta(days=data.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def cortar_por_semana(inicio, fim, fuso=timezone.utc):
+    """[((ano, semana), segundos)] do intervalo, dividido nas segundas-feiras 00:00 do fuso."""
+    partes = []
+    segunda = _inicio_semana(inicio, fuso)
+    while inicio < fim:
+        proxima = (segunda + timedelta(days=7)).timestamp()
+        semana = tuple(segunda.isocalendar()[:2])
+        partes.append((semana, min(fim, proxima) - inicio))
+        inicio, segunda = proxima, segunda + timedelta(days=7)
+    return partes
+
+
+def horas_por_semana(eventos, fuso=timezone.utc, fim=None, duracao_maxima=DURACAO_MAXIMA):
+    """{(ano, semana): {user_id: horas}} a partir do gerador de eventos."""
+    horas = defaultdict(lambda: defaultdict(float))
+    for usuario, intervalos in montar_sessoes(eventos, fuso, fim, duracao_maxima).items():
+        for inicio, termino in fundir(intervalos):
+            for semana, segundos in cortar_por_semana(inicio, termino, fuso):
+                horas[semana][usuario] += segundos / 3600.0
+    return {semana: dict(por_membro) for semana, por_membro in horas.items()}
+
+
+def lote_da_semana(horas, semana, user_ids=None):
+    """Lote no formato de lote.COLUNAS_LOTE_CALL para lote.processar_horas (casado pelo user_id).
+
+    Com `user_ids` (IDs da tabela de membros), quem não esteve em call entra com 0 horas.
+    """
+    por_membro = dict(horas.get(tuple(semana), {}))
+    for user_id in (user_ids if user_ids is not None else []):
+        por_membro.setdefault(str(user_id), 0.0)
+    lote = pd.DataFrame({'user_id': list(por_membro.keys()), 'horas': list(por_membro.values())},
+                        columns=['user_id', 'horas']).reindex(columns=COLUNAS_LOTE_CALL)
+    lote['usuario'] = ''
+    lote['horas'] = lote['horas'].astype(float)
+    return lote
@@ -0,0 +1,48 @@
+"""Fixtures dos testes: planilha falsa (benchmarks.falso_gspread) e SQLite em memória, sem rede."""
+import pytest
+
+from benchmarks.falso_gspread import ClienteFalso, PlanilhaFalsa
+from nucleo import motor
+from nucleo.armazenamento import ArmazenamentoSQLite, ArmazenamentoSheets
+from nucleo.planilha import CacheWorksheets
+
+UPS = motor.UPS
+URL_FALSA = 'https://docs.google.com/spreadsheets/d/falsa'
+
+
+def linha(usuario, sistema=UPS, **valores):
+    """Células de um membro (texto, na ordem das colunas) com os padrões do esquema e versão nova."""
+    registro = {c: padrao for c, (_, padrao) in sistema.esquema.items()}
+    registro.update(valores, usuario=usuario)
+    return motor.valores_linha(sistema, motor.carimbar(sistema, registro))
+
+
+def membros():
+    return [
+        linha('alice', user_id='101', cargo=UPS.cargos[3], Pontos_Total_Final=50.0),
+        linha('bob', user_id='102', cargo=UPS.cargos[1], Pontos_Total_Final=80.0),
+        linha('carol', user_id='103', cargo=UPS.cargos[5], Pontos_Total_Final=50.0),
+        linha('davi', cargo=UPS.cargos[0], Pontos_Total_Final=10.0),
+    ]
+
+
+@pytest.fixture
+def planilha():
+    return PlanilhaFalsa({UPS.aba: [list(UPS.colunas)] + membros()})
+
+
+def abrir_sheets(planilha):
+    worksheets = CacheWorksheets(lambda: ClienteFalso(planilha), URL_FALSA)
+    return ArmazenamentoSheets(worksheets, UPS.aba, UPS.colunas)
+
+
+def abrir_sqlite(caminho=':memory:'):
+    armazenamento = ArmazenamentoSQLite(caminho, UPS.aba, UPS.colunas, UPS.colunas_numericas, UPS.col_total)
+    armazenamento.reescrever(membros())
+    return armazenamento
+
+
+@pytest.fixture(params=['sheets', 'sqlite'])
+def armazenamento(request, planilha):
+    """Os dois backends com os mesmos membros: os testes de gravação valem para ambos."""
+    return abrir_sheets(planilha) if request.param == 'sheets' else abrir_sqlite()
@@ -0,0 +1,139 @@
+"""Backends de armazenamento nos dois (planilha falsa e SQLite): leitura, reescrita e compare-and-swap do aplicar_operacoes."""
+import sqlite3
+
+from nucleo import motor
+from nucleo.armazenamento import ArmazenamentoSQLite
+from nucleo.fila import Operacao
+from nucleo.planilha import CONFLITO, SEM_LINHA
+
+from tests.conftest import UPS, linha, membros
+
+
+def abrir(caminho):
+    return ArmazenamentoSQLite(caminho, UPS.aba, UPS.colunas, UPS.colunas_numericas, UPS.col_total)
+
+
+def tabela(armazenamento):
+    return motor.carregar(UPS, armazenamento).set_index('usuario')
+
+
+def atual(armazenamento, usuario):
+    """Células do membro como estão no backend (as `anteriores` de uma edição feita agora)."""
+    df = motor.carregar(UPS, armazenamento)
+    return motor.valores_linha(UPS, df[df['usuario'] == usuario].iloc[0])
+
+
+def test_carregar_valores_traz_cabecalho_e_linhas_na_ordem(armazenamento):
+    valores = armazenamento.carregar_valores()
+    assert list(valores[0]) == UPS.colunas
+    assert [v[0] for v in valores[1:]] == ['alice', 'bob', 'carol', 'davi']
+
+
+def test_reescrever_troca_a_tabela_inteira(armazenamento):
+    armazenamento.reescrever([linha('eva', Pontos_Total_Final=3.0)])
+    df = motor.carregar(UPS, armazenamento)
+    assert df['usuario'].tolist() == ['eva']
+    assert df['Pontos_Total_Final'].tolist() == [3.0]
+    armazenamento.reescrever([])
+    assert motor.carregar(UPS, armazenamento).empty
+
+
+def test_revisao_do_sqlite_muda_quando_outra_conexao_grava(tmp_path):
+    caminho = str(tmp_path / 'ups.db')
+    meu, outro = abrir(caminho), abrir(caminho)
+    antes = meu.revisao()
+    assert meu.revisao() == antes
+    outro.reescrever(membros())
+    assert meu.revisao() != antes
+
+
+def test_tabela_sqlite_antiga_ganha_as_colunas_que_faltam(tmp_path):
+    caminho = str(tmp_path / 'ups.db')
+    with sqlite3.connect(caminho) as con:
+        con.execute(f'CREATE TABLE "{UPS.aba}" (usuario TEXT PRIMARY KEY, cargo TEXT)')
+        con.execute(f'INSERT INTO "{UPS.aba}" VALUES (?, ?)', ('ana', UPS.cargos[2]))
+    valores = abrir(caminho).carregar_valores()
+    assert set(valores[0]) == set(UPS.colunas)
+    registro = dict(zip(valores[0], valores[1]))
+    assert (registro['usuario'], registro['cargo'], registro['Pontos_Total_Final']) == ('ana', UPS.cargos[2], 0.0)
+
+
+def test_atualizar_com_versao_da_carga_grava(armazenamento):
+    anteriores = atual(armazenamento, 'alice')
+    nova = linha('alice', user_id='101', cargo=UPS.cargos[4], Pontos_Total_Final=60.0)
+    assert armazenamento.aplicar_operacoes([Operacao('atualizar', 'alice', None, nova, anteriores)]) == []
+    assert tabela(armazenamento).loc['alice', 'Pontos_Total_Final'] == 60.0
+
+
+def test_atualizar_sobre_versao_velha_da_conflito(armazenamento):
+    anteriores = atual(armazenamento, 'alice')
+    # Outra sessão grava primeiro (versão nova)
+    outra = linha('alice', user_id='101', cargo=UPS.cargos[3], Pontos_Total_Final=70.0)
+    assert armazenamento.aplicar_operacoes([Operacao('atualizar', 'alice', None, outra, anteriores)]) == []
+    minha = linha('alice', user_id='101', cargo=UPS.cargos[3], Pontos_Total_Final=55.0)
+    op = Operacao('atualizar', 'alice', None, minha, anteriores)
+    assert armazenamento.aplicar_operacoes([op]) == [(op, CONFLITO)]
+    assert tabela(armazenamento).loc['alice', 'Pontos_Total_Final'] == 70.0
+
+
+def test_remover_sobre_versao_velha_da_conflito(armazenamento):
+    anteriores = atual(armazenamento, 'bob')
+    outra = linha('bob', user_id='102', Pontos_Total_Final=90.0)
+    armazenamento.aplicar_operacoes([Operacao('atualizar', 'bob', None, outra, anteriores)])
+    op = Operacao('remover', 'bob', anteriores=anteriores)
+    assert armazenamento.aplicar_operacoes([op]) == [(op, CONFLITO)]
+    assert 'bob' in tabela(armazenamento).index
+
+
+def test_atualizar_membro_que_sumiu(armazenamento):
+    anteriores = atual(armazenamento, 'davi')
+    armazenamento.aplicar_operacoes([Operacao('remover', 'davi', anteriores=anteriores)])
+    op = Operacao('atualizar', 'davi', None, linha('davi'), anteriores)
+    assert armazenamento.aplicar_operacoes([op]) == [(op, SEM_LINHA)]
+
+
+def test_anexar_nome_ja_existente_da_conflito(armazenamento):
+    # Anexar atrasado (a linha foi criada por outra sessão com outros valores): não sobrescreve
+    op = Operacao('anexar', 'carol', None, linha('carol', Pontos_Total_Final=1.0))
+    assert armazenamento.aplicar_operacoes([op]) == [(op, CONFLITO)]
+    assert tabela(armazenamento).loc['carol', 'Pontos_Total_Final'] == 50.0
+
+
+def test_anexar_repetido_com_mesma_linha_passa(armazenamento):
+    nova = linha('erica', user_id='105', Pontos_Total_Final=5.0)
+    assert armazenamento.aplicar_operacoes([Operacao('anexar', 'erica', None, nova)]) == []
+    # Reenvio do mesmo lote (ex.: resposta perdida e nova tentativa)
+    assert armazenamento.aplicar_operacoes([Operacao('anexar', 'erica', None, nova)]) == []
+    assert list(tabela(armazenamento).index).count('erica') == 1
+
+
+def test_renomear_e_anexar_o_nome_antigo_no_mesmo_lote(armazenamento):
+    anteriores = atual(armazenamento, 'alice')
+    renomeada = linha('alicia', user_id='101', cargo=UPS.cargos[3], Pontos_Total_Final=50.0)
+    nova = linha('alice', Pontos_Total_Final=1.0)
+    ops = [Operacao('atualizar', 'alice', {'usuario': 'alicia'}, renomeada, anteriores),
+           Operacao('anexar', 'alice', None, nova)]
+    assert armazenamento.aplicar_operacoes(ops) == []
+    df = tabela(armazenamento)
+    assert df.loc['alicia', 'Pontos_Total_Final'] == 50.0
+    assert df.loc['alice', 'Pontos_Total_Final'] == 1.0
+    assert len(df) == 5
+
+
+def test_anexar_e_editar_no_mesmo_lote(armazenamento):
+    nova = linha('erica', user_id='105', Pontos_Total_Final=5.0)
+    editada = linha('erica', user_id='105', Pontos_Total_Final=6.0)
+    fabio = linha('fabio')
+    ops = [Operacao('anexar', 'erica', None, nova), Operacao('atualizar', 'erica', None, editada, nova),
+           Operacao('anexar', 'fabio', None, fabio), Operacao('remover', 'fabio', anteriores=fabio)]
+    assert armazenamento.aplicar_operacoes(ops) == []
+    df = tabela(armazenamento)
+    assert df.loc['erica', 'Pontos_Total_Final'] == 6.0
+    assert list(df.index) == ['alice', 'bob', 'carol', 'davi', 'erica']
+
+
+def test_editar_linha_do_mesmo_lote_com_versao_velha_da_conflito(armazenamento):
+    nova = linha('erica', Pontos_Total_Final=5.0)
+    op = Operacao('atualizar', 'erica', None, linha('erica', Pontos_Total_Final=6.0), linha('erica'))
+    assert armazenamento.aplicar_operacoes([Operacao('anexar', 'erica', None, nova), op]) == [(op, CONFLITO)]
+    assert tabela(armazenamento).loc['erica', 'Pontos_Total_Final'] == 5.0
@@ -0,0 +1,48 @@
+"""IndiceBusca: nome igual, prefixo, ID, trecho e aproximada."""
+import pytest
+
+from nucleo import motor
+from nucleo.busca import IndiceBusca, normalizar
+from nucleo.indice import IndiceMembros
+
+from tests.conftest import UPS, abrir_sqlite
+
+NOMES = ['Alice', 'Álvaro', 'bob', 'Roberto', 'Albertina', 'Carla Souza']
+
+
+@pytest.fixture
+def busca():
+    return IndiceBusca(NOMES, [('123456', 'bob'), ('999', 'Carla Souza')])
+
+
+@pytest.mark.parametrize('texto, esperado', [
+    ('al', ['Albertina', 'Alice', 'Álvaro']),
+    ('alv', ['Álvaro']),
+    ('ALICE', ['Alice']),
+    ('123', ['bob']),
+    ('ouza', ['Carla Souza']),
+    ('zzzz', []),
+])
+def test_prefixo_id_e_trecho(busca, texto, esperado):
+    assert busca.buscar(texto) == esperado
+
+
+@pytest.mark.parametrize('texto, esperado', [('Robreto', 'Roberto'), ('Alcie', 'Alice'), ('Carla Suoza', 'Carla Souza')])
+def test_nome_com_erro_de_digitacao(busca, texto, esperado):
+    assert busca.buscar(texto)[0] == esperado
+
+
+def test_sem_texto_e_limite(busca):
+    assert busca.buscar('') == sorted(NOMES, key=normalizar)
+    assert len(busca.buscar('a', limite=2)) == 2
+
+
+def test_normalizar():
+    assert normalizar('Álvaro Ñ!') == 'alvaron'
+    assert normalizar('???') == '???'
+
+
+def test_busca_do_indice_de_membros():
+    indice = IndiceMembros(motor.carregar(UPS, abrir_sqlite()))
+    assert indice.busca.buscar('dav') == ['davi']
+    assert indice.busca.buscar('10') == ['alice', 'bob', 'carol']
@@ -0,0 +1,42 @@
+"""Classificação viva: posição, topo e vizinhos, acompanhando as operações sem reordenar."""
+from nucleo import motor
+from nucleo.fila import Operacao
+from nucleo.retratos import RepositorioRetratos
+
+from tests.conftest import UPS, abrir_sqlite
+
+# Total desc, empate pelo cargo mais alto (carol e alice têm 50)
+ORDEM = ['bob', 'carol', 'alice', 'davi']
+
+
+def carregar():
+    return motor.carregar(UPS, abrir_sqlite())
+
+
+def classificacao_de(df):
+    classificacao = motor.classificacao(UPS)
+    classificacao.sincronizar(RepositorioRetratos().publicar(UPS.aba, (1, None), df))
+    return classificacao
+
+
+def test_classificacao_posicao_topo_e_vizinhos():
+    classificacao = classificacao_de(carregar())
+    assert [classificacao.posicao(n) for n in ORDEM] == [1, 2, 3, 4]
+    assert classificacao.topo(2) == [(1, 'bob'), (2, 'carol')]
+    assert classificacao.vizinhos('alice', raio=1) == [(2, 'carol'), (3, 'alice'), (4, 'davi')]
+    assert classificacao.posicao('ninguem') is None
+
+
+def test_classificacao_acompanha_as_operacoes():
+    classificacao = classificacao_de(carregar())
+    classificacao.aplicar(Operacao('atualizar', 'davi', {'usuario': 'davi', UPS.col_total: 99.0, 'cargo': UPS.cargos[0]}))
+    classificacao.aplicar(Operacao('atualizar', 'bob', {'usuario': 'roberto', UPS.col_total: 80.0, 'cargo': UPS.cargos[1]}))
+    classificacao.aplicar(Operacao('remover', 'carol'))
+    assert classificacao.topo(10) == [(1, 'davi'), (2, 'roberto'), (3, 'alice')]
+
+
+def test_classificacao_igual_ao_ranking():
+    df = carregar()
+    ranking = motor.ranking(UPS, df)
+    assert [n for _, n in classificacao_de(df).topo(len(df))] == ranking.dados(ranking.tabela)['usuario'].tolist()
+
@@ -0,0 +1,86 @@
+"""Linha de comando sobre um SQLite temporário: ranking, processar e conferência dos argumentos."""
+import pytest
+
+from nucleo import cli, motor
+from nucleo.fila import Operacao
+
+from tests.conftest import UPS, abrir_sqlite, linha
+
+# Total desc, empate pelo cargo mais alto (carol e alice têm 50)
+ORDEM = ['bob', 'carol', 'alice', 'davi']
+
+
+@pytest.fixture
+def banco(tmp_path):
+    caminho = tmp_path / 'ups.db'
+    abrir_sqlite(str(caminho))
+    return caminho
+
+
+def rodar(tmp_path, banco, *args):
+    return cli.main(['--secrets', str(tmp_path / 'sem_secrets.toml'), '--sqlite', str(banco), *args])
+
+
+def test_ranking_top(tmp_path, banco, capsys):
+    assert rodar(tmp_path, banco, 'ranking', 'ups', '--top', '2') == 0
+    saida = capsys.readouterr().out.splitlines()
+    assert [l.split()[1] for l in saida[2:]] == ['bob', 'carol']
+
+
+def test_ranking_csv(tmp_path, banco):
+    destino = tmp_path / 'ranking.csv'
+    abrir_sqlite(str(banco)).aplicar_operacoes([Operacao('anexar', 'erica', None, linha('erica', Pontos_Total_Final=200.0))])
+    assert rodar(tmp_path, banco, 'ranking', 'ups', '--saida', str(destino)) == 0
+    linhas = destino.read_text(encoding='utf-8').splitlines()
+    assert linhas[0].split(',')[:2] == ['#', 'usuario']
+    assert [l.split(',')[1] for l in linhas[1:]] == ['erica'] + ORDEM
+
+
+def test_processar_lote_grava_e_registra_historico(tmp_path, banco, capsys):
+    arquivo = tmp_path / 'lote.csv'
+    arquivo.write_text('usuario,mensagens\nbob,100000\n', encoding='utf-8')
+    assert rodar(tmp_path, banco, 'processar', 'ups', str(arquivo), '--sem-zeros', '--semana', '2026-42', '--gravar') == 0
+    assert 'Gravadas 1 de 1' in capsys.readouterr().out
+    config = {'backend': 'sqlite', 'sqlite_path': str(banco)}
+    df = motor.carregar(UPS, motor.abrir_armazenamento(UPS, config)).set_index('usuario')
+    assert df.loc['bob', 'situação'] == 'UPADO'
+    semana = motor.abrir_historico(UPS, config).da_semana((2026, 42))
+    assert semana[['usuario', 'cargo_anterior', 'cargo']].values.tolist() == [['bob', UPS.cargos[1], UPS.cargos[2]]]
+
+
+def test_processar_sem_gravar_so_mostra_a_previa(tmp_path, banco, capsys):
+    arquivo = tmp_path / 'lote.csv'
+    arquivo.write_text('usuario,mensagens\nbob,100000\n', encoding='utf-8')
+    assert rodar(tmp_path, banco, 'processar', 'ups', str(arquivo)) == 0
+    assert 'Prévia apenas' in capsys.readouterr().out
+    config = {'backend': 'sqlite', 'sqlite_path': str(banco)}
+    assert motor.carregar(UPS, motor.abrir_armazenamento(UPS, config))['situação'].tolist() == [''] * 4
+
+
+@pytest.mark.parametrize('sistema, tipo', [('ups', 'voz'), ('call', 'discord'), ('call', 'lote')])
+def test_processar_recusa_tipo_que_o_sistema_nao_processa(tmp_path, sistema, tipo):
+    # Recusado antes de conectar: nem o banco nem o arquivo precisam existir
+    with pytest.raises(SystemExit, match=f"não processa --tipo {tipo}"):
+        rodar(tmp_path, tmp_path / 'nada.db', 'processar', sistema, 'nada.json', '--tipo', tipo)
+
+
+def test_processar_lote_le_um_arquivo_so(tmp_path):
+    with pytest.raises(SystemExit, match="um arquivo só"):
+        rodar(tmp_path, tmp_path / 'nada.db', 'processar', 'ups', 'a.csv', 'b.csv')
+
+
+@pytest.mark.parametrize('sistema, nome, conteudo, tipo', [
+    ('ups', 'lote.csv', 'usuario,mensagens\nbob,"100\n', 'lote'),
+    ('ups', 'canal.json', '[{"id": "1"', 'discord'),
+    ('call', 'voz.ndjson', '{"user_id": "1", "timestamp": "ontem", "type": "join"}', 'voz'),
+])
+def test_processar_arquivo_ilegivel_cita_o_nome(tmp_path, banco, sistema, nome, conteudo, tipo):
+    arquivo = tmp_path / nome
+    arquivo.write_text(conteudo, encoding='utf-8')
+    with pytest.raises(SystemExit, match=f"Erro ao ler .*{nome}"):
+        rodar(tmp_path, banco, 'processar', sistema, str(arquivo), '--tipo', tipo)
+
+
+def test_processar_arquivo_inexistente(tmp_path, banco):
+    with pytest.raises(SystemExit, match="Não foi possível abrir .*sumiu.csv"):
+        rodar(tmp_path, banco, 'processar', 'ups', str(tmp_path / 'sumiu.csv'))
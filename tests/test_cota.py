@@ -0,0 +1,127 @@
+"""Cota do Sheets: balde de fichas com relógio falso e novas tentativas de 429/5xx no cliente."""
+import pytest
+
+from nucleo import cota
+
+
+class Relogio:
+    """Relógio e sleep falsos: dormir avança o relógio."""
+
+    def __init__(self):
+        self.agora = 0.0
+        self.dormido = []
+
+    def __call__(self):
+        return self.agora
+
+    def dormir(self, segundos):
+        self.dormido.append(segundos)
+        self.agora += segundos
+
+
+class ErroHTTP(Exception):
+    def __init__(self, status, retry_after=None):
+        super().__init__(status)
+        self.response = type('Resposta', (), {'status_code': status,
+                                              'headers': {'Retry-After': retry_after} if retry_after else {}})()
+
+
+class Cliente:
+    """request() que levanta os erros da lista, na ordem, e depois responde 'ok'."""
+
+    def __init__(self, *erros):
+        self.erros = list(erros)
+        self.pedidos = []
+
+    def request(self, method, endpoint, *args, **kwargs):
+        self.pedidos.append((method, endpoint))
+        if self.erros:
+            raise self.erros.pop(0)
+        return 'ok'
+
+
+@pytest.fixture
+def relogio():
+    return Relogio()
+
+
+def balde_de(relogio, por_minuto=60, rajada=2):
+    return cota.BaldeFichas(por_minuto, rajada, relogio=relogio, dormir=relogio.dormir)
+
+
+def test_balde_libera_a_rajada_e_depois_espaca(relogio):
+    balde = balde_de(relogio)
+    assert [balde.retirar() for _ in range(2)] == [0.0, 0.0]
+    assert balde.retirar() == pytest.approx(1.0)
+    assert balde.retirar() == pytest.approx(1.0)
+    relogio.agora += 10
+    assert balde.disponiveis() == pytest.approx(2.0)
+
+
+def test_pausar_segura_todas_as_retiradas(relogio):
+    balde = balde_de(relogio)
+    balde.pausar(5)
+    assert balde.retirar() == pytest.approx(5.0)
+    assert balde.retirar() == pytest.approx(1.0)
+
+
+def test_rajada_padrao_e_ajuste(relogio):
+    balde = cota.BaldeFichas(120, relogio=relogio, dormir=relogio.dormir)
+    assert balde.capacidade == 20
+    balde.ajustar(30)
+    assert (balde.por_minuto, balde.capacidade) == (30.0, 5.0)
+
+
+def proteger(cliente, relogio, **opcoes):
+    opcoes = {'max_tentativas': 3, 'espera_inicial': 1.0, 'dormir': relogio.dormir, **opcoes}
+    return cota.proteger_cliente(cliente, balde_de(relogio, rajada=10), **opcoes)
+
+
+def test_429_repete_e_pausa_o_balde(relogio):
+    cliente = proteger(Cliente(ErroHTTP(429), ErroHTTP(429, retry_after='4')), relogio)
+    assert cliente.request('post', 'https://sheets.googleapis.com/v4/spreadsheets/ID:batchUpdate') == 'ok'
+    assert len(cliente.pedidos) == 3
+    # a espera do 429 é a pausa do balde (o Retry-After, quando vem), sentida na retirada seguinte
+    assert relogio.dormido[-1] == pytest.approx(4.0)
+
+
+def test_5xx_repete_so_leituras(relogio):
+    leitura = proteger(Cliente(ErroHTTP(503)), relogio)
+    assert leitura.request('get', 'https://sheets.googleapis.com/v4/spreadsheets/ID/values/A1') == 'ok'
+    assert len(relogio.dormido) == 1
+    escrita = proteger(Cliente(ErroHTTP(500)), relogio)
+    with pytest.raises(ErroHTTP):
+        escrita.request('post', 'https://sheets.googleapis.com/v4/spreadsheets/ID/values/A1:append')
+    assert len(escrita.pedidos) == 1
+
+
+def test_desiste_depois_das_tentativas_e_nao_repete_outros_erros(relogio):
+    cliente = proteger(Cliente(*[ErroHTTP(429)] * 3), relogio)
+    with pytest.raises(ErroHTTP):
+        cliente.request('get', 'drive')
+    assert len(cliente.pedidos) == 3
+    cliente = proteger(Cliente(ErroHTTP(403)), relogio)
+    with pytest.raises(ErroHTTP):
+        cliente.request('get', 'drive')
+    assert len(cliente.pedidos) == 1
+
+
+def test_proteger_uma_vez_e_cliente_sem_request():
+    relogio = Relogio()
+    cliente = proteger(Cliente(), relogio)
+    original = cliente.request
+    assert proteger(cliente, relogio).request is original
+    sem_request = object()
+    assert cota.proteger_cliente(sem_request, cota.BaldeFichas()) is sem_request
+
+
+@pytest.mark.parametrize('tentativa, teto', [(0, 1.0), (2, 4.0), (10, 32.0)])
+def test_espera_tentativa(tentativa, teto):
+    assert cota.espera_tentativa(tentativa, aleatorio=lambda: 0.0) == teto / 2
+    assert cota.espera_tentativa(tentativa, aleatorio=lambda: 1.0) == teto
+
+
+def test_leitura():
+    assert cota.leitura('GET', 'qualquer')
+    assert cota.leitura('post', 'https://sheets.googleapis.com/v4/spreadsheets/ID/values:batchGet')
+    assert not cota.leitura('post', 'https://sheets.googleapis.com/v4/spreadsheets/ID:batchUpdate')
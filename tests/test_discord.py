@@ -0,0 +1,46 @@
+"""Contagem de mensagens por autor e semana ISO a partir de exportações do Discord."""
+import io
+import json
+
+from nucleo import discord
+
+# 2026-10-12 é segunda-feira da semana ISO 42
+MENSAGENS = [
+    {'type': 'Default', 'timestamp': '2026-10-12T10:00:00+00:00', 'author': {'id': '101', 'isBot': False}},
+    {'type': 'Reply', 'timestamp': '2026-10-18T23:59:00-03:00', 'author': {'id': '101'}},
+    {'type': 'Default', 'timestamp': '2026-10-13T10:00:00+00:00', 'author': {'id': '900', 'isBot': True}},
+    {'type': 'ChannelPinnedMessage', 'timestamp': '2026-10-13T10:00:00+00:00', 'author': {'id': '102'}},
+    {'type': 0, 'timestamp': '2026-10-19T00:00:00+00:00', 'author_id': 102},
+    {'type': 'Default', 'author': {'id': '103'}},
+]
+
+
+def test_contar_mensagens_por_semana():
+    contagens = discord.contar_mensagens(MENSAGENS)
+    assert contagens == {(2026, 42): {'101': 2}, (2026, 43): {'102': 1}}
+
+
+def test_bots_contam_so_se_pedido():
+    contagens = discord.contar_mensagens(MENSAGENS, ignorar_bots=False)
+    assert contagens[(2026, 42)] == {'101': 2, '900': 1}
+
+
+def test_varios_arquivos_somam():
+    exportacao = io.StringIO(json.dumps({'guild': {'id': '1'}, 'messages': MENSAGENS[:2]}))
+    contagens = discord.contar_mensagens(discord.ler_mensagens(exportacao, 'canal1.json'))
+    ndjson = io.StringIO('\n'.join(json.dumps(m) for m in MENSAGENS[:1]))
+    discord.contar_mensagens(discord.ler_mensagens(ndjson, 'canal2.ndjson'), contagens=contagens)
+    assert contagens[(2026, 42)]['101'] == 3
+
+
+def test_semana_iso():
+    assert discord.semana_iso('2026-10-18T23:59:00-03:00') == (2026, 42)
+    assert discord.semana_iso('2027-01-01T00:00:00') == (2026, 53)
+
+
+def test_lote_da_semana_inclui_membros_sem_mensagens():
+    contagens = discord.contar_mensagens(MENSAGENS)
+    lote = discord.lote_da_semana(contagens, [2026, 42], user_ids=['101', 102])
+    assert lote.set_index('user_id')['mensagens'].to_dict() == {'101': 2.0, '102': 0.0}
+    assert lote['usuario'].tolist() == ['', ''] and lote['bonus'].tolist() == [0.0, 0.0]
+    assert discord.lote_da_semana(contagens, (2025, 1)).empty
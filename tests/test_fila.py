@@ -0,0 +1,121 @@
+"""FilaEscrita: coalescência por membro, nova tentativa depois de falha, descarte e status."""
+import threading
+
+import pandas as pd
+import pytest
+
+from nucleo.fila import CONFLITO, GRAVADO, FilaEscrita
+from nucleo.planilha import CONFLITO as RECUSA_CONFLITO
+
+
+class Backend:
+    """gravar() que registra os lotes e falha enquanto `fora` estiver ligado."""
+
+    def __init__(self):
+        self.lotes = []
+        self.fora = threading.Event()
+        self.recusar = set()
+
+    def __call__(self, ops):
+        if self.fora.is_set():
+            raise ConnectionError('fora do ar')
+        self.lotes.append([(op.acao, op.chave, op.valores) for op in ops])
+        return [(op, RECUSA_CONFLITO) for op in ops if op.chave in self.recusar]
+
+
+@pytest.fixture
+def backend():
+    return Backend()
+
+
+def nova_fila(backend, **opcoes):
+    opcoes = {'janela': 0.05, 'max_tentativas': 1, 'espera_inicial': 0.01, 'espera_maxima': 0.05, **opcoes}
+    return FilaEscrita(backend, **opcoes)
+
+
+def registro(nome, total):
+    return {'usuario': nome, 'total': total}
+
+
+def test_edicoes_do_mesmo_membro_viram_uma(backend):
+    fila = nova_fila(backend, janela=0.2)
+    fila.enfileirar('atualizar', 'alice', registro('alice', 1), ['alice', '1'], ['alice', '0'])
+    fila.enfileirar('atualizar', 'alice', registro('alice', 2), ['alice', '2'], ['alice', '0'])
+    fila.enfileirar('atualizar', 'bob', registro('bob', 3), ['bob', '3'], ['bob', '0'])
+    assert fila.aguardar(5)
+    assert backend.lotes == [[('atualizar', 'alice', ['alice', '2']), ('atualizar', 'bob', ['bob', '3'])]]
+    assert fila.status('alice')[0] == GRAVADO
+
+
+def test_renomear_depois_de_editar_grava_na_linha_original(backend):
+    fila = nova_fila(backend, janela=0.2)
+    fila.enfileirar('atualizar', 'alice', registro('alice', 1), ['alice', '1'], ['alice', '0'])
+    assert fila.enfileirar('atualizar', 'alice', registro('alicia', 1), ['alicia', '1'], ['alice', '0']) == 'alicia'
+    assert fila.aguardar(5)
+    assert backend.lotes == [[('atualizar', 'alice', ['alicia', '1'])]]
+
+
+def test_anexar_e_remover_antes_de_gravar_nao_grava_nada(backend):
+    fila = nova_fila(backend, janela=0.2)
+    fila.enfileirar('anexar', 'novo', registro('novo', 0), ['novo', '0'])
+    fila.enfileirar('remover', 'novo')
+    assert fila.aguardar(5)
+    assert backend.lotes == []
+
+
+def test_lote_que_falhou_volta_para_a_fila_e_grava_depois(backend):
+    fila = nova_fila(backend)
+    backend.fora.set()
+    fila.enfileirar('atualizar', 'alice', registro('alice', 1), ['alice', '1'], ['alice', '0'])
+    assert not fila.aguardar(0.3)
+    assert fila.falha() is not None
+    assert [op.chave for op in fila.operacoes()] == ['alice']
+    # Edição nova enquanto falha: junta com a devolvida
+    fila.enfileirar('atualizar', 'alice', registro('alice', 2), ['alice', '2'], ['alice', '1'])
+    backend.fora.clear()
+    assert fila.aguardar(5)
+    assert backend.lotes == [[('atualizar', 'alice', ['alice', '2'])]]
+    assert fila.falha() is None
+    assert fila.status('alice')[0] == GRAVADO
+
+
+def test_recusa_do_backend_vira_conflito(backend):
+    fila = nova_fila(backend)
+    backend.recusar.add('alice')
+    fila.enfileirar('atualizar', 'alice', registro('alice', 1), ['alice', '1'], ['alice', '0'])
+    assert fila.aguardar(5)
+    assert fila.status('alice')[0] == CONFLITO
+    assert fila.conflitos() == ['alice']
+
+
+def test_sobrepor_mostra_o_que_ainda_nao_foi_gravado(backend):
+    fila = nova_fila(backend, janela=5)
+    df = pd.DataFrame({'usuario': ['alice', 'bob'], 'total': [0, 0]})
+    fila.enfileirar('atualizar', 'alice', registro('alice', 7), ['alice', '7'])
+    fila.enfileirar('remover', 'bob')
+    fila.enfileirar('anexar', 'carol', registro('carol', 3), ['carol', '3'])
+    visto = fila.sobrepor(df, ['usuario', 'total'])
+    assert visto.set_index('usuario')['total'].to_dict() == {'alice': 7, 'carol': 3}
+    fila.descartar()
+
+
+def test_descartar_durante_a_gravacao_nao_devolve_o_lote():
+    gravando, liberar = threading.Event(), threading.Event()
+    chamadas = []
+
+    def gravar(ops):
+        chamadas.append([op.chave for op in ops])
+        gravando.set()
+        liberar.wait(5)
+        raise ConnectionError('fora do ar')
+
+    fila = nova_fila(gravar, max_tentativas=3)
+    fila.enfileirar('atualizar', 'alice', registro('alice', 1), ['alice', '1'], ['alice', '0'])
+    assert gravando.wait(5)
+    fila.descartar()
+    liberar.set()
+    assert fila.aguardar(5)
+    # Sem nova tentativa nem volta para a fila: o lote era da tabela que foi zerada
+    assert chamadas == [['alice']]
+    assert fila.operacoes() == [] and fila.falha() is None
+    assert fila.status('alice') is None
@@ -0,0 +1,51 @@
+"""Leitura em fluxo de JSON/NDJSON: lista no topo, lista sob uma chave, uma linha por registro."""
+import io
+import json
+
+import pytest
+
+from nucleo import fluxo
+
+REGISTROS = [{'id': i, 'texto': 'x' * i, 'valor': i / 2} for i in range(50)]
+
+
+@pytest.fixture
+def bloco_pequeno(monkeypatch):
+    # Blocos menores que um registro: os valores cortados no meio do buffer precisam ser completados
+    monkeypatch.setattr(fluxo, 'TAMANHO_BLOCO', 7)
+
+
+def ler(conteudo, nome='dados.json', binario=False, **opcoes):
+    arquivo = io.BytesIO(conteudo.encode('utf-8')) if binario else io.StringIO(conteudo)
+    return list(fluxo.ler_registros(arquivo, nome, **opcoes))
+
+
+def test_lista_no_topo(bloco_pequeno):
+    assert ler(json.dumps(REGISTROS, indent=2)) == REGISTROS
+    assert ler('  [ ]  ') == []
+
+
+def test_objeto_com_a_lista_sob_a_chave(bloco_pequeno):
+    conteudo = json.dumps({'guild': {'id': '1', 'nomes': [1, 2]}, 'messages': REGISTROS, 'messageCount': 50})
+    assert ler(conteudo) == REGISTROS
+    assert ler(json.dumps({'eventos': REGISTROS[:3]}), chave_lista='eventos') == REGISTROS[:3]
+    assert ler(json.dumps({'outra': REGISTROS})) == []
+
+
+def test_ndjson_binario_com_bom():
+    conteudo = '\ufeff' + '\n'.join(json.dumps(r) for r in REGISTROS[:3]) + '\n\n'
+    assert ler(conteudo, 'dados.NDJSON', binario=True) == REGISTROS[:3]
+
+
+def test_registros_saem_sob_demanda():
+    registros = fluxo.ler_registros(io.StringIO('[{"a": 1}, {"a": 2}, oops]'), 'dados.json')
+    assert next(registros) == {'a': 1}
+    assert next(registros) == {'a': 2}
+    with pytest.raises(ValueError):
+        next(registros)
+
+
+@pytest.mark.parametrize('conteudo', ['{"a": 1 2}', '[1 2]', '"texto"', '[{"a": 1}'])
+def test_json_invalido(conteudo):
+    with pytest.raises(ValueError):
+        ler(conteudo)
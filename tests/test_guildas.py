@@ -0,0 +1,43 @@
+"""Guildas do secrets.toml: padrões combinados, abas próprias e um SQLite por guilda."""
+from nucleo import guildas, motor
+
+
+def test_sem_guildas_ha_so_a_principal():
+    secrets = {'gsheets_config': {'spreadsheet_url': 'url'}, 'armazenamento': {'backend': 'sqlite'}}
+    todas = guildas.ler_guildas(secrets)
+    assert list(todas) == [guildas.PADRAO]
+    principal = todas[guildas.PADRAO]
+    assert principal.spreadsheet_url == 'url' and principal.config == {'backend': 'sqlite'}
+    assert principal.aba(motor.UPS) == motor.UPS.aba
+
+
+def test_guildas_com_config_propria():
+    secrets = {
+        'armazenamento': {'backend': 'sqlite', 'sqlite_path': 'dados/ups.db', 'janela_gravacao': 1.0},
+        'guildas': {
+            'alfa': {'nome': 'Servidor Alfa', 'spreadsheet_url': 'url-a'},
+            'beta': {'aba_ups': 'Ups Beta', 'janela_gravacao': 2.0, 'sqlite_path': 'beta.db'},
+        },
+    }
+    todas = guildas.ler_guildas(secrets)
+    assert list(todas) == ['alfa', 'beta']
+    alfa, beta = todas['alfa'], todas['beta']
+    assert (alfa.nome, alfa.spreadsheet_url) == ('Servidor Alfa', 'url-a')
+    assert alfa.config == {'backend': 'sqlite', 'sqlite_path': 'dados/ups_alfa.db', 'janela_gravacao': 1.0}
+    assert beta.nome == 'beta'
+    assert beta.config['janela_gravacao'] == 2.0 and beta.config['sqlite_path'] == 'beta.db'
+    assert 'aba_ups' not in beta.config
+    assert (beta.aba(motor.UPS), beta.aba(motor.CALL)) == ('Ups Beta', motor.CALL.aba)
+    assert beta.chave('Ups Beta') == 'beta/Ups Beta'
+
+
+def test_sqlite_padrao_por_guilda():
+    todas = guildas.ler_guildas({'guildas': {'a': {}}})
+    assert todas['a'].config['sqlite_path'] == 'sistema_ups_a.db'
+
+
+def test_escolher():
+    todas = guildas.ler_guildas({'guildas': {'a': {}, 'b': {}}})
+    assert guildas.escolher(todas, 'b').id == 'b'
+    assert guildas.escolher(todas, 'inexistente').id == 'a'
+    assert guildas.escolher(todas).id == 'a'
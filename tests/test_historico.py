@@ -0,0 +1,94 @@
+"""Histórico semanal nos dois backends: consultas por membro e semana, e sincronização incremental da aba."""
+import io
+from datetime import datetime
+
+import pytest
+
+from benchmarks.falso_gspread import ClienteFalso, PlanilhaFalsa
+from nucleo import historico, lote, motor
+from nucleo.fila import Operacao
+from nucleo.historico import HistoricoSheets, HistoricoSQLite
+from nucleo.planilha import CacheWorksheets
+
+from tests.conftest import UPS, URL_FALSA, membros
+
+ABA = UPS.aba_historico
+
+
+def registro(semana, usuario, user_id='N/A', cargo='c', valor=1.0):
+    return [semana, '2026-10-12 20:00:00', usuario, user_id, 'c', cargo, 'MANTEVE', str(valor), str(valor)]
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def abrir_aba(planilha, relogio=None):
+    worksheets = CacheWorksheets(lambda: ClienteFalso(planilha), URL_FALSA)
+    return HistoricoSheets(worksheets, ABA, relogio=relogio or Relogio())
+
+
+@pytest.fixture(params=['sheets', 'sqlite'])
+def registros(request):
+    return abrir_aba(PlanilhaFalsa()) if request.param == 'sheets' else HistoricoSQLite(':memory:', ABA)
+
+
+def test_trajetoria_do_membro(registros):
+    registros.anexar([registro('2026-42', 'alice', '101', valor=5), registro('2026-41', 'alice', '101'),
+                      registro('2026-42', 'bob'), registro('2026-42', 'alicia', '101', valor=7)])
+    trajetoria = registros.trajetoria(user_id=101)
+    # pelo ID (renomeada continua a mesma), semana reprocessada vale a última linha
+    assert trajetoria['semana'].tolist() == ['2026-41', '2026-42']
+    assert trajetoria['valor'].tolist() == [1.0, 7.0]
+    assert registros.trajetoria(user_id='N/A', usuario='bob')['usuario'].tolist() == ['bob']
+    assert registros.trajetoria(usuario='ninguem').empty
+
+
+def test_da_semana(registros):
+    registros.aplicar_operacoes([Operacao('anexar', 'x', None, registro('2026-42', 'bob')),
+                                 Operacao('anexar', 'y', None, registro('2026-42', 'carol', '103')),
+                                 Operacao('anexar', 'z', None, registro('2026-42', 'bob', valor=3))])
+    semana = registros.da_semana((2026, 42))
+    assert semana.set_index('usuario')['valor'].to_dict() == {'carol': 1.0, 'bob': 3.0}
+    assert registros.da_semana('2026-41').empty
+    assert registros.semanas() == ['2026-42']
+
+
+def test_aba_sincroniza_so_as_linhas_novas():
+    planilha, relogio = PlanilhaFalsa(), Relogio()
+    meu, outro = abrir_aba(planilha, relogio), abrir_aba(planilha)
+    meu.anexar([registro('2026-41', 'alice', '101')])
+    assert len(meu.trajetoria(user_id='101')) == 1
+    outro.anexar([registro('2026-42', 'alice', '101'), registro('2026-42', 'bob')])
+
+    planilha.contador.zerar()
+    meu.sincronizar()  # ainda dentro do intervalo: nenhuma leitura
+    assert planilha.contador.chamadas['batch_get'] == 0
+    relogio.agora = HistoricoSheets.intervalo_sonda
+    meu.sincronizar()
+    assert meu.semanas() == ['2026-41', '2026-42']
+    assert len(meu.trajetoria(usuario='bob')) == 1
+    assert planilha.contador.chamadas['batch_get'] == 1
+    assert planilha.contador.chamadas['get_all_values'] == 0
+
+
+def test_semana_fechada():
+    segunda = datetime(2026, 10, 12, 9)
+    assert historico.semana_fechada(segunda) == (2026, 42)
+    assert historico.semana_fechada('2026-10-14 09:00:00', dias_fechamento=3) == (2026, 41)
+    assert historico.semana_fechada('2026-10-15 09:00:00', dias_fechamento=3) == (2026, 42)
+    assert historico.chave_semana((2026, 5)) == '2026-05'
+
+
+def test_linhas_historico_da_semana_processada():
+    df = motor.tabela_de_valores(UPS, [list(UPS.colunas)] + membros())
+    arquivo = lote.ler_lote(io.StringIO("usuario,mensagens\nbob,0\n"), 'a.csv')
+    novo, _, _ = motor.processar_semana(UPS, df, arquivo, agora='2026-10-13 10:00:00')
+    linhas = motor.linhas_historico(UPS, df, novo)
+    assert [(l[0], l[2], l[4], l[5]) for l in linhas] == [('2026-42', 'bob', UPS.cargos[1], UPS.cargos[0])]
+    assert motor.linhas_historico(UPS, df, novo, dias_fechamento=2)[0][0] == '2026-41'
+    assert motor.linhas_historico(UPS, df, novo, semana=(2026, 40))[0][0] == '2026-40'
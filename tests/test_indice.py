@@ -0,0 +1,34 @@
+"""IndiceMembros: posição por nome e por user_id, sem varrer a coluna."""
+import pandas as pd
+
+from nucleo import motor
+from nucleo.indice import IndiceMembros
+
+from tests.conftest import UPS, abrir_sqlite
+
+
+def test_indice_de_membros():
+    indice = IndiceMembros(motor.carregar(UPS, abrir_sqlite()))
+    assert len(indice) == 4
+    assert indice.posicao('carol') == 2
+    assert indice.posicao('ninguem') is None
+    assert indice.posicao_id('102') == 1
+    assert indice.tem_nome('davi') and indice.tem_id(101)
+    assert not indice.tem_id('N/A')
+    assert indice.nomes == ['alice', 'bob', 'carol', 'davi']
+
+
+def test_repetidos_valem_a_primeira_linha():
+    df = pd.DataFrame({'usuario': ['ana', 'bia', 'ana'], 'user_id': ['1', 'N/A', '1']}, index=[10, 11, 12])
+    indice = IndiceMembros(df)
+    assert indice.posicao('ana') == 10 and indice.posicao_id('1') == 10
+    assert indice.por_id == {'1': 10}
+
+
+def test_confere_com_a_tabela_atual():
+    df = pd.DataFrame({'usuario': ['ana', 'bia'], 'user_id': ['1', '2']})
+    indice = IndiceMembros(df)
+    assert indice.confere(df, 'bia') == 1
+    renomeado = df.assign(usuario=['ana', 'beatriz'])
+    assert indice.confere(renomeado, 'bia') is None
+    assert indice.confere(df.drop(index=1), 'bia') is None
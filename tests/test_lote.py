@@ -0,0 +1,75 @@
+"""Processamento semanal em lote: leitura do arquivo e a semana aplicada a todos de uma vez."""
+import io
+import json
+
+import pytest
+
+from nucleo import lote, motor
+
+from tests.conftest import UPS, membros
+
+AGORA = '2026-10-12 20:00:00'
+
+
+def tabela():
+    return motor.tabela_de_valores(UPS, [list(UPS.colunas)] + membros())
+
+
+def test_ler_lote_csv_completa_colunas():
+    arquivo = io.StringIO("Usuario,Mensagens,Bonus\nalice,100,\nbob,-5,1.5\n")
+    lido = lote.ler_lote(arquivo, 'semana.csv')
+    assert list(lido.columns) == lote.COLUNAS_LOTE
+    assert lido['mensagens'].tolist() == [100, 0]
+    assert lido['bonus'].tolist() == [0.0, 1.5]
+    assert lido['user_id'].tolist() == ['', '']
+    assert lido['multiplicador'].isna().all()
+
+
+def test_ler_lote_json():
+    arquivo = io.StringIO(json.dumps([{'user_id': '101', 'mensagens': 50, 'multiplicador': 2}]))
+    lido = lote.ler_lote(arquivo, 'semana.JSON')
+    assert lido.loc[0, 'user_id'] == '101' and lido.loc[0, 'usuario'] == ''
+    assert lido.loc[0, 'multiplicador'] == 2
+
+
+@pytest.mark.parametrize('conteudo', ["usuario,bonus\nalice,1\n", "mensagens\n10\n"])
+def test_ler_lote_sem_colunas_obrigatorias(conteudo):
+    with pytest.raises(ValueError):
+        lote.ler_lote(io.StringIO(conteudo), 'semana.csv')
+
+
+def test_processar_lote_casa_por_id_e_nome():
+    df = tabela()
+    cargo = UPS.cargos[3]
+    meta_up = UPS.metas[cargo]['meta_up']
+    arquivo = io.StringIO(
+        "usuario,user_id,mensagens,bonus\n"
+        f"qualquer,101,{meta_up * motor.MENSAGENS_POR_PONTO},0\n"
+        "davi,,0,0\n"
+        "ninguem,,10,0\n"
+    )
+    df_novo, previa, ignorados = motor.processar_semana(UPS, df, lote.ler_lote(arquivo, 'a.csv'), agora=AGORA)
+
+    assert previa['usuario'].tolist() == ['alice', 'davi']
+    assert previa['situação'].tolist() == ['UPADO', 'REBAIXADO']
+    assert ignorados['usuario'].tolist() == ['ninguem']
+    alice = df_novo.loc[0]
+    assert alice['cargo'] == UPS.cargos[4] and alice['Pontos_Semana'] == meta_up
+    assert alice['Pontos_Total_Final'] == 50.0 + meta_up
+    assert str(alice['Data_Ultima_Atualizacao']) == AGORA
+    # quem não está no lote fica como estava
+    assert df_novo.loc[1].equals(df.loc[1])
+
+
+def test_processar_lote_multiplicador_e_repetidos():
+    df = tabela()
+    arquivo = io.StringIO("usuario,mensagens,bonus,multiplicador\nbob,50,0,\nbob,100,1,2\n")
+    df_novo, previa, _ = motor.processar_semana(UPS, df, lote.ler_lote(arquivo, 'a.csv'), agora=AGORA)
+    # a última linha do mesmo membro vale; multiplicador do arquivo substitui o atual
+    assert len(previa) == 1
+    assert df_novo.loc[1, 'Pontos_Semana'] == (100 / motor.MENSAGENS_POR_PONTO + 1) * 2
+    assert df_novo.loc[1, 'Multiplicador_Individual'] == 2.0
+
+
+def test_rotulo_semana():
+    assert lote.rotulo_semana((2026, 42)) == '2026-S42 (a partir de 12/10)'
@@ -0,0 +1,70 @@
+"""Medidor: fases por execução (aninhadas não somam duas vezes), chamadas à API e resumo da rodada."""
+import pytest
+
+from nucleo import medicao
+
+
+@pytest.fixture
+def medidor():
+    medidor = medicao.Medidor('sessao-teste')
+    medicao.usar(medidor)
+    yield medidor
+    medicao.usar(None)
+
+
+def test_fases_da_rodada(medidor):
+    medidor.iniciar_rodada()
+    with medicao.fase('carregar'):
+        with medicao.fase('carregar.ler'):
+            pass
+    with medicao.fase('carregar'):
+        pass
+    resumo = medidor.encerrar_rodada(pagina='ranking')
+    assert resumo['execucao'] == 1 and resumo['pagina'] == 'ranking'
+    assert set(resumo['fases_ms']) == {'carregar', 'carregar.ler'}
+    assert [(f['fase'], f['execucoes']) for f in medidor.resumo_fases()] == [('carregar', 2), ('carregar.ler', 1)]
+    # a fase aninhada já está dentro da de fora: o resto não a desconta de novo
+    assert resumo['resto_ms'] == pytest.approx(resumo['total_ms'] - resumo['fases_ms']['carregar'], abs=0.2)
+    assert medidor.encerrar_rodada() is None
+
+
+def test_fase_tambem_conta_no_processo(medidor):
+    antes = len(medicao.PROCESSO.tempos['teste.processo'])
+    with medicao.fase('teste.processo'):
+        pass
+    assert len(medidor.tempos['teste.processo']) == 1
+    assert len(medicao.PROCESSO.tempos['teste.processo']) == antes + 1
+
+
+def test_chamadas_por_minuto():
+    medidor = medicao.Medidor('m')
+    for instante in (0.0, 30.0, 61.0):
+        medidor.registrar_chamada('GET values', 10, agora=instante)
+    assert medidor.chamadas_por_minuto(agora=61.0) == 2
+    assert medidor.total_chamadas() == 3 and medidor.bytes == 30
+    assert medidor.resumo_chamadas() == {'GET values': 3}
+
+
+@pytest.mark.parametrize('metodo, endpoint, esperado', [
+    ('get', 'https://sheets.googleapis.com/v4/spreadsheets/ID/values:batchGet?ranges=A1', 'GET values:batchGet'),
+    ('post', 'https://sheets.googleapis.com/v4/spreadsheets/ID/values/aba!A1:append', 'POST values:append'),
+    ('get', 'https://www.googleapis.com/drive/v3/files/ID', 'GET drive'),
+    ('post', 'https://sheets.googleapis.com/v4/spreadsheets/ID:batchUpdate', 'POST spreadsheets:batchUpdate'),
+])
+def test_recurso_api(metodo, endpoint, esperado):
+    assert medicao.recurso_api(metodo, endpoint) == esperado
+
+
+def test_instrumentar_cliente(medidor):
+    class Resposta:
+        content = b'12345'
+
+    class Cliente:
+        def request(self, method, endpoint, **kwargs):
+            return Resposta()
+
+    cliente = medicao.instrumentar_cliente(Cliente())
+    assert medicao.instrumentar_cliente(cliente) is cliente
+    cliente.request('get', 'https://www.googleapis.com/drive/v3/files/ID', json={'a': 1})
+    assert medidor.resumo_chamadas() == {'GET drive': 1}
+    assert medidor.bytes == len('{"a": 1}') + 5
@@ -0,0 +1,65 @@
+"""Tabela de membros do motor: leitura das células, tipos compactos (ida e volta sem perda), diferenças."""
+import pandas as pd
+
+from nucleo import motor
+
+from tests.conftest import UPS, linha, membros
+
+
+def valores(linhas):
+    return [list(UPS.colunas)] + linhas
+
+
+def test_celulas_faltando_e_invalidas_viram_padrao():
+    df = motor.tabela_de_valores(UPS, [['usuario', 'Pontos_Semana'], ['ana', 'x'], ['bia']])
+    assert df['Pontos_Semana'].tolist() == [0.0, 0.0]
+    assert df['Multiplicador_Individual'].tolist() == [1.0, 1.0]
+
+
+def test_colunas_numericas_tipadas_de_uma_vez():
+    df = motor.tabela_de_valores(UPS, [['usuario', 'Semana_Atual', 'Pontos_Total_Final', 'usuario'],
+                                       ['ana', '2', '10.5', 'repetido'], ['bia', '', '1e3']])
+    assert df['usuario'].tolist() == ['ana', 'bia']
+    assert df['Semana_Atual'].tolist() == [2, 0]
+    assert df['Pontos_Total_Final'].tolist() == [10.5, 1000.0]
+    assert df['Pontos_Total_Final'].dtype == 'float64'
+
+
+def test_tipos_compactos():
+    df = motor.tabela_de_valores(UPS, valores(membros()))
+    assert df['cargo'].cat.ordered and list(df['cargo'].cat.categories[:len(UPS.cargos)]) == list(UPS.cargos)
+    assert isinstance(df['situação'].dtype, pd.CategoricalDtype)
+    assert isinstance(df['user_id'].dtype, pd.Int64Dtype)
+    assert df['user_id'].isna().tolist() == [False, False, False, True]
+
+
+def test_ida_e_volta_sem_perda():
+    linhas = membros() + [
+        linha('eva', user_id='0123', cargo='cargo novo', situação='UPADO',
+              Data_Ultima_Atualizacao='2026-10-05 20:00:00', Pontos_Semana=1.5),
+        linha('fabio', Data_Ultima_Atualizacao='ontem'),
+    ]
+    df = motor.tabela_de_valores(UPS, valores(linhas))
+    # ID com zero à esquerda e data fora do formato: as colunas ficam como texto
+    assert not isinstance(df['user_id'].dtype, pd.Int64Dtype)
+    assert not pd.api.types.is_datetime64_any_dtype(df['Data_Ultima_Atualizacao'].dtype)
+    assert motor.tabela_texto(UPS, df).values.tolist() == linhas
+
+
+def test_ida_e_volta_com_datas_e_ids():
+    linhas = [linha('gil', user_id='123456789012345678', Data_Ultima_Atualizacao='2026-10-05 20:00:00'),
+              linha('hugo', Data_Ultima_Atualizacao='')]
+    df = motor.tabela_de_valores(UPS, valores(linhas))
+    assert pd.api.types.is_datetime64_any_dtype(df['Data_Ultima_Atualizacao'].dtype)
+    assert motor.tabela_texto(UPS, df).values.tolist() == linhas
+
+
+def test_diferencas_so_das_linhas_alteradas_com_versao_nova():
+    base = motor.tabela_de_valores(UPS, valores(membros()))
+    novo = base.copy()
+    novo.loc[1, 'Pontos_Total_Final'] = 81.0
+    novo = novo.drop(index=3)
+    ops = motor.diferencas(UPS, base, novo)
+    assert [(op.acao, op.chave) for op in ops] == [('atualizar', 'bob'), ('remover', 'davi')]
+    versao = UPS.colunas.index(UPS.col_versao)
+    assert ops[0].valores[versao] != ops[0].anteriores[versao]
@@ -0,0 +1,37 @@
+"""Ranking paginado: ordem por total e cargo, filtro pelo nome e estilos da situação por linha."""
+from nucleo import motor
+from nucleo.ranking import COL_ESTILO
+
+from tests.conftest import UPS, abrir_sqlite
+
+# Total desc, empate pelo cargo mais alto (carol e alice têm 50)
+ORDEM = ['bob', 'carol', 'alice', 'davi']
+
+
+def carregar():
+    return motor.carregar(UPS, abrir_sqlite())
+
+
+def test_ranking_ordena_por_total_e_cargo():
+    ranking = motor.ranking(UPS, carregar())
+    assert ranking.dados(ranking.tabela)['usuario'].tolist() == ORDEM
+    assert ranking.dados(ranking.filtrar('CAR')).index.tolist() == [2]
+    assert ranking.filtrar('  ') is ranking.tabela
+
+
+def test_pagina_do_ranking():
+    ranking = motor.ranking(UPS, carregar())
+    pagina = ranking.pagina(ranking.tabela, 2, 3).data
+    assert pagina['usuario'].tolist() == ['davi']
+    assert pagina.index.tolist() == [4]
+    assert ranking.total_paginas(ranking.tabela, 3) == 2
+    assert ranking.total_paginas(ranking.filtrar('ninguem'), 3) == 1
+
+
+def test_estilos_pela_situacao():
+    df = carregar()
+    df['situação'] = ['UPADO', 'REBAIXADO', 'MANTEVE', 'Em andamento (1/1)']
+    ranking = motor.ranking(UPS, df, {'UPADO': 'color: green', 'REBAIXADO': 'color: red', 'MANTEVE': 'color: orange'})
+    # na ordem do ranking: bob (REBAIXADO), carol (MANTEVE), alice (UPADO), davi sem estilo
+    assert ranking.tabela[COL_ESTILO].tolist() == ['color: red', 'color: orange', 'color: green', '']
+    assert 'color: orange' in ranking.pagina(ranking.tabela, 1, 2).to_html()
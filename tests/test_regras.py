@@ -0,0 +1,41 @@
+"""Regras de UP/MANTER/REBAIXAR sobre as metas compiladas."""
+import pytest
+
+from nucleo import motor
+from nucleo.regras import SITUACOES
+
+UPS, CALL = motor.UPS, motor.CALL
+
+
+def test_regras_de_cargo():
+    metas = UPS.metas_compiladas
+    cargo = UPS.cargos[1]
+    meta_up, meta_manter = UPS.metas[cargo]['meta_up'], UPS.metas[cargo]['meta_manter']
+    assert metas.avaliar_membro(cargo, meta_up) == ('UPADO', UPS.cargos[2])
+    assert metas.avaliar_membro(cargo, meta_manter) == ('MANTEVE', cargo)
+    assert metas.avaliar_membro(UPS.cargos[0], 0) == ('REBAIXADO', UPS.cargos[0])
+
+
+@pytest.mark.parametrize('sistema', [UPS, CALL], ids=lambda s: s.nome)
+def test_avaliar_vetorizado_igual_ao_membro(sistema):
+    metas = sistema.metas_compiladas
+    cargos = list(sistema.cargos) * 3
+    pontos = [sistema.metas[c][meta] for meta in ('meta_up', 'meta_manter') for c in sistema.cargos]
+    pontos += [0.0] * len(sistema.cargos)
+    codigos, novos = metas.avaliar(metas.ordinais(cargos), pontos)
+    esperado = [metas.avaliar_membro(c, p) for c, p in zip(cargos, pontos)]
+    assert list(zip(SITUACOES[codigos], metas.cargos[novos])) == esperado
+
+
+def test_ultimo_cargo_nao_passa_do_topo():
+    metas = UPS.metas_compiladas
+    topo = UPS.cargos[-1]
+    assert metas.avaliar_membro(topo, UPS.metas[topo]['meta_up']) == ('UPADO', topo)
+
+
+def test_cargo_desconhecido_e_recusado():
+    metas = UPS.metas_compiladas
+    with pytest.raises(ValueError):
+        metas.avaliar(metas.ordinais(['inexistente']), [10.0])
+    with pytest.raises(ValueError):
+        metas.avaliar_membro('inexistente', 10.0)
@@ -0,0 +1,194 @@
+"""RepositorioRetratos: um retrato por aba no processo, trocado a cada versão, lido em voo único e despejado por LRU."""
+import threading
+
+import pandas as pd
+import pytest
+
+from nucleo.retratos import RepositorioRetratos, tamanho
+
+
+def tabela(n=3):
+    return pd.DataFrame({'usuario': [f'm{i}' for i in range(n)], 'total': [float(i) for i in range(n)]})
+
+
+def test_publicar_troca_o_retrato_e_a_geracao():
+    repositorio = RepositorioRetratos(relogio=lambda: 100.0)
+    assert repositorio.atual('ups') is None and repositorio.geracao('ups') == 0
+    primeiro = repositorio.publicar('ups', (1, 'a'), tabela())
+    segundo = repositorio.publicar('ups', (2, 'a'), tabela(5))
+    assert repositorio.atual('ups') is segundo
+    assert (segundo.geracao, segundo.instante) == (2, 100.0)
+    # quem segurava o antigo continua com ele inteiro
+    assert len(primeiro.df) == 3
+    assert repositorio.geracao('ups') == 2 and repositorio.geracao('call') == 0
+
+
+def test_obter_le_so_quando_a_versao_muda():
+    repositorio = RepositorioRetratos()
+    leituras = []
+
+    def carregar():
+        leituras.append(1)
+        return tabela()
+
+    retrato = repositorio.obter('ups', 1, carregar)
+    assert repositorio.obter('ups', 1, carregar) is retrato
+    assert repositorio.obter('ups', 2, carregar).versao == 2
+    assert len(leituras) == 2
+
+
+def test_erro_na_leitura_mantem_o_retrato_atual():
+    repositorio = RepositorioRetratos()
+    retrato = repositorio.obter('ups', 1, tabela)
+
+    def falha():
+        raise ConnectionError('429')
+
+    with pytest.raises(ConnectionError):
+        repositorio.obter('ups', 2, falha)
+    assert repositorio.atual('ups') is retrato
+    # a versão que falhou não fica presa: a próxima tentativa lê de novo
+    assert repositorio.obter('ups', 2, tabela).versao == 2
+
+
+def test_sessoes_simultaneas_dividem_uma_leitura():
+    repositorio = RepositorioRetratos()
+    liberar = threading.Event()
+    leituras = []
+
+    def carregar():
+        leituras.append(1)
+        liberar.wait(5)
+        return tabela()
+
+    resultados = []
+    sessoes = [threading.Thread(target=lambda: resultados.append(repositorio.obter('ups', 1, carregar)))
+               for _ in range(8)]
+    for sessao in sessoes:
+        sessao.start()
+    liberar.set()
+    for sessao in sessoes:
+        sessao.join(5)
+    assert len(leituras) == 1
+    assert len(resultados) == 8 and all(r is resultados[0] for r in resultados)
+
+
+def test_erro_sobe_para_todas_as_sessoes_que_esperavam():
+    repositorio = RepositorioRetratos()
+    lendo, liberar = threading.Event(), threading.Event()
+
+    def falha():
+        lendo.set()
+        liberar.wait(5)
+        raise ConnectionError('429')
+
+    erros = []
+
+    def sessao():
+        try:
+            repositorio.obter('ups', 1, falha)
+        except ConnectionError as e:
+            erros.append(e)
+
+    primeira = threading.Thread(target=sessao)
+    primeira.start()
+    assert lendo.wait(5)
+    segunda = threading.Thread(target=sessao)
+    segunda.start()
+    liberar.set()
+    primeira.join(5)
+    segunda.join(5)
+    assert len(erros) == 2 and erros[0] is erros[1]
+
+
+def test_em_fundo_devolve_o_antigo_enquanto_le():
+    repositorio = RepositorioRetratos()
+    antigo = repositorio.obter('ups', 1, tabela)
+    liberar = threading.Event()
+
+    def carregar():
+        liberar.wait(5)
+        return tabela(5)
+
+    assert repositorio.obter('ups', 2, carregar, em_fundo=True) is antigo
+    liberar.set()
+    # sem em_fundo, espera a mesma leitura em andamento
+    novo = repositorio.obter('ups', 2, carregar)
+    assert novo.versao == 2 and len(novo.df) == 5
+
+
+def test_leitura_atrasada_nao_substitui_a_mais_nova():
+    repositorio = RepositorioRetratos()
+    lendo, liberar = threading.Event(), threading.Event()
+
+    def lenta():
+        lendo.set()
+        liberar.wait(5)
+        return tabela(1)
+
+    atrasada = threading.Thread(target=repositorio.obter, args=('ups', 1, lenta))
+    atrasada.start()
+    assert lendo.wait(5)
+    nova = repositorio.obter('ups', 2, tabela)
+    liberar.set()
+    atrasada.join(5)
+    assert repositorio.atual('ups') is nova
+
+def test_derivado_guardado_com_o_retrato():
+    repositorio = RepositorioRetratos()
+    repositorio.publicar('ups', 1, tabela())
+    montados = []
+
+    def construir():
+        montados.append(1)
+        return object()
+
+    indice = repositorio.derivado('ups', 'indice', 1, construir)
+    assert repositorio.derivado('ups', 'indice', 1, construir) is indice
+    assert repositorio.derivado('ups', 'indice', 2, construir) is not indice
+    repositorio.publicar('ups', 2, tabela())
+    repositorio.derivado('ups', 'indice', 2, construir)
+    assert len(montados) == 3
+
+
+def test_limite_de_abas_despeja_a_usada_ha_mais_tempo():
+    repositorio = RepositorioRetratos(limite_abas=2)
+    repositorio.publicar('alfa/ups', 1, tabela())
+    repositorio.publicar('beta/ups', 1, tabela())
+    repositorio.atual('alfa/ups')  # usada agora: a mais antiga passa a ser beta
+    repositorio.publicar('gama/ups', 1, tabela())
+    assert repositorio.atual('beta/ups') is None
+    assert repositorio.atual('alfa/ups') is not None and repositorio.atual('gama/ups') is not None
+    assert repositorio.uso()[0] == 2
+
+
+def test_limite_de_bytes_conta_derivados_e_consumos():
+    retrato = tabela()
+    repositorio = RepositorioRetratos(limite_bytes=3 * tamanho(retrato))
+    repositorio.publicar('alfa/ups', 1, retrato)
+    repositorio.derivado('alfa/ups', 'ranking', 1, object, medir=lambda _: tamanho(retrato))
+    liberados = []
+    repositorio.cobrar('alfa/historico', tamanho(retrato) // 2, lambda: liberados.append('alfa'))
+    abas, usados = repositorio.uso()
+    assert abas == 1 and usados == 2 * tamanho(retrato) + tamanho(retrato) // 2
+
+    # Outra guilda não cabe junto: sai o retrato mais antigo (com o derivado) e depois o consumo
+    repositorio.publicar('beta/ups', 1, tabela(40))
+    assert repositorio.atual('alfa/ups') is None
+    assert liberados == ['alfa']
+    assert repositorio.uso() == (1, tamanho(tabela(40)))
+
+
+def test_a_mais_recente_fica_mesmo_acima_do_limite():
+    repositorio = RepositorioRetratos(limite_bytes=1)
+    retrato = repositorio.publicar('ups', 1, tabela())
+    assert repositorio.atual('ups') is retrato
+
+
+def test_cobrar_de_novo_atualiza_e_troca_o_dono():
+    repositorio = RepositorioRetratos()
+    liberados = []
+    repositorio.cobrar('historico', 100, lambda: liberados.append('velho'))
+    repositorio.cobrar('historico', 300, lambda: liberados.append('novo'))
+    assert repositorio.uso() == (0, 300)
+    assert liberados == ['velho']
@@ -0,0 +1,88 @@
+"""ControleVersoes: só mudança externa ou escrita nossa muda a versão, e a revisão das nossas escritas é absorvida."""
+from nucleo.versao import ControleVersoes
+
+
+class Revisao:
+    """Revisão do backend (modifiedTime) e relógio controlados pelo teste."""
+
+    def __init__(self):
+        self.valor = 1
+        self.agora = 0.0
+        self.sondas = 0
+
+    def __call__(self):
+        self.sondas += 1
+        return self.valor
+
+
+def controle(revisao):
+    return ControleVersoes(relogio=lambda: revisao.agora)
+
+
+def test_sonda_no_maximo_uma_vez_por_intervalo():
+    revisao = Revisao()
+    versoes = controle(revisao)
+    assert versoes.versao('aba', revisao, intervalo=30) == (0, 0)
+    revisao.valor = 2
+    assert versoes.versao('aba', revisao, intervalo=30) == (0, 0)
+    assert revisao.sondas == 1
+    revisao.agora = 30.0
+    assert versoes.versao('aba', revisao, intervalo=30) == (0, 1)
+
+
+def test_escrita_nossa_nao_conta_como_externa():
+    revisao = Revisao()
+    versoes = controle(revisao)
+    versoes.versao('aba', revisao, intervalo=0)
+
+    def gravar(valor):
+        revisao.valor = valor
+        return 'ok'
+
+    assert versoes.gravacao(gravar, revisao, nome='aba')(2) == 'ok'
+    # uma recarga pelo contador local; a revisão nova já é a conhecida
+    assert versoes.versao('aba', revisao, intervalo=0) == (1, 0)
+    revisao.valor = 3
+    assert versoes.versao('aba', revisao, intervalo=0) == (1, 1)
+
+
+def test_escrita_numa_aba_nao_invalida_as_outras_da_mesma_planilha():
+    revisao = Revisao()
+    versoes = controle(revisao)
+    for aba in ('ups', 'call'):
+        versoes.versao(aba, revisao, intervalo=0, origem='planilha')
+
+    def gravar():
+        revisao.valor += 1
+
+    versoes.gravacao(gravar, revisao, nome='ups', origem='planilha')()
+    assert versoes.versao('ups', revisao, intervalo=0, origem='planilha') == (1, 0)
+    assert versoes.versao('call', revisao, intervalo=0, origem='planilha') == (0, 0)
+
+
+def test_mudanca_externa_antes_da_escrita_continua_visivel():
+    revisao = Revisao()
+    versoes = controle(revisao)
+    for aba in ('ups', 'call'):
+        versoes.versao(aba, revisao, intervalo=0, origem='planilha')
+    revisao.valor = 2  # outro processo gravou e ninguém sondou ainda
+
+    def gravar():
+        revisao.valor = 3
+
+    versoes.gravacao(gravar, revisao, nome='ups', origem='planilha')()
+    # 'call' não estava na revisão de antes da gravação: a mudança de fora aparece
+    assert versoes.versao('call', revisao, intervalo=0, origem='planilha') == (0, 1)
+
+
+def test_sonda_com_erro_mantem_a_versao():
+    revisao = Revisao()
+    versoes = controle(revisao)
+    versoes.versao('aba', revisao, intervalo=0)
+
+    def falha():
+        raise OSError('sem rede')
+
+    assert versoes.versao('aba', falha, intervalo=0) == (0, 0)
+    assert versoes.incrementar('aba') == 1
+    assert versoes.versao('aba') == (1, 0)
@@ -0,0 +1,52 @@
+"""Horas em call a partir do log de voz: pareamento de sessões, fusão e corte por semana."""
+import io
+import json
+
+from nucleo import voz
+
+# 2026-10-12 é segunda-feira (semana 42)
+EVENTOS = [
+    {'user_id': '1', 'timestamp': '2026-10-11T23:00:00Z', 'type': 'join'},
+    {'user_id': '2', 'timestamp': '2026-10-12T01:00:00Z', 'type': 'leave'},
+    {'user_id': '1', 'timestamp': '2026-10-12T01:00:00Z', 'type': 'move'},
+    {'user_id': '1', 'timestamp': '2026-10-12T02:00:00Z', 'type': 'leave'},
+]
+ESPERADO = {(2026, 41): {'1': 1.0, '2': 1.0}, (2026, 42): {'1': 2.0, '2': 1.0}}
+
+
+def test_ndjson_corta_na_virada_da_semana():
+    arquivo = io.StringIO('\n'.join(json.dumps(e) for e in EVENTOS))
+    assert voz.horas_por_semana(voz.ler_eventos(arquivo, 'voz.ndjson')) == ESPERADO
+
+
+def test_json_binario_com_lista_em_events():
+    arquivo = io.BytesIO(json.dumps({'guild': 'x', 'events': EVENTOS}).encode())
+    assert voz.horas_por_semana(voz.ler_eventos(arquivo, 'voz.json')) == ESPERADO
+
+
+def test_conexoes_simultaneas_contam_uma_vez():
+    assert voz.fundir([(0, 10), (5, 20), (30, 40)]) == [[0, 20], [30, 40]]
+
+
+def test_sessao_sem_saida_fica_limitada():
+    eventos = [{'user_id': '1', 'timestamp': 0, 'type': 'join'}]
+    sessoes = voz.montar_sessoes(eventos, fim=10 * 3600, duracao_maxima=3600)
+    assert sessoes == {'1': [(0.0, 3600.0)]}
+
+
+def test_entrada_repetida_fecha_a_anterior_no_limite():
+    eventos = [{'user_id': '1', 'timestamp': 0, 'type': 'join'},
+               {'user_id': '1', 'timestamp': 7200, 'type': 'join'},
+               {'user_id': '1', 'timestamp': 9000, 'type': 'leave'}]
+    assert voz.montar_sessoes(eventos, duracao_maxima=3600) == {'1': [(0.0, 3600.0), (7200.0, 9000.0)]}
+
+
+def test_evento_sem_tipo_usa_o_canal():
+    assert voz.ler_evento({'user': {'id': 7}, 'timestamp': 1, 'channel_id': None}) == ('7', 1.0, voz.SAIDA)
+    assert voz.ler_evento({'user_id': 7, 'timestamp': 1, 'channel_id': 3}) == ('7', 1.0, voz.ENTRADA)
+    assert voz.ler_evento({'user_id': 7, 'timestamp': 1, 'type': 'mute'}) is None
+
+
+def test_lote_da_semana_inclui_ausentes_com_zero():
+    lote = voz.lote_da_semana(ESPERADO, (2026, 42), ['1', '3'])
+    assert dict(zip(lote['user_id'], lote['horas'])) == {'1': 2.0, '2': 1.0, '3': 0.0}